@@ -0,0 +1,574 @@
+# bench/paginas.py
+"""
+Benchmark ponta a ponta das páginas do app (AppTest do Streamlit).
+
+Cada sessão simulada abre o main.py com o backend SQLite semeado
+(VDS_BACKEND=sqlite) e percorre todas as páginas da navegação com um roteiro
+de interações (filtrar, buscar, abrir edição, salvar). As sessões rodam ao
+mesmo tempo, cada uma em um processo (o AppTest não é thread-safe), sobre o
+mesmo banco SQLite em arquivo. Para cada passo são medidos:
+  - latência do rerun (p50/p95),
+  - consultas por rerun (todas e só as que foram ao banco),
+  - bytes das respostas que vieram do banco,
+  - nº de elementos renderizados.
+
+Uso:
+    python -m bench.paginas [--sessoes 4] [--repeticoes 3] [--saida arquivo.json]
+    python -m bench.paginas --comparar antes.json depois.json [--tolerancia 0.2]
+
+O resultado (JSON) vai por padrão para bench/resultados/, com o commit atual
+no nome, para comparar execuções entre commits. Se algum passo falhar (widget
+não encontrado, exceção na página), a execução termina com código 1 e nada é
+salvo: os passos com erro ficam fora das latências.
+
+Limitações do AppTest (contornadas aqui):
+  - todas as sessões têm o mesmo session_id; o pool de clientes passa a usar
+    uma chave por sessão simulada, como seriam navegadores distintos;
+  - não há rerun só de fragmento: st.rerun(scope="fragment") vira erro e o
+    passo é completado com um rerun da página inteira (medido junto);
+  - o login é feito direto no backend local, sem o formulário (o st.rerun()
+    da página de login não sai da página no AppTest).
+  - componentes customizados (calendário da Agenda) não rodam: a navegação
+    grava no session_state o que o callback eventsSet gravaria.
+"""
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+# antes de importar src: backend local em arquivo (compartilhado pelos
+# processos das sessões), sem ouvinte de tempo real
+os.environ["VDS_BACKEND"] = "sqlite"
+os.environ.setdefault("VDS_TEMPO_REAL", "0")
+_BANCO_TEMPORARIO = "VDS_SQLITE_CAMINHO" not in os.environ
+os.environ.setdefault(
+    "VDS_SQLITE_CAMINHO",
+    str(Path(tempfile.gettempdir()) / f"vds-bench-{os.getpid()}.sqlite3"),
+)
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import src.supabase_client as cliente  # noqa: E402
+from src.backend_sqlite import AuthLocal, banco_local  # noqa: E402
+from src.calendario import deslocar  # noqa: E402
+from src.config import LOCAL_EMAIL, LOCAL_SENHA  # noqa: E402
+from src.supabase_client import (  # noqa: E402
+    ExecucaoConsulta,
+    _ArmazenamentoSessao,
+    deixar_de_observar,
+    observar_consultas,
+)
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except Exception:
+    get_script_run_ctx = None
+
+MAIN = RAIZ / "main.py"
+RESULTADOS = RAIZ / "bench" / "resultados"
+TIMEOUT_RERUN = 60.0
+_CHAVE_SESSAO = "_bench_sessao"  # nº da sessão simulada (atribui as consultas)
+_CHAVE_CLIENTE = "_bench_cliente"  # chave da sessão no pool de clientes
+_ERRO_FRAGMENTO = 'scope="fragment"'
+
+
+# ---------- roteiros ----------
+def _widget(
+    lista,
+    rotulo: str | None = None,
+    chave: str | None = None,
+    prefixo: str | None = None,
+):
+    for w in lista:
+        if rotulo is not None and w.label == rotulo:
+            return w
+        if chave is not None and w.key == chave:
+            return w
+        if prefixo is not None and (w.key or "").startswith(prefixo):
+            return w
+    raise LookupError(f"widget não encontrado: {rotulo or chave or prefixo}")
+
+
+def _completar(at: AppTest) -> AppTest:
+    # rerun de fragmento recusado pelo AppTest: o estado já foi alterado antes
+    # do st.rerun(), então o rerun completo mostra o que o fragmento mostraria
+    if any(_ERRO_FRAGMENTO in str(e.value) for e in at.exception):
+        at.run()
+    return at
+
+
+def _abrir(pagina: str):
+    return lambda at: at.switch_page(pagina).run()
+
+
+def _rerun(at: AppTest):
+    return at.run()
+
+
+def _clicar(**busca):
+    return lambda at: _completar(_widget(at.button, **busca).click().run())
+
+
+def _escolher(valor, **busca):
+    return lambda at: _completar(_widget(at.selectbox, **busca).select(valor).run())
+
+
+def _digitar(texto: str, **busca):
+    return lambda at: _completar(_widget(at.text_input, **busca).input(texto).run())
+
+
+def _escolher_segundo(**busca):
+    def acao(at):
+        w = _widget(at.selectbox, **busca)
+        return _completar(w.select(w.options[min(1, len(w.options) - 1)]).run())
+
+    return acao
+
+
+def _segmento(valor, chave: str):
+    return lambda at: _completar(
+        _widget(at.button_group, chave=chave).set_value(valor).run()
+    )
+
+
+def _navegar_agenda(passos: int = 0, visao: str | None = None):
+    # a barra do FullCalendar não existe no AppTest: reproduz o que o callback
+    # eventsSet faz na página (grava visão e data exibidas e reroda)
+    def acao(at):
+        visao_atual = visao or at.session_state["agenda_visao"]
+        ref = deslocar(visao_atual, at.session_state["agenda_ref"], passos)
+        at.session_state["agenda_visao"] = visao_atual
+        at.session_state["agenda_ref"] = ref
+        return _completar(at.run())
+
+    return acao
+
+
+Passo = tuple[str, Callable[[AppTest], object]]
+
+# Login é medido sem sessão (abrir e tentativa inválida); as demais páginas
+# partem de uma sessão autenticada e navegam pelo st.navigation do main.py
+ROTEIROS: dict[str, list[Passo]] = {
+    "pages/0_Login.py": [
+        ("abrir", _rerun),
+        (
+            "login inválido",
+            lambda at: (
+                _widget(at.text_input, rotulo="E-mail").input(LOCAL_EMAIL),
+                _widget(at.text_input, rotulo="Senha").input("senha-errada"),
+                _widget(at.button, rotulo="Entrar").click().run(),
+            ),
+        ),
+    ],
+    "pages/00_Home.py": [
+        ("abrir", _abrir("pages/00_Home.py")),
+        ("rerun", _rerun),
+    ],
+    "pages/1_Metricas.py": [
+        ("abrir", _abrir("pages/1_Metricas.py")),
+        ("rerun", _rerun),
+    ],
+    "pages/2_Ocorrencias.py": [
+        ("abrir", _abrir("pages/2_Ocorrencias.py")),
+        ("filtrar status", _escolher("aberta", rotulo="Filtrar status")),
+        ("próxima página", _clicar(chave="ocorrencias_pagina_proxima")),
+        ("buscar", _digitar("vazamento garagem", rotulo="Buscar por título/descrição")),
+        ("limpar busca", _digitar("", rotulo="Buscar por título/descrição")),
+        ("abrir edição", _clicar(prefixo="edit_")),
+        ("salvar", _clicar(prefixo="FormSubmitter:form_edit_")),
+        ("lista compacta", _segmento("lista", "ocorrencias_modo")),
+    ],
+    "pages/3_Fluxo_de_Caixa.py": [
+        ("abrir", _abrir("pages/3_Fluxo_de_Caixa.py")),
+        ("resumo: tudo", _segmento(0, "fluxo_janela")),
+        ("filtrar tipo", _escolher("saida", rotulo="Tipo")),
+        ("escolher transação", _escolher_segundo(chave="fluxo_tx_escolha")),
+        ("salvar", _clicar(rotulo="Salvar alterações")),
+    ],
+    "pages/4_Agenda.py": [
+        ("abrir", _abrir("pages/4_Agenda.py")),
+        ("próximo período", _navegar_agenda(passos=1)),
+        ("visão semana", _navegar_agenda(visao="timeGridWeek")),
+        ("nova ocorrência", _clicar(rotulo="➕ Nova Ocorrência")),
+    ],
+    "pages/5_Moradores.py": [
+        ("abrir", _abrir("pages/5_Moradores.py")),
+        ("buscar", _digitar("ana", chave="moradores_busca")),
+        ("escolher morador", _clicar(prefixo="pick_")),
+        ("salvar", _clicar(rotulo="Salvar alterações")),
+    ],
+}
+
+
+# passos cujo resultado esperado inclui um erro na tela (não contam como falha)
+ERROS_ESPERADOS = {("pages/0_Login.py", "login inválido")}
+
+
+def paginas_navegacao() -> list[str]:
+    # mesma lista do st.navigation do main.py (página nova sem roteiro = só abrir)
+    return re.findall(r'st\.Page\(\s*"([^"]+)"', MAIN.read_text(encoding="utf-8"))
+
+
+# ---------- medição ----------
+@dataclass
+class Medida:
+    latencia: float
+    consultas: int
+    consultas_banco: int
+    bytes: int
+    elementos: int
+    erro: str | None = None
+
+
+@dataclass
+class Coletor:
+    """Consultas observadas, separadas pela sessão simulada que as disparou."""
+
+    por_sessao: dict[int, list[ExecucaoConsulta]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __call__(self, execucao: ExecucaoConsulta) -> None:
+        ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+        if ctx is None:
+            return
+        try:
+            sessao = ctx.session_state[_CHAVE_SESSAO]
+        except (KeyError, AttributeError):
+            return
+        with self.lock:
+            self.por_sessao.setdefault(sessao, []).append(execucao)
+
+    def retirar(self, sessao: int) -> list[ExecucaoConsulta]:
+        with self.lock:
+            return self.por_sessao.pop(sessao, [])
+
+
+def contar_elementos(no) -> int:
+    filhos = getattr(no, "children", None)
+    if filhos is None:
+        return 1
+    return sum(contar_elementos(f) for f in filhos.values())
+
+
+_sessao_atual_original = cliente._sessao_atual
+
+
+def _sessao_simulada() -> tuple[str, dict]:
+    # substitui src.supabase_client._sessao_atual durante o benchmark
+    sessao, armazenamento = _sessao_atual_original()
+    ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+    try:
+        return ctx.session_state[_CHAVE_CLIENTE], armazenamento
+    except (KeyError, AttributeError):
+        return sessao, armazenamento
+
+
+def _nova_sessao(numero: int, autenticada: bool) -> AppTest:
+    at = AppTest.from_file(str(MAIN), default_timeout=TIMEOUT_RERUN)
+    at.session_state[_CHAVE_SESSAO] = numero
+    at.session_state[_CHAVE_CLIENTE] = f"bench-{numero}-{uuid.uuid4().hex[:8]}"
+    if autenticada:
+        armazenamento: dict = {}
+        AuthLocal(
+            banco_local(), _ArmazenamentoSessao(armazenamento)
+        ).sign_in_with_password({"email": LOCAL_EMAIL, "password": LOCAL_SENHA})
+        at.session_state["_sb_auth_storage"] = armazenamento
+        at.run()
+    return at
+
+
+def _medir(
+    at: AppTest, acao, coletor: Coletor, sessao: int, erro_esperado: bool = False
+) -> Medida:
+    coletor.retirar(sessao)
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        acao(at)
+    except Exception as e:
+        erro = f"{type(e).__name__}: {e}"
+    latencia = time.perf_counter() - inicio
+    consultas = coletor.retirar(sessao)
+    banco = [c for c in consultas if not c.do_cache]
+    if erro is None and not erro_esperado and len(at.exception):
+        erro = str(at.exception[0].value)[:200]
+    try:
+        elementos = contar_elementos(at._tree)
+    except Exception:
+        elementos = 0
+    return Medida(
+        latencia,
+        len(consultas),
+        len(banco),
+        sum(c.bytes or 0 for c in banco),
+        elementos,
+        erro,
+    )
+
+
+def simular_sessao(
+    numero: int, paginas: list[str], repeticoes: int, coletor: Coletor
+) -> dict:
+    """Percorre os roteiros `repeticoes` vezes; devolve {pagina: {passo: [Medida]}}."""
+    medidas: dict[str, dict[str, list[Medida]]] = {}
+    for _ in range(repeticoes):
+        at = _nova_sessao(numero, autenticada=True)
+        for pagina in paginas:
+            if pagina == "pages/0_Login.py":
+                continue
+            for nome, acao in ROTEIROS.get(pagina, [("abrir", _abrir(pagina))]):
+                medidas.setdefault(pagina, {}).setdefault(nome, []).append(
+                    _medir(at, acao, coletor, numero, (pagina, nome) in ERROS_ESPERADOS)
+                )
+        if "pages/0_Login.py" in paginas:
+            anonima = _nova_sessao(numero, autenticada=False)
+            for nome, acao in ROTEIROS["pages/0_Login.py"]:
+                medidas.setdefault("pages/0_Login.py", {}).setdefault(nome, []).append(
+                    _medir(
+                        anonima,
+                        acao,
+                        coletor,
+                        numero,
+                        ("pages/0_Login.py", nome) in ERROS_ESPERADOS,
+                    )
+                )
+    return medidas
+
+
+def percentil(valores: list[float], p: float) -> float:
+    # nearest-rank: sem interpolação, estável para amostras pequenas
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p * len(ordenados)) - 1)]
+
+
+def resumir(medidas: list[Medida]) -> dict:
+    # passos com erro não entram nas latências (um passo que falhou cedo
+    # mediria ~0 ms); ficam listados em "erros" e reprovam a execução
+    latencias = [m.latencia * 1000 for m in medidas if not m.erro]
+    n = len(medidas) or 1
+    return {
+        "amostras": len(medidas),
+        "p50_ms": round(percentil(latencias, 0.50), 2),
+        "p95_ms": round(percentil(latencias, 0.95), 2),
+        "consultas": round(sum(m.consultas for m in medidas) / n, 2),
+        "consultas_banco": round(sum(m.consultas_banco for m in medidas) / n, 2),
+        "bytes": round(sum(m.bytes for m in medidas) / n),
+        "elementos": round(sum(m.elementos for m in medidas) / n, 1),
+        "erros": sorted({m.erro for m in medidas if m.erro}),
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "desconhecido"
+
+
+def _processo_sessao(numero: int, paginas: list[str], repeticoes: int) -> dict:
+    # roda num processo próprio: aquece e depois mede uma sessão simulada
+    # (o rerun de fragmento recusado pelo AppTest é logado como erro; ver _completar)
+    logging.getLogger("streamlit").setLevel(logging.CRITICAL)
+    coletor = observar_consultas(Coletor())
+    cliente._sessao_atual = _sessao_simulada
+    try:
+        # aquecimento: imports, compilação das páginas e caches frios fora da medição
+        simular_sessao(numero, paginas, 1, coletor)
+        medidas = simular_sessao(numero, paginas, repeticoes, coletor)
+    finally:
+        deixar_de_observar(coletor)
+        cliente._sessao_atual = _sessao_atual_original
+    return {
+        p: {n: [asdict(m) for m in ms] for n, ms in passos.items()}
+        for p, passos in medidas.items()
+    }
+
+
+def executar(sessoes: int, repeticoes: int, paginas: list[str] | None = None) -> dict:
+    paginas = paginas or paginas_navegacao()
+    caminho = Path(os.environ["VDS_SQLITE_CAMINHO"])
+    if _BANCO_TEMPORARIO:
+        caminho.unlink(missing_ok=True)
+    banco_local()  # cria e semeia uma vez, antes dos processos das sessões
+    try:
+        inicio = time.perf_counter()
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=sessoes, mp_context=contexto) as ex:
+            futuros = [
+                ex.submit(_processo_sessao, n, paginas, repeticoes)
+                for n in range(sessoes)
+            ]
+            brutos = [f.result() for f in futuros]
+        duracao = time.perf_counter() - inicio
+    finally:
+        if _BANCO_TEMPORARIO:
+            for sufixo in ("", "-wal", "-shm"):
+                Path(f"{caminho}{sufixo}").unlink(missing_ok=True)
+    resultados = [
+        {
+            p: {n: [Medida(**m) for m in ms] for n, ms in passos.items()}
+            for p, passos in r.items()
+        }
+        for r in brutos
+    ]
+
+    relatorio: dict = {}
+    for pagina in paginas:
+        passos: dict[str, list[Medida]] = {}
+        for r in resultados:
+            for nome, ms in r.get(pagina, {}).items():
+                passos.setdefault(nome, []).extend(ms)
+        relatorio[pagina] = {
+            "passos": {nome: resumir(ms) for nome, ms in passos.items()},
+            "total": resumir([m for ms in passos.values() for m in ms]),
+        }
+    return {
+        "versao": 1,
+        "commit": _commit(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "parametros": {
+            "sessoes": sessoes,
+            "repeticoes": repeticoes,
+            "backend": "sqlite",
+        },
+        # inclui o aquecimento e a partida dos processos
+        "duracao_s": round(duracao, 2),
+        "paginas": relatorio,
+    }
+
+
+# ---------- saída ----------
+def imprimir(resultado: dict) -> None:
+    print(
+        f"commit {resultado['commit']} — {resultado['parametros']} — "
+        f"{resultado['duracao_s']}s"
+    )
+    cabecalho = (
+        f"{'página / passo':<44}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'cons.':>7}{'banco':>7}{'bytes':>9}{'elem.':>7}"
+    )
+    print(cabecalho)
+    print("-" * len(cabecalho))
+    for pagina, dados in resultado["paginas"].items():
+        linhas = [(Path(pagina).stem, dados["total"])] + [
+            (f"  {n}", r) for n, r in dados["passos"].items()
+        ]
+        for nome, r in linhas:
+            print(
+                f"{nome[:43]:<44}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+                f"{r['consultas']:>7.1f}{r['consultas_banco']:>7.1f}"
+                f"{r['bytes']:>9}{r['elementos']:>7.0f}"
+            )
+            for erro in r["erros"]:
+                print(f"    ! {erro}")
+
+
+def erros(resultado: dict) -> list[str]:
+    """Erros inesperados de todos os passos ("página / passo: erro")."""
+    return [
+        f"{pagina} / {nome}: {erro}"
+        for pagina, dados in resultado["paginas"].items()
+        for nome, r in dados["passos"].items()
+        for erro in r["erros"]
+    ]
+
+
+def comparar(antes: dict, depois: dict, tolerancia: float) -> bool:
+    """Imprime as diferenças por passo; True se algum p95 piorou além da tolerância."""
+    print(f"{antes['commit']} -> {depois['commit']}")
+    regressao = False
+    for pagina, dados in depois["paginas"].items():
+        passos_antes = antes["paginas"].get(pagina, {}).get("passos", {})
+        for nome, r in dados["passos"].items():
+            a = passos_antes.get(nome)
+            if a is None:
+                print(f"{pagina} / {nome}: novo")
+                continue
+            variacao = (r["p95_ms"] - a["p95_ms"]) / a["p95_ms"] if a["p95_ms"] else 0.0
+            marca = ""
+            if variacao > tolerancia:
+                marca, regressao = "  << REGRESSÃO", True
+            print(
+                f"{Path(pagina).stem} / {nome}: "
+                f"p95 {a['p95_ms']:.1f} -> {r['p95_ms']:.1f} ms "
+                f"({variacao:+.0%}), consultas {a['consultas']} -> {r['consultas']}, "
+                f"elementos {a['elementos']} -> {r['elementos']}{marca}"
+            )
+    return regressao
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark das páginas com sessões simuladas."
+    )
+    parser.add_argument("--sessoes", type=int, default=4, help="sessões simultâneas")
+    parser.add_argument(
+        "--repeticoes",
+        type=int,
+        default=3,
+        help="vezes que cada sessão percorre os roteiros",
+    )
+    parser.add_argument(
+        "--pagina", action="append", help="limita a uma página (pode repetir)"
+    )
+    parser.add_argument("--saida", type=Path, help="arquivo JSON do resultado")
+    parser.add_argument("--comparar", nargs=2, type=Path, metavar=("ANTES", "DEPOIS"))
+    parser.add_argument(
+        "--tolerancia", type=float, default=0.2, help="piora aceitável do p95 (fração)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        antes, depois = (
+            json.loads(p.read_text(encoding="utf-8")) for p in args.comparar
+        )
+        return 1 if comparar(antes, depois, args.tolerancia) else 0
+
+    resultado = executar(args.sessoes, args.repeticoes, args.pagina)
+    imprimir(resultado)
+    falhas = erros(resultado)
+    if falhas:
+        # tempos de um roteiro quebrado não servem de base de comparação
+        print(f"\n{len(falhas)} passo(s) com erro; resultado não salvo.")
+        return 1
+    saida = (
+        args.saida
+        or RESULTADOS
+        / f"paginas-{resultado['commit']}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(
+        json.dumps(resultado, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    print(f"\nresultado salvo em {saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
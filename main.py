@@ -1,36 +1,46 @@
 # main.py
 import streamlit as st
-from src.supabase_client import supabase, ensure_postgrest_auth
+
+from src.auth import usuario_atual
+from src.rastreamento import iniciar_rastreamento, rerun_rastreado
+from src.supabase_client import ensure_postgrest_auth
+from src.tempo_real import iniciar_tempo_real
+from src.ui import painel_rastreamento
 
 st.set_page_config(page_title="Vila da Serra", page_icon="🏢", layout="wide")
 
-ensure_postgrest_auth()
-
-def get_user():
-    try:
-        res = supabase.auth.get_user()
-        return getattr(res, "user", None)
-    except Exception:
-        return None
-
-user = get_user()
-
-Login       = st.Page("pages/0_Login.py",         title="Login",        icon="🔐")
-Home        = st.Page("pages/00_Home.py",         title="Home",         icon="🏠")
-Metricas    = st.Page("pages/1_Metricas.py",      title="Métricas",     icon="📈")
-Ocorrencias = st.Page("pages/2_Ocorrencias.py",   title="Ocorrências",  icon="📝")
-Fluxo       = st.Page("pages/3_Fluxo_de_Caixa.py",title="Fluxo de Caixa", icon="💰")
-Agenda      = st.Page("pages/4_Agenda.py",        title="Agenda",       icon="🗓️")
-Moradores   = st.Page("pages/5_Moradores.py",     title="Moradores",    icon="👥")
-
-if user:
-    nav = st.navigation(
-        {
-            "Início": [Home],
-            "Módulos": [Metricas, Ocorrencias, Fluxo, Agenda, Moradores],
-        }
-    )
-else:
-    nav = st.navigation({"": [Login]})
-
-nav.run()
+# tempos de consultas e auth por rerun (painel, log JSON, /metrics): um por processo
+iniciar_rastreamento()
+
+# ouvinte de mudanças do banco: um por processo (chamadas seguintes não fazem nada)
+iniciar_tempo_real()
+
+Login = st.Page("pages/0_Login.py", title="Login", icon="🔐")
+Home = st.Page("pages/00_Home.py", title="Home", icon="🏠")
+Metricas = st.Page("pages/1_Metricas.py", title="Métricas", icon="📈")
+Ocorrencias = st.Page("pages/2_Ocorrencias.py", title="Ocorrências", icon="📝")
+Fluxo = st.Page("pages/3_Fluxo_de_Caixa.py", title="Fluxo de Caixa", icon="💰")
+Agenda = st.Page("pages/4_Agenda.py", title="Agenda", icon="🗓️")
+Moradores = st.Page("pages/5_Moradores.py", title="Moradores", icon="👥")
+
+with rerun_rastreado() as rastro:
+    ensure_postgrest_auth()
+
+    # validação local do token + usuário em cache (sem ida ao GoTrue a cada rerun)
+    user = usuario_atual()
+
+    if user:
+        nav = st.navigation(
+            {
+                "Início": [Home],
+                "Módulos": [Metricas, Ocorrencias, Fluxo, Agenda, Moradores],
+            }
+        )
+    else:
+        nav = st.navigation({"": [Login]})
+
+    rastro.pagina = nav.title
+    nav.run()
+
+# cascata de consultas deste rerun, para administradores
+painel_rastreamento(user)
@@ -1,7 +1,8 @@
 # pages/00_Home.py
 import streamlit as st
+
+from src.auth import sair
 from src.ui import require_auth
-from src.supabase_client import supabase
 
 st.set_page_config(page_title="Vila da Serra — Home", page_icon="🏠", layout="wide")
 
@@ -14,11 +15,7 @@ col_user.success(f"Conectado: {user.email}")
 
 if col_logout.button("Sair"):
     try:
-        supabase.auth.sign_out()
-        try:
-            supabase.postgrest.auth(None)
-        except Exception:
-            pass
+        sair()
         st.query_params.clear()
         st.rerun()  # volta ao main.py, que mostrará a página de Login
     finally:
@@ -27,10 +24,12 @@ if col_logout.button("Sair"):
 
 st.write("Selecione um módulo para continuar.")
 
+
 def go(label: str, page_path: str):
     if st.button(label, use_container_width=True, type="primary"):
         st.switch_page(page_path)
 
+
 go("📈 Métricas", "pages/1_Metricas.py")
 go("📝 Ocorrências", "pages/2_Ocorrencias.py")
 go("💰 Fluxo de Caixa", "pages/3_Fluxo_de_Caixa.py")
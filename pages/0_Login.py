@@ -1,23 +1,21 @@
 # pages/0_Login.py
 import streamlit as st
-from src.supabase_client import supabase, ensure_postgrest_auth
 
-st.set_page_config(page_title="Vila da Serra — Login", page_icon="🔐", layout="centered")
+from src.auth import entrar_com_senha, usuario_atual
+from src.supabase_client import ensure_postgrest_auth, get_client
+
+st.set_page_config(
+    page_title="Vila da Serra — Login", page_icon="🔐", layout="centered"
+)
 
 ensure_postgrest_auth()
 
 st.title("🔐 Acesso")
 
-def get_current_user():
-    try:
-        resp = supabase.auth.get_user()
-        return getattr(resp, "user", None)
-    except Exception:
-        return None
-
-user = get_current_user()
+user = usuario_atual()
 
-# Se já estiver logado e abrir /Login, apenas re-renderizamos para o main decidir (vai cair na Home)
+# Se já estiver logado e abrir /Login, apenas re-renderizamos para o main
+# decidir (vai cair na Home)
 if user:
     st.success(f"Você já está autenticado como {user.email}.")
     st.query_params.clear()
@@ -34,23 +32,29 @@ if entrar:
         st.error("Informe e-mail e senha.")
     else:
         try:
-            res = supabase.auth.sign_in_with_password({"email": email, "password": password})
+            supabase = get_client()  # cliente exclusivo desta sessão
+            res = entrar_com_senha(email, password)
             # aplica o token ao PostgREST imediatamente
             try:
-                if getattr(res, "session", None) and getattr(res.session, "access_token", None):
+                if getattr(res, "session", None) and getattr(
+                    res.session, "access_token", None
+                ):
                     supabase.postgrest.auth(res.session.access_token)
             except Exception:
                 pass
 
             ensure_postgrest_auth()
-            user = get_current_user()
+            user = usuario_atual()
 
             if user:
                 st.success("Autenticado com sucesso. Redirecionando…")
                 st.query_params.clear()
                 st.rerun()  # deixa o main.py redirecionar para a Home
             else:
-                st.warning("Autenticado, mas não foi possível carregar o usuário. Tente novamente.")
+                st.warning(
+                    "Autenticado, mas não foi possível carregar o usuário. "
+                    "Tente novamente."
+                )
         except Exception as e:
             st.error("Falha ao autenticar. Verifique suas credenciais.")
             st.exception(e)
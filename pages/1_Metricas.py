@@ -1,5 +1,7 @@
+import pandas as pd
 import streamlit as st
-from src.supabase_client import table
+
+from src.metricas import carregar_metricas
 from src.ui import back_home, require_auth
 
 st.set_page_config(page_title="Métricas", page_icon="📈", layout="wide")
@@ -12,27 +14,21 @@ back_home()
 
 st.title("📈 Métricas")
 
-def count_table(table_name: str) -> int:
-    # select com count='exact' retorna apenas a contagem
-    res = table(table_name).select("id", count="exact").execute()
-    return int(res.count or 0)
-
-def count_table_eq(table_name: str, col: str, val: str) -> int:
-    # filtros depois do select (importante para o client do Supabase)
-    q = table(table_name).select("id", count="exact").eq(col, val)
-    res = q.execute()
-    return int(res.count or 0)
-
-def count_table_neq(table_name: str, col: str, val: str) -> int:
-    q = table(table_name).select("id", count="exact").neq(col, val)
-    res = q.execute()
-    return int(res.count or 0)
+STATUS_ROTULOS = {
+    "aberta": "Aberta",
+    "em_andamento": "Em andamento",
+    "finalizada": "Finalizada",
+}
 
 try:
-    total_moradores = count_table("moradores")
-    total_ocorrencias = count_table("ocorrencias")
-    total_finalizadas = count_table_eq("ocorrencias", "status", "finalizada")
-    total_em_aberto = count_table_neq("ocorrencias", "status", "finalizada")
+    # uma única chamada traz todos os contadores (moradores e ocorrências)
+    m = carregar_metricas()
+    total_moradores = int(m["moradores"]["total"])
+    occ = m["ocorrencias"]
+    total_ocorrencias = int(occ["total"])
+    por_status = {k: int(v) for k, v in (occ.get("por_status") or {}).items()}
+    total_finalizadas = por_status.get("finalizada", 0)
+    total_em_aberto = int(occ["em_aberto"])
 
     c1, c2, c3, c4 = st.columns(4)
     with c1:
@@ -44,6 +40,41 @@ try:
     with c4:
         st.metric("Em aberto", f"{total_em_aberto}")
 
+    st.divider()
+
+    col_status, col_mes = st.columns([1, 2])
+    with col_status:
+        st.subheader("Ocorrências por status")
+        if por_status:
+            df_status = pd.DataFrame(
+                {
+                    "Status": [STATUS_ROTULOS.get(s, s) for s in por_status],
+                    "Total": list(por_status.values()),
+                }
+            ).set_index("Status")
+            st.bar_chart(df_status)
+        else:
+            st.info("Nenhuma ocorrência registrada.")
+
+    with col_mes:
+        st.subheader("Ocorrências por mês (últimos 12 meses)")
+        df_mes = pd.DataFrame(occ.get("por_mes") or [])
+        if df_mes.empty:
+            st.info("Nenhuma ocorrência aberta nos últimos 12 meses.")
+        else:
+            df_mes["status"] = df_mes["status"].map(lambda s: STATUS_ROTULOS.get(s, s))
+            tabela_mes = df_mes.pivot_table(
+                index="mes",
+                columns="status",
+                values="total",
+                aggfunc="sum",
+                fill_value=0,
+            )
+            st.bar_chart(tabela_mes)
+
 except Exception as e:
-    st.error("Não foi possível carregar as métricas. Verifique o .env e as policies no Supabase.")
+    st.error(
+        "Não foi possível carregar as métricas. "
+        "Verifique o .env e as policies no Supabase."
+    )
     st.exception(e)
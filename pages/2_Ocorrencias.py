@@ -1,9 +1,35 @@
 # pages/2_Ocorrencias.py
-import streamlit as st
+from datetime import date
+
 import pandas as pd
-from datetime import date, datetime
+import streamlit as st
+
+from src.busca import buscar_ocorrencias
+from src.carregamento import carregar_em_paralelo
+from src.config import PAGINA_TAMANHO
+from src.esquemas import registros
+from src.exportacao import exportar, paginas_keyset, paginas_offset
+from src.formatacao import rotulo_morador
+from src.ocorrencias import (
+    COLUNAS_EXPORTACAO,
+    COLUNAS_LISTA,
+    carregar_descricoes,
+    carregar_detalhe,
+)
+from src.paginacao import Pagina, buscar_pagina, contar
+from src.quadros import quadro_ocorrencias
 from src.supabase_client import table
-from src.ui import back_home, require_auth
+from src.ui import (
+    back_home,
+    controles_paginacao,
+    cursor_pagina,
+    exportar_listagem,
+    limpar_seletor_morador,
+    mostrar_aviso_pendente,
+    recarregar_pagina,
+    require_auth,
+    seletor_morador,
+)
 
 st.set_page_config(page_title="Ocorrências", page_icon="📝", layout="wide")
 
@@ -14,35 +40,26 @@ require_auth()
 back_home()
 
 st.title("📝 Ocorrências")
+mostrar_aviso_pendente()
 
 STATUS_OPCOES = ["aberta", "em_andamento", "finalizada"]
+STATUS_CORES = {
+    "aberta": "#f8d7da",  # vermelho suave
+    "em_andamento": "#fff3cd",  # amarelo/laranja suave
+    "finalizada": "#d4edda",  # verde suave
+}
+STATUS_TEXTO = {
+    "aberta": "Aberta",
+    "em_andamento": "Em andamento",
+    "finalizada": "Finalizada",
+}
+MODOS_EXIBICAO = {"cards": "Cards", "lista": "Lista compacta"}
 
-# ---------- utilitários ----------
-def fmt_data_ddmmaaaa(v):
-    if not v:
-        return ""
-    try:
-        if isinstance(v, (datetime, date)):
-            d = v if isinstance(v, date) else v.date()
-        else:
-            s = str(v).split("T")[0]  # "YYYY-MM-DD"
-            d = datetime.strptime(s, "%Y-%m-%d").date()
-        return d.strftime("%d/%m/%Y")
-    except Exception:
-        return str(v)
 
+# ---------- utilitários ----------
 def status_badge(status: str):
-    cores = {
-        "aberta":       "#f8d7da",  # vermelho suave
-        "em_andamento": "#fff3cd",  # amarelo/laranja suave
-        "finalizada":   "#d4edda",  # verde suave
-    }
-    texto = {
-        "aberta": "Aberta",
-        "em_andamento": "Em andamento",
-        "finalizada": "Finalizada",
-    }.get(status, status)
-    cor = cores.get(status, "#e9ecef")
+    texto = STATUS_TEXTO.get(status, status)
+    cor = STATUS_CORES.get(status, "#e9ecef")
     st.markdown(
         f"""<span style="
             background:{cor};
@@ -55,128 +72,135 @@ def status_badge(status: str):
         unsafe_allow_html=True,
     )
 
-def truncate(texto: str | None, max_chars: int = 240) -> str:
-    if not texto:
-        return "—"
-    t = str(texto).strip()
-    return t if len(t) <= max_chars else t[:max_chars].rstrip() + "..."
-
-def short_id(uid: str | None):
-    if not uid:
-        return "#--------"
-    return f"#{str(uid)[:8].upper()}"
-
-# ---------- dados ----------
-def carregar_moradores():
-    res = table("moradores").select("id,nome,predio,apto").order("nome").execute()
-    dados = res.data or []
-    opcoes = [("— Sem vínculo —", None)]
-    for m in dados:
-        rotulo = f"{m.get('nome','')} — Prédio {m.get('predio','')}, Apto {m.get('apto','')}"
-        opcoes.append((rotulo, m.get("id")))
-    return dados, opcoes
-
-def carregar_ocorrencias():
-    res = (
-        table("ocorrencias")
-        .select("id,titulo,descricao,status,morador_id,data_evento,created_at")
-        .order("created_at", desc=True)
-        .limit(500)
-        .execute()
-    )
-    dados = res.data or []
-    return pd.DataFrame(dados)
-
-if "edit_id" not in st.session_state:
-    st.session_state.edit_id = None
-
-moradores_raw, moradores_opcoes = carregar_moradores()
-df = carregar_ocorrencias()
 
-# Mapa id->rótulo para solicitante
-mapa_morador = {m["id"]: f"{m.get('nome','')} — Prédio {m.get('predio','')}, Apto {m.get('apto','')}" for m in moradores_raw}
+def estilo_status(texto) -> str:
+    # célula da coluna Status na lista compacta, com as cores do badge
+    cor = {STATUS_TEXTO[s]: c for s, c in STATUS_CORES.items()}.get(texto, "#e9ecef")
+    return f"background-color: {cor}; color: #212529"
 
-def rotulo_morador(mid):
-    if not mid:
-        return "—"
-    return mapa_morador.get(mid, "—")
 
 # ---------- filtros ----------
-col_f1, col_f2 = st.columns([1, 2])
+col_f1, col_f2, col_f3 = st.columns([1, 2, 0.6])
 with col_f1:
     filtro_status = st.selectbox("Filtrar status", ["Todos"] + STATUS_OPCOES, index=0)
 with col_f2:
     busca = st.text_input("Buscar por título/descrição")
+with col_f3:
+    opcoes_tamanho = sorted({10, 20, 50, 100, PAGINA_TAMANHO})
+    tamanho_pagina = st.selectbox(
+        "Por página", opcoes_tamanho, index=opcoes_tamanho.index(PAGINA_TAMANHO)
+    )
+
 
-df_view = df.copy()
-if not df_view.empty:
+def consulta_ocorrencias(colunas: str, count: str | None = None):
+    # filtro de status aplicado no servidor: a paginação vale para o resultado filtrado
+    q = table("ocorrencias").select(colunas, count=count)
     if filtro_status != "Todos":
-        df_view = df_view[df_view["status"] == filtro_status]
-    if busca.strip():
-        termo = busca.strip().lower()
-        df_view = df_view[
-            df_view["titulo"].str.lower().str.contains(termo, na=False)
-            | df_view["descricao"].str.lower().str.contains(termo, na=False)
-        ]
+        q = q.eq("status", filtro_status)
+    return q
+
+
+termo_busca = busca.strip()
+status_sel = filtro_status if filtro_status != "Todos" else None
+cursor, _ = cursor_pagina(
+    "ocorrencias_pagina", (filtro_status, termo_busca, tamanho_pagina)
+)
+
+# consultas independentes carregadas ao mesmo tempo
+if termo_busca:
+    # busca textual no banco: ranqueada, com status e paginação por offset
+    consultas = {
+        "busca": lambda: buscar_ocorrencias(
+            termo_busca, status_sel, cursor or 0, tamanho_pagina
+        )
+    }
+else:
+    consultas = {
+        "ocorrencias": lambda: buscar_pagina(
+            lambda: consulta_ocorrencias(COLUNAS_LISTA), cursor, tamanho_pagina
+        ),
+        "total": lambda: contar(lambda: consulta_ocorrencias("id", count="exact")),
+    }
+carga = carregar_em_paralelo(consultas)
+for nome_consulta, erro in carga.erros.items():
+    st.error(f"Não foi possível carregar {nome_consulta}.")
+    st.exception(erro)
+if termo_busca:
+    pagina, total_ocorrencias = carga.valores.get("busca", (Pagina(), 0))
+else:
+    pagina = carga.valores.get("ocorrencias", Pagina())
+    total_ocorrencias = carga.valores.get("total", len(pagina.linhas))
+# tipado e com as colunas de exibição (datas dd/mm/aaaa, id curto, solicitante
+# do morador embutido) já calculadas
+df_view = quadro_ocorrencias(pagina.linhas)
+
 
 # ---------- cards ----------
 def card_visualizacao(row):
     with st.container(border=True):
         c1, c2 = st.columns([0.8, 0.2])
         with c1:
-            status_badge(row.get("status", "aberta"))
-            st.markdown(f"### {row.get('titulo','(sem título)')}")
-            st.caption(f"Solicitante: {rotulo_morador(row.get('morador_id'))}")
+            status_badge(row.get("status") or "aberta")
+            st.markdown(f"### {row.get('titulo') or '(sem título)'}")
+            st.caption(f"Solicitante: {row['solicitante']}")
         with c2:
-            st.write(short_id(row.get("id")))
-            st.caption(f"Abertura: {fmt_data_ddmmaaaa(row.get('created_at'))}")
+            st.write(row["id_curto"])
+            st.caption(f"Abertura: {row['abertura_fmt']}")
 
-        # Resumo sempre visível
-        st.markdown(f"**Resumo:** {truncate(row.get('descricao'))}")
+        # Resumo sempre visível (truncado no banco)
+        st.markdown(f"**Resumo:** {row.get('descricao_resumo') or '—'}")
 
-        # Detalhes opcionais
-        with st.expander("Ver mais", expanded=False):
-            data_evt = fmt_data_ddmmaaaa(row.get("data_evento"))
-            st.markdown(f"**Data do evento:** {data_evt or '—'}")
-            desc_full = row.get("descricao") or "—"
+        # Detalhes opcionais: a descrição completa só é buscada ao abrir
+        if st.toggle("Ver mais", key=f"ver_mais_{row['id']}"):
+            st.markdown(f"**Data do evento:** {row['evento_fmt'] or '—'}")
+            desc_full = carregar_detalhe(row["id"]).get("descricao") or "—"
             st.markdown(f"**Descrição completa:** {desc_full}")
 
         # Botão Editar por último
         if st.button("✏️ Editar", key=f"edit_{row['id']}", use_container_width=True):
-            st.session_state.edit_id = row["id"]
+            st.session_state[f"editando_{row['id']}"] = True
+            st.rerun(scope="fragment")
 
-def card_edicao(row):
+
+def card_edicao(row, ao_cancelar=None):
+    detalhe = carregar_detalhe(row["id"])
     with st.container(border=True):
-        st.markdown(f"### Editando {short_id(row.get('id'))}")
+        st.markdown(f"### Editando {row['id_curto']}")
+
+        # seletor com busca fica fora do form (o form só envia no submit)
+        morador = row.get("morador") if isinstance(row.get("morador"), dict) else {}
+        morador_id = seletor_morador(
+            f"morador_edit_{row['id']}",
+            inicial=(
+                {**morador, "id": row.get("morador_id")}
+                if row.get("morador_id")
+                else None
+            ),
+        )
 
         with st.form(f"form_edit_{row['id']}"):
-            titulo = st.text_input("Título", value=row.get("titulo",""), max_chars=150)
-            descricao = st.text_area("Descrição", value=row.get("descricao",""), height=120)
-
-            idx_status = STATUS_OPCOES.index(row.get("status","aberta")) if row.get("status") in STATUS_OPCOES else 0
+            titulo = st.text_input(
+                "Título", value=row.get("titulo") or "", max_chars=150
+            )
+            descricao = st.text_area(
+                "Descrição", value=detalhe.get("descricao") or "", height=120
+            )
+
+            idx_status = (
+                STATUS_OPCOES.index(row.get("status", "aberta"))
+                if row.get("status") in STATUS_OPCOES
+                else 0
+            )
             status = st.selectbox("Status", STATUS_OPCOES, index=idx_status)
 
-            rotulos, valores = zip(*moradores_opcoes)
-            mid_atual = row.get("morador_id", None)
-            try:
-                idx_m = valores.index(mid_atual)
-            except ValueError:
-                idx_m = 0
-            morador_escolha = st.selectbox("Morador (opcional)", rotulos, index=idx_m)
-            morador_id = valores[rotulos.index(morador_escolha)]
-
-            data_raw = row.get("data_evento")
-            if data_raw:
-                try:
-                    y, m, d = map(int, str(data_raw).split("-"))
-                    data_default = date(y, m, d)
-                except Exception:
-                    data_default = None
-            else:
-                data_default = None
+            data_default = (
+                row["data_evento"].date()
+                if row.get("data_evento") is not None
+                else None
+            )
             data_evt = st.date_input("Data do evento (opcional)", value=data_default)
 
-            col1, col2, col3 = st.columns([1,1,6])
+            col1, col2, col3 = st.columns([1, 1, 6])
             with col1:
                 salvar = st.form_submit_button("Salvar", type="primary")
             with col2:
@@ -193,69 +217,220 @@ def card_edicao(row):
                     "descricao": descricao.strip() if descricao else None,
                     "status": status,
                     "morador_id": morador_id,
-                    "data_evento": data_evt.isoformat() if isinstance(data_evt, date) else None,
+                    "data_evento": (
+                        data_evt.isoformat() if isinstance(data_evt, date) else None
+                    ),
                 }
                 try:
                     table("ocorrencias").update(payload).eq("id", row["id"]).execute()
-                    st.success("Ocorrência atualizada.")
-                    st.session_state.edit_id = None
                 except Exception as e:
                     st.error("Falha ao atualizar.")
                     st.exception(e)
+                else:
+                    st.session_state[f"editando_{row['id']}"] = False
+                    limpar_seletor_morador(f"morador_edit_{row['id']}")
+                    recarregar_pagina("Ocorrência atualizada.")
 
         if cancelar:
-            st.session_state.edit_id = None
+            st.session_state[f"editando_{row['id']}"] = False
+            limpar_seletor_morador(f"morador_edit_{row['id']}")
+            if ao_cancelar:
+                ao_cancelar()
+            st.rerun(scope="fragment")
 
         if excluir:
             try:
                 table("ocorrencias").delete().eq("id", row["id"]).execute()
-                st.success("Ocorrência excluída.")
-                st.session_state.edit_id = None
             except Exception as e:
                 st.error("Falha ao excluir.")
                 st.exception(e)
+            else:
+                st.session_state.pop(f"editando_{row['id']}", None)
+                recarregar_pagina("Ocorrência excluída.")
+
+
+@st.fragment
+def card_ocorrencia(row):
+    # cada card reroda sozinho: editar/cancelar/"ver mais" não recarregam a lista
+    if st.session_state.get(f"editando_{row['id']}"):
+        card_edicao(row)
+    else:
+        card_visualizacao(row)
+
+
+# ---------- lista compacta ----------
+# A página inteira vira um único st.dataframe (status com as cores do badge);
+# a linha selecionada abre o painel de edição. O número de elementos por
+# rerun não depende de quantas ocorrências a página mostra.
+def fechar_edicao_lista():
+    # nova chave da tabela = seleção limpa; recarrega para fechar o painel
+    st.session_state.ocorrencias_lista_versao = (
+        st.session_state.get("ocorrencias_lista_versao", 0) + 1
+    )
+    st.rerun()
+
+
+@st.fragment
+def painel_lista(row):
+    card_edicao(row, ao_cancelar=fechar_edicao_lista)
+
+
+def lista_compacta(df):
+    tabela = pd.DataFrame(
+        {
+            "Status": df["status"].cat.rename_categories(STATUS_TEXTO),
+            "Título": df["titulo"].fillna("(sem título)"),
+            "Solicitante": df["solicitante"],
+            "Abertura": df["abertura_fmt"],
+            "Evento": df["evento_fmt"],
+            "Resumo": df["descricao_resumo"].fillna("—"),
+            "ID": df["id_curto"],
+        }
+    )
+    # a chave muda com as linhas da página: outra página/filtro não herda a seleção
+    versao = st.session_state.get("ocorrencias_lista_versao", 0)
+    ids = pd.util.hash_pandas_object(df["id"], index=False).sum()
+    evento = st.dataframe(
+        tabela.style.map(estilo_status, subset=["Status"]),
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"ocorrencias_lista_{versao}_{ids}",
+    )
+    selecionadas = evento.selection.rows
+    if selecionadas:
+        painel_lista(registros(df.iloc[[selecionadas[0]]])[0])
+    else:
+        st.caption("Selecione uma linha para editar a ocorrência.")
+
 
 # Listagem
+modo = (
+    st.segmented_control(
+        "Exibição",
+        list(MODOS_EXIBICAO),
+        format_func=MODOS_EXIBICAO.get,
+        default="cards",
+        key="ocorrencias_modo",
+        label_visibility="collapsed",
+    )
+    or "cards"
+)
+
 if df_view.empty:
     st.info("Nenhuma ocorrência encontrada.")
 else:
-    for _, row in df_view.iterrows():
-        if st.session_state.edit_id == row["id"]:
-            card_edicao(row)
-        else:
-            card_visualizacao(row)
+    if modo == "lista":
+        lista_compacta(df_view)
+    else:
+        for row in registros(df_view):
+            card_ocorrencia(row)
+    controles_paginacao("ocorrencias_pagina", pagina, total_ocorrencias, tamanho_pagina)
+
+# ---------- exportação ----------
+# Todas as ocorrências do filtro/busca, com a descrição completa, escritas no
+# arquivo página a página (src/exportacao.py). Sem busca: keyset na ordem da
+# listagem; com busca: a ordem do ranking, paginada por offset.
+EXPORTACAO_CABECALHOS = {
+    "created_at": "Abertura",
+    "data_evento": "Data do evento",
+    "status": "Status",
+    "titulo": "Título",
+    "solicitante": "Solicitante",
+    "descricao": "Descrição",
+    "id": "ID",
+}
+
+
+def completar_exportacao(linhas: list[dict]) -> list[dict]:
+    # a busca traz só o resumo: o texto completo vem numa consulta por página
+    if linhas and "descricao" not in linhas[0]:
+        descricoes = carregar_descricoes(linha["id"] for linha in linhas)
+        linhas = [
+            {**linha, "descricao": descricoes.get(linha["id"])} for linha in linhas
+        ]
+    return [
+        {**linha, "solicitante": rotulo_morador(linha.get("morador"), vazio=None)}
+        for linha in linhas
+    ]
+
+
+@st.fragment
+def exportar_ocorrencias(termo: str, status: str | None, total: int):
+    with st.expander("Exportar ocorrências", expanded=False):
+        st.caption(
+            "Exporta todas as ocorrências do filtro e da busca atuais "
+            "(não só as desta página)."
+        )
+
+        def gerar(formato, progresso):
+            if termo:
+                paginas = paginas_offset(
+                    lambda offset, lote: buscar_ocorrencias(
+                        termo, status, offset, lote, cache=False
+                    )[0]
+                )
+            else:
+                paginas = paginas_keyset(
+                    lambda: consulta_ocorrencias(COLUNAS_EXPORTACAO)
+                )
+            return exportar(
+                paginas,
+                EXPORTACAO_CABECALHOS,
+                "ocorrencias",
+                formato,
+                "ocorrencias",
+                preparar=completar_exportacao,
+                progresso=progresso,
+                total=total,
+            )
+
+        exportar_listagem("ocorrencias_exportacao", (termo, status), gerar)
+
+
+exportar_ocorrencias(termo_busca, status_sel, total_ocorrencias)
 
 st.divider()
 
+
 # ---------- criar nova ----------
-with st.expander("Nova ocorrência"):
-    with st.form("form_criar"):
-        titulo = st.text_input("Título", max_chars=150)
-        descricao = st.text_area("Descrição", height=120)
-        status = st.selectbox("Status", STATUS_OPCOES, index=0)
-
-        rotulos, valores = zip(*moradores_opcoes)
-        morador_escolha = st.selectbox("Morador (opcional)", rotulos, index=0)
-        morador_id = valores[rotulos.index(morador_escolha)]
-
-        data_evt = st.date_input("Data do evento (opcional)", value=None)
-
-        salvar = st.form_submit_button("Salvar ocorrência", type="primary")
-
-    if salvar:
-        if not titulo.strip():
-            st.error("Informe um título.")
-        else:
-            payload = {
-                "titulo": titulo.strip(),
-                "descricao": descricao.strip() if descricao else None,
-                "status": status,
-                "morador_id": morador_id,
-                "data_evento": data_evt.isoformat() if isinstance(data_evt, date) else None,
-            }
-            try:
-                table("ocorrencias").insert(payload).execute()
-                st.success("Ocorrência criada.")
-            except Exception as e:
-                st.error("Falha ao criar ocorrência.")
-                st.exception(e)
+# fragmento: buscar o morador e preencher não recarregam a listagem
+@st.fragment
+def form_nova_ocorrencia():
+    with st.expander("Nova ocorrência"):
+        morador_id = seletor_morador("morador_nova")
+
+        with st.form("form_criar"):
+            titulo = st.text_input("Título", max_chars=150)
+            descricao = st.text_area("Descrição", height=120)
+            status = st.selectbox("Status", STATUS_OPCOES, index=0)
+
+            data_evt = st.date_input("Data do evento (opcional)", value=None)
+
+            salvar = st.form_submit_button("Salvar ocorrência", type="primary")
+
+        if salvar:
+            if not titulo.strip():
+                st.error("Informe um título.")
+            else:
+                payload = {
+                    "titulo": titulo.strip(),
+                    "descricao": descricao.strip() if descricao else None,
+                    "status": status,
+                    "morador_id": morador_id,
+                    "data_evento": (
+                        data_evt.isoformat() if isinstance(data_evt, date) else None
+                    ),
+                }
+                try:
+                    table("ocorrencias").insert(payload).execute()
+                except Exception as e:
+                    st.error("Falha ao criar ocorrência.")
+                    st.exception(e)
+                else:
+                    limpar_seletor_morador("morador_nova")
+                    recarregar_pagina("Ocorrência criada.")
+
+
+form_nova_ocorrencia()
@@ -1,37 +1,197 @@
+from datetime import date, timedelta
+
 import streamlit as st
-import pandas as pd
-from datetime import date, datetime, timedelta
+
+from src.auth import eh_admin
+from src.esquemas import registros
+from src.exportacao import exportar, paginas_keyset
+from src.extrato import EXTENSOES, importar_extrato
+from src.fluxo import (
+    carregar_fluxo_mensal,
+    reconstruir_fluxo_mensal,
+    saldo_antes_de,
+)
+from src.formatacao import fmt_reais
+from src.importacao import ErroImportacao
+from src.paginacao import contar
+from src.quadros import quadro_fluxo_mensal, quadro_transacoes
 from src.supabase_client import table
-from src.ui import back_home, require_auth
+from src.ui import (
+    back_home,
+    exportar_listagem,
+    mostrar_aviso_pendente,
+    recarregar_pagina,
+    require_auth,
+)
 
 st.set_page_config(page_title="Fluxo de Caixa", page_icon="💰", layout="wide")
 
 # exige login e aplica token
-require_auth()
+user = require_auth()
 
 # botão voltar
 back_home()
 
 st.title("💰 Fluxo de Caixa")
+mostrar_aviso_pendente()
 
 TIPOS = ["entrada", "saida"]
+JANELAS = {12: "12 meses", 24: "24 meses", 0: "Tudo"}
+
+hoje = date.today()
+
+
+# -------- resumo mensal --------
+# Lido só da consolidação mensal (sql/010): o custo não cresce com o número de
+# transações, então "Tudo" custa o mesmo que 12 meses para anos de histórico
+def inicio_janela(meses: int) -> date | None:
+    if not meses:
+        return None
+    ano, mes = hoje.year, hoje.month - (meses - 1)
+    while mes <= 0:
+        ano, mes = ano - 1, mes + 12
+    return date(ano, mes, 1)
+
+
+def delta_reais(atual: int, anterior: int) -> str:
+    sinal = "+" if atual >= anterior else "-"
+    return f"{sinal}{fmt_reais(abs(atual - anterior))} vs mês anterior"
+
+
+janela = st.segmented_control(
+    "Período do gráfico",
+    list(JANELAS),
+    format_func=JANELAS.get,
+    default=12,
+    key="fluxo_janela",
+    label_visibility="collapsed",
+)
+janela = 12 if janela is None else janela
+desde = inicio_janela(janela)
+try:
+    dados_mensais = carregar_fluxo_mensal(desde)
+    mensal = quadro_fluxo_mensal(
+        dados_mensais,
+        desde=desde,
+        ate=hoje,
+        # janela sem nenhum mês com transação: o acumulado vem de antes dela
+        saldo_anterior=0 if dados_mensais else saldo_antes_de(desde),
+    )
+except Exception as e:
+    st.error("Não foi possível carregar o resumo mensal.")
+    st.exception(e)
+    mensal = quadro_fluxo_mensal([])
+
+if not mensal.empty:
+    atual = mensal.iloc[-1]
+    anterior = mensal.iloc[-2] if len(mensal) > 1 else None
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Saldo acumulado", fmt_reais(atual["saldo_acumulado_centavos"]))
+    c2.metric(
+        "Entradas no mês",
+        fmt_reais(atual["entradas_centavos"]),
+        (
+            delta_reais(atual["entradas_centavos"], anterior["entradas_centavos"])
+            if anterior is not None
+            else None
+        ),
+    )
+    c3.metric(
+        "Saídas no mês",
+        fmt_reais(atual["saidas_centavos"]),
+        (
+            delta_reais(atual["saidas_centavos"], anterior["saidas_centavos"])
+            if anterior is not None
+            else None
+        ),
+        delta_color="inverse",
+    )
+    c4.metric("Resultado do mês", fmt_reais(atual["saldo_mes_centavos"]))
+
+    grafico = mensal.assign(
+        Entradas=mensal["entradas_centavos"] / 100,
+        Saídas=mensal["saidas_centavos"] / 100,
+        saldo=mensal["saldo_acumulado_centavos"] / 100,
+    )
+    barras = grafico.melt(
+        id_vars=["mes", "mes_fmt", "saldo"],
+        value_vars=["Entradas", "Saídas"],
+        var_name="tipo",
+        value_name="valor",
+    )
+    st.vega_lite_chart(
+        barras,
+        {
+            "height": 260,
+            "encoding": {
+                "x": {
+                    "field": "mes",
+                    "type": "temporal",
+                    "timeUnit": "yearmonth",
+                    "title": None,
+                }
+            },
+            "layer": [
+                {
+                    "mark": {"type": "bar", "tooltip": True},
+                    "encoding": {
+                        "xOffset": {"field": "tipo"},
+                        "y": {
+                            "field": "valor",
+                            "type": "quantitative",
+                            "title": "R$ no mês",
+                        },
+                        "color": {
+                            "field": "tipo",
+                            "type": "nominal",
+                            "scale": {
+                                "domain": ["Entradas", "Saídas"],
+                                "range": ["#52b788", "#e5383b"],
+                            },
+                            "legend": {"orient": "bottom", "title": None},
+                        },
+                        "tooltip": [
+                            {"field": "mes_fmt", "title": "Mês"},
+                            {"field": "tipo"},
+                            {"field": "valor", "format": ",.2f"},
+                        ],
+                    },
+                },
+                {
+                    "mark": {"type": "line", "point": True, "color": "#1d3557"},
+                    "encoding": {
+                        "y": {
+                            "field": "saldo",
+                            "type": "quantitative",
+                            "title": "Saldo acumulado (R$)",
+                        },
+                        "tooltip": [
+                            {"field": "mes_fmt", "title": "Mês"},
+                            {"field": "saldo", "format": ",.2f"},
+                        ],
+                    },
+                },
+            ],
+            "resolve": {"scale": {"y": "independent"}},
+        },
+        use_container_width=True,
+    )
 
-# -------- utilitários --------
-def fmt_data_ddmmaaaa(v):
-    if not v:
-        return ""
-    try:
-        if isinstance(v, (datetime, date)):
-            d = v if isinstance(v, date) else v.date()
+    if eh_admin(user) and st.button(
+        "Reconstruir totais mensais",
+        help="Recalcula a consolidação a partir de todas as transações.",
+    ):
+        try:
+            meses = reconstruir_fluxo_mensal()
+        except Exception as e:
+            st.error("Não foi possível reconstruir os totais mensais.")
+            st.exception(e)
         else:
-            s = str(v).split("T")[0]  # "YYYY-MM-DD"
-            d = datetime.strptime(s, "%Y-%m-%d").date()
-        return d.strftime("%d/%m/%Y")
-    except Exception:
-        return str(v)
+            recarregar_pagina(f"Totais mensais reconstruídos ({meses} meses).")
+
+st.divider()
 
 # -------- filtros --------
-hoje = date.today()
 default_ini = hoje - timedelta(days=30)
 col_f1, col_f2, col_f3 = st.columns([1, 1, 1])
 with col_f1:
@@ -41,20 +201,38 @@ with col_f2:
 with col_f3:
     tipo_sel = st.selectbox("Tipo", ["Todos"] + TIPOS, index=0)
 
+
 # -------- carregar dados (server-side) --------
-def carregar_transacoes(dt_ini: date | None, dt_fim: date | None, tipo: str | None):
-    q = table("transacoes").select("id,data,descricao,valor,tipo,created_at")
+def consulta_transacoes(
+    colunas: str,
+    dt_ini: date | None,
+    dt_fim: date | None,
+    tipo: str | None,
+    count: str | None = None,
+):
+    # mesmos filtros para a listagem e para a exportação
+    q = table("transacoes").select(colunas, count=count)
     if dt_ini:
         q = q.gte("data", dt_ini.isoformat())
     if dt_fim:
         q = q.lte("data", dt_fim.isoformat())
     if tipo and tipo in TIPOS:
         q = q.eq("tipo", tipo)
+    return q
+
+
+def carregar_transacoes(dt_ini: date | None, dt_fim: date | None, tipo: str | None):
+    q = consulta_transacoes(
+        "id,data,descricao,valor,tipo,created_at", dt_ini, dt_fim, tipo
+    )
     q = q.order("data", desc=True).order("created_at", desc=True).limit(500)
-    res = q.execute()
-    return pd.DataFrame(res.data or [])
+    # CSV -> DataFrame tipado + colunas de exibição (data_fmt, valor em
+    # centavos, rótulo)
+    return quadro_transacoes(q.dataframe())
+
 
-df = carregar_transacoes(data_ini, data_fim, tipo_sel if tipo_sel != "Todos" else None)
+tipo_filtro = tipo_sel if tipo_sel != "Todos" else None
+df = carregar_transacoes(data_ini, data_fim, tipo_filtro)
 
 # -------- listagem --------
 st.subheader("Transações")
@@ -62,10 +240,6 @@ st.subheader("Transações")
 if df.empty:
     st.info("Nenhuma transação encontrada no período.")
 else:
-    df_view = df.copy()
-    df_view["data_fmt"] = df_view["data"].apply(fmt_data_ddmmaaaa)
-    df_view = df_view.sort_values(["data", "created_at"], ascending=[False, False])
-
     cols_order = ["data_fmt", "descricao", "valor", "tipo"]
     col_cfg = {
         "data_fmt": st.column_config.TextColumn("Data"),
@@ -74,87 +248,82 @@ else:
         "valor": st.column_config.NumberColumn("Valor", format="R$ %.2f"),
     }
     st.dataframe(
-        df_view[cols_order],
+        df[cols_order],
         hide_index=True,
         use_container_width=True,
         column_config=col_cfg,
     )
 
+# -------- exportação --------
+# Todas as transações dos filtros (não só as 500 da tabela), lidas em páginas
+# por keyset e escritas no arquivo página a página (src/exportacao.py)
+ORDEM_EXPORTACAO = (("data", True), ("created_at", True), ("id", True))
+COLUNAS_EXPORTACAO = {
+    "data": "Data",
+    "descricao": "Descrição",
+    "tipo": "Tipo",
+    "valor": "Valor",
+    "created_at": "Criada em",
+    "id": "ID",
+}
+
+
+@st.fragment
+def exportar_transacoes(dt_ini, dt_fim, tipo):
+    with st.expander("Exportar transações", expanded=False):
+        st.caption(
+            "Exporta todas as transações do período e tipo filtrados, "
+            "da mais recente para a mais antiga."
+        )
+
+        def gerar(formato, progresso):
+            total = contar(
+                lambda: consulta_transacoes("id", dt_ini, dt_fim, tipo, count="exact")
+            )
+            paginas = paginas_keyset(
+                lambda: consulta_transacoes(
+                    ",".join(COLUNAS_EXPORTACAO), dt_ini, dt_fim, tipo
+                ),
+                ORDEM_EXPORTACAO,
+            )
+            return exportar(
+                paginas,
+                COLUNAS_EXPORTACAO,
+                "transacoes",
+                formato,
+                "transacoes",
+                progresso=progresso,
+                total=total,
+            )
+
+        exportar_listagem("fluxo_exportacao", (dt_ini, dt_fim, tipo), gerar)
+
+
+exportar_transacoes(data_ini, data_fim, tipo_filtro)
+
 st.divider()
 
+
 # -------- expander com abas: Criar / Editar-Excluir --------
-with st.expander("Gerenciar transações", expanded=False):
-    tab_criar, tab_editar = st.tabs(["➕ Criar", "✏️ Editar/Excluir"])
-
-    # --- Aba Criar ---
-    with tab_criar:
-        with st.form("form_nova_tx"):
-            descricao = st.text_input("Descrição", max_chars=200)
-            tipo = st.selectbox("Tipo", TIPOS, index=0)
-            valor = st.number_input("Valor", min_value=0.0, step=0.01, format="%.2f")
-            data_tx = st.date_input("Data", value=hoje)
-            salvar = st.form_submit_button("Salvar", type="primary")
-
-        if salvar:
-            if not descricao.strip():
-                st.error("Informe a descrição.")
-            else:
-                payload = {
-                    "descricao": descricao.strip(),
-                    "tipo": tipo,
-                    "valor": float(valor),
-                    "data": data_tx.isoformat(),
-                }
-                try:
-                    table("transacoes").insert(payload).execute()
-                    st.success("Transação criada.")
-                except Exception as e:
-                    st.error("Não foi possível criar a transação.")
-                    st.exception(e)
+# Fragmento: trocar de aba ou de transação reroda só este bloco; a página
+# inteira só recarrega depois de criar, salvar ou excluir.
+@st.fragment
+def gerenciar_transacoes(df):
+    with st.expander("Gerenciar transações", expanded=False):
+        tab_criar, tab_importar, tab_editar = st.tabs(
+            ["➕ Criar", "📥 Importar extrato", "✏️ Editar/Excluir"]
+        )
 
-    # --- Aba Editar/Excluir ---
-    with tab_editar:
-        if df.empty:
-            st.info("Não há transações para editar.")
-        else:
-            opcoes = []
-            for _, r in df.iterrows():
-                rotulo = (
-                    f"{fmt_data_ddmmaaaa(r.get('data'))} — {r.get('tipo','')} — "
-                    f"{r.get('descricao','')} — R$ {float(r.get('valor',0)):,.2f} — "
-                    f"#{str(r.get('id',''))[:8].upper()}"
-                )
-                opcoes.append((rotulo, r.get("id")))
-            labels, ids = zip(*opcoes)
-            escolha = st.selectbox("Selecione a transação", labels, index=0)
-            tx_id = ids[labels.index(escolha)]
-            atual = df[df["id"] == tx_id].iloc[0].to_dict()
-
-            try:
-                y, m, d = map(int, str(atual.get("data")).split("-"))
-                data_default = date(y, m, d)
-            except Exception:
-                data_default = hoje
-
-            tipo_idx = TIPOS.index(atual.get("tipo", "entrada")) if atual.get("tipo") in TIPOS else 0
-
-            with st.form("form_edit_tx"):
-                descricao = st.text_input("Descrição", value=str(atual.get("descricao","")), max_chars=200)
-                tipo = st.selectbox("Tipo", TIPOS, index=tipo_idx)
+        # --- Aba Criar ---
+        with tab_criar:
+            with st.form("form_nova_tx"):
+                descricao = st.text_input("Descrição", max_chars=200)
+                tipo = st.selectbox("Tipo", TIPOS, index=0)
                 valor = st.number_input(
-                    "Valor",
-                    min_value=0.0,
-                    step=0.01,
-                    format="%.2f",
-                    value=float(atual.get("valor", 0.0)),
+                    "Valor", min_value=0.0, step=0.01, format="%.2f"
                 )
-                data_tx = st.date_input("Data", value=data_default)
-
-                col1, col2 = st.columns([1, 1])
-                with col1:
-                    salvar = st.form_submit_button("Salvar alterações", type="primary")
-                with col2:
-                    excluir = st.form_submit_button("Excluir", type="secondary")
+                data_tx = st.date_input("Data", value=hoje)
+                salvar = st.form_submit_button("Salvar", type="primary")
 
             if salvar:
                 if not descricao.strip():
@@ -167,16 +336,149 @@ with st.expander("Gerenciar transações", expanded=False):
                         "data": data_tx.isoformat(),
                     }
                     try:
-                        table("transacoes").update(payload).eq("id", tx_id).execute()
-                        st.success("Transação atualizada.")
+                        table("transacoes").insert(payload).execute()
                     except Exception as e:
-                        st.error("Não foi possível atualizar a transação.")
+                        st.error("Não foi possível criar a transação.")
                         st.exception(e)
+                    else:
+                        recarregar_pagina("Transação criada.")
+
+        # --- Aba Importar extrato ---
+        with tab_importar:
+            st.caption(
+                "Extrato em OFX ou CSV (Data, Descrição/Histórico e Valor ou "
+                "Crédito/Débito). Créditos entram como entrada e débitos como "
+                "saída; lançamentos já importados são ignorados, então reenviar "
+                "o mesmo arquivo não duplica nada."
+            )
+            extrato = st.file_uploader(
+                "Extrato bancário", type=list(EXTENSOES), key="fluxo_extrato"
+            )
+            if st.button("Importar extrato", type="primary", disabled=extrato is None):
+                barra = st.progress(0.0, text="Lendo o extrato...")
+
+                def mostrar_progresso(lidos: int, total: int | None):
+                    fracao = min(lidos / total, 1.0) if total else 0.0
+                    barra.progress(
+                        fracao, text=f"{lidos} lançamento(s) processado(s)..."
+                    )
 
-            if excluir:
                 try:
-                    table("transacoes").delete().eq("id", tx_id).execute()
-                    st.success("Transação excluída.")
+                    resultado = importar_extrato(
+                        extrato, extrato.name, progresso=mostrar_progresso
+                    )
+                except ErroImportacao as e:
+                    barra.empty()
+                    st.error(str(e))
                 except Exception as e:
-                    st.error("Não foi possível excluir a transação.")
+                    barra.empty()
+                    st.error("Não foi possível importar o extrato.")
                     st.exception(e)
+                else:
+                    barra.progress(
+                        1.0, text=f"{resultado.lidas} lançamento(s) processado(s)."
+                    )
+                    # o resumo fica na sessão; a página recarrega para a lista
+                    # mostrar os novos
+                    st.session_state.fluxo_importacao = resultado
+                    if resultado.importadas:
+                        recarregar_pagina(
+                            f"{resultado.importadas} transação(ões) importada(s)."
+                        )
+
+            resultado = st.session_state.get("fluxo_importacao")
+            if resultado is not None:
+                c1, c2, c3 = st.columns(3)
+                c1.metric("Importadas", resultado.importadas)
+                c2.metric("Já importadas", resultado.repetidas)
+                c3.metric(
+                    "Com erro",
+                    len(resultado.erros) - sum(e.repetida for e in resultado.erros),
+                )
+                if resultado.erros:
+                    st.dataframe(
+                        resultado.quadro_erros(),
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+
+        # --- Aba Editar/Excluir ---
+        with tab_editar:
+            if df.empty:
+                st.info("Não há transações para editar.")
+            else:
+                # rótulos já vêm prontos na coluna "rotulo" (sem laço por linha)
+                escolha = st.selectbox(
+                    "Selecione a transação",
+                    df["rotulo"].tolist(),
+                    index=0,
+                    key="fluxo_tx_escolha",
+                )
+                atual = registros(df[df["rotulo"] == escolha])[0]
+                tx_id = atual["id"]
+
+                data_default = (
+                    atual["data"].date() if atual.get("data") is not None else hoje
+                )
+
+                tipo_idx = (
+                    TIPOS.index(atual.get("tipo", "entrada"))
+                    if atual.get("tipo") in TIPOS
+                    else 0
+                )
+
+                with st.form("form_edit_tx"):
+                    descricao = st.text_input(
+                        "Descrição",
+                        value=str(atual.get("descricao") or ""),
+                        max_chars=200,
+                    )
+                    tipo = st.selectbox("Tipo", TIPOS, index=tipo_idx)
+                    valor = st.number_input(
+                        "Valor",
+                        min_value=0.0,
+                        step=0.01,
+                        format="%.2f",
+                        value=(atual.get("valor_centavos") or 0) / 100,
+                    )
+                    data_tx = st.date_input("Data", value=data_default)
+
+                    col1, col2 = st.columns([1, 1])
+                    with col1:
+                        salvar = st.form_submit_button(
+                            "Salvar alterações", type="primary"
+                        )
+                    with col2:
+                        excluir = st.form_submit_button("Excluir", type="secondary")
+
+                if salvar:
+                    if not descricao.strip():
+                        st.error("Informe a descrição.")
+                    else:
+                        payload = {
+                            "descricao": descricao.strip(),
+                            "tipo": tipo,
+                            "valor": float(valor),
+                            "data": data_tx.isoformat(),
+                        }
+                        try:
+                            table("transacoes").update(payload).eq(
+                                "id", tx_id
+                            ).execute()
+                        except Exception as e:
+                            st.error("Não foi possível atualizar a transação.")
+                            st.exception(e)
+                        else:
+                            recarregar_pagina("Transação atualizada.")
+
+                if excluir:
+                    try:
+                        table("transacoes").delete().eq("id", tx_id).execute()
+                    except Exception as e:
+                        st.error("Não foi possível excluir a transação.")
+                        st.exception(e)
+                    else:
+                        recarregar_pagina("Transação excluída.")
+
+
+gerenciar_transacoes(df)
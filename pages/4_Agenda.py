@@ -1,9 +1,27 @@
 # pages/4_Agenda.py
+from datetime import date, datetime
+
 import streamlit as st
-import pandas as pd
-from datetime import datetime, date
+
+from src.calendario import (
+    PRIMEIRO_DIA_SEMANA,
+    VISOES,
+    carregar_ocorrencias_periodo,
+    intervalo_visivel,
+    pre_carregar_vizinhos,
+    visao_exibida,
+)
+from src.formatacao import fmt_data_ddmmaaaa, rotulo_morador
+from src.ocorrencias import carregar_detalhe
 from src.supabase_client import table
-from src.ui import back_home, require_auth
+from src.ui import (
+    back_home,
+    limpar_seletor_morador,
+    mostrar_aviso_pendente,
+    recarregar_pagina,
+    require_auth,
+    seletor_morador,
+)
 
 st.set_page_config(page_title="Agenda", page_icon="🗓️", layout="wide")
 
@@ -14,6 +32,7 @@ user = require_auth()
 back_home()
 
 st.title("🗓️ Agenda")
+mostrar_aviso_pendente()
 
 # ---- componente de calendário ----
 try:
@@ -23,20 +42,13 @@ except Exception:
         "Para exibir o calendário, instale e use o ambiente do projeto:\n\n"
         "1) `poetry add streamlit-calendar`\n"
         "2) Rode o app com `poetry run streamlit run app.py`\n"
-        "3) No editor (ex.: VS Code), selecione o interpretador da venv do projeto (.venv)"
+        "3) No editor (ex.: VS Code), selecione o interpretador da venv do "
+        "projeto (.venv)"
     )
     st.stop()
 
-# ---------- utilitários ----------
-def fmt_br(yyyy_mm_dd: str | None) -> str:
-    if not yyyy_mm_dd:
-        return ""
-    try:
-        d = datetime.strptime(yyyy_mm_dd[:10], "%Y-%m-%d").date()
-        return d.strftime("%d/%m/%Y")
-    except Exception:
-        return yyyy_mm_dd or ""
 
+# ---------- utilitários ----------
 def parse_iso_date(s: str | None) -> date:
     if not s:
         return date.today()
@@ -45,76 +57,72 @@ def parse_iso_date(s: str | None) -> date:
     except Exception:
         return date.today()
 
-# ---------- dados ----------
-def carregar_moradores():
-    res = table("moradores").select("id,nome,predio,apto").order("nome").execute()
-    dados = res.data or []
-    # opções para formulário
-    opcoes = [("— Sem vínculo —", None)]
-    for m in dados:
-        rotulo = f"{m.get('nome','')} — Prédio {m.get('predio','')}, Apto {m.get('apto','')}"
-        opcoes.append((rotulo, m.get("id")))
-    # mapa para exibição
-    mapa = {m["id"]: f"{m.get('nome','')} — Prédio {m.get('predio','')}, Apto {m.get('apto','')}" for m in dados}
-    return opcoes, mapa
-
-def carregar_ocorrencias_com_data():
-    res = (
-        table("ocorrencias")
-        .select("id,titulo,descricao,status,morador_id,data_evento")
-        .order("data_evento")
-        .limit(2000)
-        .execute()
-    )
-    df = pd.DataFrame(res.data or [])
-    if df.empty or "data_evento" not in df.columns:
-        return pd.DataFrame([])
-    return df.dropna(subset=["data_evento"])
-
-moradores_opcoes, moradores_map = carregar_moradores()
-df = carregar_ocorrencias_com_data()
 
+# ---------- dados ----------
 STATUS_COLORS = {
-    "aberta": "#f8d7da",        # vermelho suave
+    "aberta": "#f8d7da",  # vermelho suave
     "em_andamento": "#fff3cd",  # amarelo/laranja suave
-    "finalizada": "#d4edda",    # verde suave
+    "finalizada": "#d4edda",  # verde suave
 }
 
-# monta eventos para o FullCalendar a partir das ocorrências
-events = []
-if not df.empty:
-    for _, r in df.iterrows():
-        titulo = r.get("titulo") or "(Sem título)"
-        status = r.get("status") or "aberta"
-        morador = moradores_map.get(r.get("morador_id")) if r.get("morador_id") else "—"
-        desc = r.get("descricao") or ""
-        data_iso = str(r.get("data_evento"))  # "YYYY-MM-DD"
-
-        events.append(
-            {
-                "id": r.get("id"),
-                "title": titulo,
-                "start": data_iso,   # dia inteiro
-                "allDay": True,
-                "color": STATUS_COLORS.get(status, "#e9ecef"),
-                "extendedProps": {
-                    "status": status,
-                    "morador": morador,
-                    "descricao": desc,
-                },
-            }
-        )
+# ---------- período visível (informado pelo próprio calendário) ----------
+# A navegação é a da barra do FullCalendar; a cada troca de período ou de
+# visão o componente devolve a visão exibida (callback eventsSet) e a página
+# reroda buscando só as ocorrências desse período.
+if "agenda_visao" not in st.session_state:
+    st.session_state.agenda_visao = "dayGridMonth"
+if "agenda_ref" not in st.session_state:
+    st.session_state.agenda_ref = date.today()
+
+visao = st.session_state.agenda_visao
+ref = st.session_state.agenda_ref
+inicio, fim = intervalo_visivel(visao, ref)
 
-# opções do calendário: PT-BR + botões ordenados (ANO, MÊS, SEMANA, DIA)
+# ocorrências do período (o morador vem embutido em cada uma)
+try:
+    ocorrencias_periodo = carregar_ocorrencias_periodo(inicio, fim)
+except Exception as e:
+    st.error("Não foi possível carregar as ocorrências do período.")
+    st.exception(e)
+    ocorrencias_periodo = []
+
+# períodos vizinhos em segundo plano (anterior/próximo saem do cache), só
+# quando o período muda: cliques e o formulário não disparam novas consultas
+if st.session_state.get("agenda_vizinhos") != (visao, inicio):
+    st.session_state.agenda_vizinhos = (visao, inicio)
+    pre_carregar_vizinhos(visao, ref)
+
+# monta eventos para o FullCalendar a partir das ocorrências do período
+events = [
+    {
+        "id": r.get("id"),
+        "title": r.get("titulo") or "(Sem título)",
+        "start": str(r.get("data_evento")),  # dia inteiro ("YYYY-MM-DD")
+        "allDay": True,
+        "color": STATUS_COLORS.get(r.get("status") or "aberta", "#e9ecef"),
+        "extendedProps": {
+            "status": r.get("status") or "aberta",
+            "morador": rotulo_morador(r.get("morador")),
+            "descricao": r.get("descricao_resumo") or "",
+        },
+    }
+    for r in ocorrencias_periodo
+    if r.get("data_evento")
+]
+
+# opções do calendário: PT-BR + botões ordenados (ANO, MÊS, SEMANA, DIA),
+# abrindo na última visão/data exibida
 # 'multiMonthYear' = grade anual (12 meses) com navegação anual
 calendar_options = {
-    "initialView": "dayGridMonth",
+    "initialView": visao,
+    "initialDate": ref.isoformat(),
     "locale": "pt-br",
+    "firstDay": PRIMEIRO_DIA_SEMANA,
     "height": 720,
     "headerToolbar": {
         "left": "prev,next today",
         "center": "title",
-        "right": "multiMonthYear,dayGridMonth,timeGridWeek,timeGridDay",
+        "right": ",".join(VISOES),
     },
     "buttonText": {
         "today": "Hoje",
@@ -126,31 +134,44 @@ calendar_options = {
     "views": {
         "multiMonthYear": {
             "type": "multiMonth",
-            "duration": {"years": 1},       # mostra 1 ano
+            "duration": {"years": 1},  # mostra 1 ano
             "dateIncrement": {"years": 1},  # setas mudam 1 ano
-            "multiMonthMaxColumns": 3,      # 3 col x 4 lin = 12 meses
+            "multiMonthMaxColumns": 3,  # 3 col x 4 lin = 12 meses
         }
     },
     "weekNumbers": False,
-    "navLinks": True,
+    "navLinks": True,  # dia clicável abre a visão diária (também via eventsSet)
     "editable": False,
-    "selectable": True,     # criar por seleção/clique
+    "selectable": True,  # criar por seleção/clique
     "selectMirror": True,
     "dayMaxEventRows": True,
 }
 
-# render e interações
-result = calendar(events=events, options=calendar_options)
+# render e interações; eventsSet traz a visão exibida após cada navegação
+result = calendar(
+    events=events,
+    options=calendar_options,
+    callbacks=["dateClick", "eventClick", "eventsSet", "select"],
+    key="agenda",
+)
+
+if result and result.get("callback") == "eventsSet":
+    exibida = visao_exibida((result.get("eventsSet") or {}).get("view"))
+    if exibida and intervalo_visivel(*exibida) != (inicio, fim):
+        st.session_state.agenda_visao, st.session_state.agenda_ref = exibida
+        st.rerun()
 
 # feedback ao clicar em evento existente
 if result and result.get("eventClick"):
     ev = result["eventClick"]["event"]
-    ext = ev.get("_def", {}).get("extendedProps", {})
+    ext = ev.get("_def", {}).get("extendedProps", {}) or ev.get("extendedProps", {})
+    # descrição completa sob demanda (o evento carrega só o resumo)
+    desc_full = carregar_detalhe(ev["id"]).get("descricao") if ev.get("id") else None
     st.info(
         f"**{ev.get('title','')}**\n\n"
         f"Status: {ext.get('status','—')}\n\n"
         f"Morador: {ext.get('morador','—')}\n\n"
-        f"Descrição: {ext.get('descricao','—')}"
+        f"Descrição: {desc_full or ext.get('descricao') or '—'}"
     )
 
 # data selecionada/clicada (para pré-preencher o formulário de nova ocorrência)
@@ -158,7 +179,7 @@ selected_date_iso: str | None = None
 if result and result.get("dateClick"):
     selected_date_iso = result["dateClick"]["dateStr"]  # "YYYY-MM-DD"
 elif result and result.get("select"):
-    selected_date_iso = result["select"]["startStr"]    # "YYYY-MM-DD"
+    selected_date_iso = result["select"]["startStr"]  # "YYYY-MM-DD"
 
 # ------ botão + expander para NOVA OCORRÊNCIA ------
 default_date = parse_iso_date(selected_date_iso)
@@ -174,35 +195,47 @@ if "agenda_create_open" not in st.session_state:
 if open_occ or selected_date_iso:
     st.session_state.agenda_create_open = True
 
-with st.expander("Criar ocorrência", expanded=st.session_state.agenda_create_open):
-    with st.form("form_nova_ocorrencia_agenda"):
-        titulo = st.text_input("Título da ocorrência", max_chars=150)
-        descricao = st.text_area("Descrição", height=120)
-        status = st.selectbox("Status", ["aberta", "em_andamento", "finalizada"], index=0)
-
-        # morador (opcional)
-        rotulos, valores = zip(*moradores_opcoes)
-        morador_escolha = st.selectbox("Morador (opcional)", rotulos, index=0)
-        morador_id = valores[rotulos.index(morador_escolha)]
-
-        data_evt = st.date_input("Data do evento", value=default_date)
-        salvar_occ = st.form_submit_button("Salvar ocorrência", type="primary")
-
-    if salvar_occ:
-        if not titulo.strip():
-            st.error("Informe um título.")
-        else:
-            payload = {
-                "titulo": titulo.strip(),
-                "descricao": descricao.strip() if descricao else None,
-                "status": status,
-                "data_evento": data_evt.isoformat(),  # ISO YYYY-MM-DD
-                "morador_id": morador_id,
-            }
-            try:
-                table("ocorrencias").insert(payload).execute()
-                st.success(f"Ocorrência criada para {fmt_br(data_evt.isoformat())}.")
-                st.session_state.agenda_create_open = False
-            except Exception as e:
-                st.error("Falha ao criar ocorrência.")
-                st.exception(e)
+
+# Formulário como fragmento: preencher e validar reroda só o formulário; a
+# agenda inteira (calendário e consultas do período) só recarrega após salvar.
+@st.fragment
+def form_nova_ocorrencia(default_date, aberto):
+    with st.expander("Criar ocorrência", expanded=aberto):
+        # seletor com busca fica fora do form (o form só envia no submit)
+        morador_id = seletor_morador("agenda_morador")
+
+        with st.form("form_nova_ocorrencia_agenda"):
+            titulo = st.text_input("Título da ocorrência", max_chars=150)
+            descricao = st.text_area("Descrição", height=120)
+            status = st.selectbox(
+                "Status", ["aberta", "em_andamento", "finalizada"], index=0
+            )
+
+            data_evt = st.date_input("Data do evento", value=default_date)
+            salvar_occ = st.form_submit_button("Salvar ocorrência", type="primary")
+
+        if salvar_occ:
+            if not titulo.strip():
+                st.error("Informe um título.")
+            else:
+                payload = {
+                    "titulo": titulo.strip(),
+                    "descricao": descricao.strip() if descricao else None,
+                    "status": status,
+                    "data_evento": data_evt.isoformat(),  # ISO YYYY-MM-DD
+                    "morador_id": morador_id,
+                }
+                try:
+                    table("ocorrencias").insert(payload).execute()
+                except Exception as e:
+                    st.error("Falha ao criar ocorrência.")
+                    st.exception(e)
+                else:
+                    st.session_state.agenda_create_open = False
+                    limpar_seletor_morador("agenda_morador")
+                    recarregar_pagina(
+                        f"Ocorrência criada para {fmt_data_ddmmaaaa(data_evt)}."
+                    )
+
+
+form_nova_ocorrencia(default_date, st.session_state.agenda_create_open)
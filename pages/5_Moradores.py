@@ -1,8 +1,21 @@
 # pages/5_Moradores.py
 import streamlit as st
-import pandas as pd
+
+from src.config import PAGINA_TAMANHO
+from src.diretorio import diretorio
+from src.formatacao import rotulo_morador
+from src.importacao import EXTENSOES, ErroImportacao, importar_moradores
+from src.moradores import filtrar_moradores
+from src.quadros import quadro_moradores
 from src.supabase_client import table
-from src.ui import back_home, require_auth
+from src.ui import (
+    back_home,
+    controles_paginacao,
+    cursor_pagina,
+    mostrar_aviso_pendente,
+    recarregar_pagina,
+    require_auth,
+)
 
 st.set_page_config(page_title="Moradores", page_icon="👥", layout="wide")
 
@@ -13,38 +26,37 @@ require_auth()
 back_home()
 
 st.title("👥 Moradores")
+mostrar_aviso_pendente()
 
-# --------- utils ---------
-def carregar_moradores(nome: str | None = None, predio: str | None = None, apto: str | None = None) -> pd.DataFrame:
-    # Carrega moradores aplicando filtros server-side quando possível
-    q = table("moradores").select("id,nome,telefone,predio,apto,created_at").order("nome")
-    if nome and nome.strip():
-        q = q.ilike("nome", f"%{nome.strip()}%")
-    if predio and predio.strip():
-        q = q.ilike("predio", f"%{predio.strip()}%")
-    if apto and apto.strip():
-        q = q.ilike("apto", f"%{apto.strip()}%")
-    res = q.limit(1000).execute()
-    return pd.DataFrame(res.data or [])
 
+# --------- utils ---------
 def label_morador(row: dict) -> str:
-    return f"{row.get('nome','(sem nome)')} — Prédio {row.get('predio','?')}, Apto {row.get('apto','?')} — #{str(row.get('id',''))[:8].upper()}"
+    return f"{rotulo_morador(row)} — #{str(row.get('id',''))[:8].upper()}"
 
-# --------- filtros (topo da página) ---------
-col_f1, col_f2, col_f3 = st.columns([1, 1, 1])
-with col_f1:
-    f_nome = st.text_input("Nome")
-with col_f2:
-    f_predio = st.text_input("Prédio")
-with col_f3:
-    f_apto = st.text_input("Apto")
 
-df = carregar_moradores(f_nome, f_predio, f_apto)
+# --------- busca (topo da página) ---------
+# Um único campo para nome, prédio e apto: uma consulta por busca confirmada
+# (Enter ou sair do campo), paginada no banco
+termo = st.text_input(
+    "Buscar morador",
+    placeholder="Nome, prédio ou apto — ex.: joao bloco b 101",
+    key="moradores_busca",
+).strip()
+cursor, _ = cursor_pagina("moradores_pagina", (termo, PAGINA_TAMANHO))
+try:
+    pagina, total_moradores = filtrar_moradores(termo, cursor or 0, PAGINA_TAMANHO)
+except Exception as e:
+    st.error("Não foi possível carregar os moradores.")
+    st.exception(e)
+    st.stop()
+
+# tipado pelo esquema, com o rótulo dos botões de escolha já calculado
+df = quadro_moradores(pagina.linhas)
 
 # --------- tabela sempre visível ---------
 st.subheader("Lista de moradores")
 if df.empty:
-    st.info("Nenhum morador encontrado com os filtros atuais.")
+    st.info("Nenhum morador encontrado para a busca atual.")
 else:
     df_view = df.rename(
         columns={
@@ -66,12 +78,114 @@ else:
             "Apto": st.column_config.TextColumn("Apto"),
         },
     )
+    controles_paginacao("moradores_pagina", pagina, total_moradores, PAGINA_TAMANHO)
 
 st.divider()
 
+
+# Painel de edição como fragmento: buscar, escolher e cancelar rerodam só o
+# painel; a página inteira só recarrega depois de salvar ou excluir.
+@st.fragment
+def painel_edicao(df):
+    # Estado: nenhum morador selecionado por padrão
+    if "edit_morador_id" not in st.session_state:
+        st.session_state.edit_morador_id = None
+
+    # Se ninguém selecionado, exibe como botões os mesmos resultados da busca do topo
+    if st.session_state.edit_morador_id is None:
+        if df.empty:
+            st.info("Use a busca no topo da página e clique no morador para editar.")
+        else:
+            st.caption(
+                f"{len(df)} resultado(s) desta página da busca — "
+                "clique no nome para editar."
+            )
+            for morador_id, rotulo in zip(df["id"], df["rotulo"]):
+                if st.button(
+                    rotulo, key=f"pick_{morador_id}", use_container_width=True
+                ):
+                    st.session_state.edit_morador_id = morador_id
+                    # rerender só o painel, com o formulário aberto
+                    st.rerun(scope="fragment")
+    else:
+        # Registro atual pelo diretório (índice por id), mesmo que os filtros
+        # do topo o ocultem
+        sel_id = st.session_state.edit_morador_id
+        try:
+            atual = diretorio().obter(sel_id)
+        except Exception:
+            atual = None
+
+        if not atual:
+            st.warning("Morador não encontrado. Selecione novamente nos resultados.")
+            st.session_state.edit_morador_id = None
+        else:
+            st.markdown(f"**Editando:** {label_morador(atual)}")
+
+            with st.form("form_edit_morador"):
+                nome_e = st.text_input(
+                    "Nome", value=str(atual.get("nome", "")), max_chars=200
+                )
+                telefone_e = st.text_input(
+                    "Telefone", value=str(atual.get("telefone", "") or ""), max_chars=30
+                )
+                predio_e = st.text_input(
+                    "Prédio", value=str(atual.get("predio", "")), max_chars=30
+                )
+                apto_e = st.text_input(
+                    "Apto", value=str(atual.get("apto", "")), max_chars=30
+                )
+
+                col1, col2, col3 = st.columns([1, 1, 1])
+                with col1:
+                    salvar_e = st.form_submit_button(
+                        "Salvar alterações", type="primary"
+                    )
+                with col2:
+                    excluir_e = st.form_submit_button("Excluir", type="secondary")
+                with col3:
+                    cancelar_e = st.form_submit_button("Cancelar edição")
+
+            if salvar_e:
+                if not nome_e.strip():
+                    st.error("Informe o nome.")
+                elif not predio_e.strip() or not apto_e.strip():
+                    st.error("Informe o prédio e o apartamento.")
+                else:
+                    payload = {
+                        "nome": nome_e.strip(),
+                        "telefone": telefone_e.strip() if telefone_e else None,
+                        "predio": predio_e.strip(),
+                        "apto": apto_e.strip(),
+                    }
+                    try:
+                        table("moradores").update(payload).eq("id", sel_id).execute()
+                    except Exception as e:
+                        st.error("Não foi possível atualizar o morador.")
+                        st.exception(e)
+                    else:
+                        recarregar_pagina("Morador atualizado.")
+
+            if excluir_e:
+                try:
+                    table("moradores").delete().eq("id", sel_id).execute()
+                except Exception as e:
+                    st.error("Não foi possível excluir o morador.")
+                    st.exception(e)
+                else:
+                    st.session_state.edit_morador_id = None
+                    recarregar_pagina("Morador excluído.")
+
+            if cancelar_e:
+                st.session_state.edit_morador_id = None
+                st.rerun(scope="fragment")
+
+
 # --------- CRUD no expander ---------
 with st.expander("Gerenciar moradores", expanded=False):
-    tab_add, tab_edit = st.tabs(["➕ Adicionar", "✏️ Editar/Excluir"])
+    tab_add, tab_importar, tab_edit = st.tabs(
+        ["➕ Adicionar", "📥 Importar planilha", "✏️ Editar/Excluir"]
+    )
 
     # --- Adicionar ---
     with tab_add:
@@ -97,99 +211,64 @@ with st.expander("Gerenciar moradores", expanded=False):
                 }
                 try:
                     table("moradores").insert(payload).execute()
-                    st.success("Morador adicionado.")
                 except Exception as e:
                     st.error("Não foi possível adicionar o morador.")
                     st.exception(e)
+                else:
+                    recarregar_pagina("Morador adicionado.")
 
-    # --- Editar/Excluir ---
-    with tab_edit:
-        # Estado: nenhum morador selecionado por padrão
-        if "edit_morador_id" not in st.session_state:
-            st.session_state.edit_morador_id = None
+    # --- Importar planilha ---
+    with tab_importar:
+        st.caption(
+            "CSV ou XLSX com cabeçalho: Nome, Prédio (ou Bloco), Apto (ou Apartamento) "
+            "e, opcionalmente, Telefone. Quem já está cadastrado com o mesmo nome no "
+            "mesmo prédio e apartamento é ignorado; linhas em branco também."
+        )
+        planilha = st.file_uploader(
+            "Planilha de moradores", type=list(EXTENSOES), key="moradores_planilha"
+        )
+        if st.button("Importar", type="primary", disabled=planilha is None):
+            barra = st.progress(0.0, text="Lendo a planilha...")
 
-        # Campo de busca (somente nome)
-        termo = st.text_input("Buscar por nome (digite parte do nome)", key="busca_edit_nome")
+            def mostrar_progresso(lidas: int, total: int | None):
+                fracao = min(lidas / total, 1.0) if total else 0.0
+                barra.progress(fracao, text=f"{lidas} linha(s) processada(s)...")
 
-        # Se ninguém selecionado, exibe resultados clicáveis
-        if st.session_state.edit_morador_id is None:
-            if termo and termo.strip():
-                df_filtrado = df[df["nome"].str.contains(termo.strip(), case=False, na=False)]
-            else:
-                df_filtrado = df
-
-            if df_filtrado.empty:
-                st.info("Digite um nome para pesquisar e clique no morador para editar.")
-            else:
-                st.caption(f"{len(df_filtrado)} resultado(s) — clique no nome para editar (mostrando até 50).")
-                for _, r in df_filtrado.head(50).iterrows():
-                    label = label_morador(r.to_dict())
-                    if st.button(label, key=f"pick_{r['id']}", use_container_width=True):
-                        st.session_state.edit_morador_id = r["id"]
-                        st.rerun()  # rerender com o formulário aberto
-        else:
-            # Busca o registro atual, mesmo que os filtros do topo o ocultem
-            sel_id = st.session_state.edit_morador_id
-            atual_df = df[df["id"] == sel_id]
-            if atual_df.empty:
-                try:
-                    res = table("moradores").select("id,nome,telefone,predio,apto").eq("id", sel_id).execute()
-                    dados = res.data or []
-                    atual = dados[0] if dados else None
-                except Exception:
-                    atual = None
+            try:
+                resultado = importar_moradores(
+                    planilha, planilha.name, progresso=mostrar_progresso
+                )
+            except ErroImportacao as e:
+                barra.empty()
+                st.error(str(e))
+            except Exception as e:
+                barra.empty()
+                st.error("Não foi possível importar a planilha.")
+                st.exception(e)
             else:
-                atual = atual_df.iloc[0].to_dict()
+                barra.progress(1.0, text=f"{resultado.lidas} linha(s) processada(s).")
+                # o resumo fica na sessão; a página recarrega para a lista
+                # mostrar os novos
+                st.session_state.moradores_importacao = resultado
+                if resultado.importadas:
+                    recarregar_pagina(
+                        f"{resultado.importadas} morador(es) importado(s)."
+                    )
 
-            if not atual:
-                st.warning("Morador não encontrado. Selecione novamente nos resultados.")
-                st.session_state.edit_morador_id = None
-            else:
-                st.markdown(f"**Editando:** {label_morador(atual)}")
-
-                with st.form("form_edit_morador"):
-                    nome_e = st.text_input("Nome", value=str(atual.get("nome","")), max_chars=200)
-                    telefone_e = st.text_input("Telefone", value=str(atual.get("telefone","") or ""), max_chars=30)
-                    predio_e = st.text_input("Prédio", value=str(atual.get("predio","")), max_chars=30)
-                    apto_e = st.text_input("Apto", value=str(atual.get("apto","")), max_chars=30)
-
-                    col1, col2, col3 = st.columns([1, 1, 1])
-                    with col1:
-                        salvar_e = st.form_submit_button("Salvar alterações", type="primary")
-                    with col2:
-                        excluir_e = st.form_submit_button("Excluir", type="secondary")
-                    with col3:
-                        cancelar_e = st.form_submit_button("Cancelar edição")
-
-                if salvar_e:
-                    if not nome_e.strip():
-                        st.error("Informe o nome.")
-                    elif not predio_e.strip() or not apto_e.strip():
-                        st.error("Informe o prédio e o apartamento.")
-                    else:
-                        payload = {
-                            "nome": nome_e.strip(),
-                            "telefone": telefone_e.strip() if telefone_e else None,
-                            "predio": predio_e.strip(),
-                            "apto": apto_e.strip(),
-                        }
-                        try:
-                            table("moradores").update(payload).eq("id", sel_id).execute()
-                            st.success("Morador atualizado.")
-                        except Exception as e:
-                            st.error("Não foi possível atualizar o morador.")
-                            st.exception(e)
-
-                if excluir_e:
-                    try:
-                        table("moradores").delete().eq("id", sel_id).execute()
-                        st.success("Morador excluído.")
-                        st.session_state.edit_morador_id = None
-                        st.rerun()
-                    except Exception as e:
-                        st.error("Não foi possível excluir o morador.")
-                        st.exception(e)
+        resultado = st.session_state.get("moradores_importacao")
+        if resultado is not None:
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Importados", resultado.importadas)
+            c2.metric("Já existentes/repetidos", resultado.repetidas)
+            c3.metric(
+                "Com erro",
+                len(resultado.erros) - sum(e.repetida for e in resultado.erros),
+            )
+            if resultado.erros:
+                st.dataframe(
+                    resultado.quadro_erros(), hide_index=True, use_container_width=True
+                )
 
-                if cancelar_e:
-                    st.session_state.edit_morador_id = None
-                    st.rerun()
+    # --- Editar/Excluir ---
+    with tab_edit:
+        painel_edicao(df)
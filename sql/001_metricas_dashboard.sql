@@ -0,0 +1,45 @@
+-- sql/001_metricas_dashboard.sql
+-- Contadores do painel de Métricas em uma única chamada (RPC):
+--   select vila_da_serra.metricas_dashboard();
+-- Retorna, por tabela, o total e a quebra por status; para ocorrências,
+-- também o total em aberto e a quebra por mês de abertura (últimos 12 meses) e status.
+
+create or replace function vila_da_serra.metricas_dashboard()
+returns jsonb
+language sql
+stable
+security invoker
+set search_path = vila_da_serra, public
+as $$
+  select jsonb_build_object(
+    'moradores', jsonb_build_object(
+      'total', (select count(*) from moradores)
+    ),
+    'ocorrencias', jsonb_build_object(
+      'total', (select count(*) from ocorrencias),
+      -- mesmo critério do antigo filtro status=neq.finalizada (status nulo fica de fora)
+      'em_aberto', (select count(*) from ocorrencias where status <> 'finalizada'),
+      'por_status', coalesce(
+        (select jsonb_object_agg(status, total)
+           from (select coalesce(status, 'aberta') as status, count(*) as total
+                   from ocorrencias
+                  group by 1) s),
+        '{}'::jsonb
+      ),
+      'por_mes', coalesce(
+        (select jsonb_agg(
+                  jsonb_build_object('mes', mes, 'status', status, 'total', total)
+                  order by mes, status)
+           from (select to_char(date_trunc('month', created_at), 'YYYY-MM') as mes,
+                        coalesce(status, 'aberta') as status,
+                        count(*) as total
+                   from ocorrencias
+                  where created_at >= date_trunc('month', now()) - interval '11 months'
+                  group by 1, 2) m),
+        '[]'::jsonb
+      )
+    )
+  );
+$$;
+
+grant execute on function vila_da_serra.metricas_dashboard() to authenticated;
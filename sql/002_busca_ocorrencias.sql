@@ -0,0 +1,73 @@
+-- sql/002_busca_ocorrencias.sql
+-- Busca textual em ocorrências (título + descrição) no banco:
+-- stemming em português, sem diferenciar acentos, com ranking e paginação.
+--   select * from vila_da_serra.buscar_ocorrencias('vazamento garagem', 'aberta', 20, 0);
+
+create extension if not exists unaccent with schema extensions;
+
+-- Configuração "portuguese" com remoção de acentos antes do stemming
+do $$
+begin
+  if not exists (
+    select 1 from pg_ts_config c join pg_namespace n on n.oid = c.cfgnamespace
+     where c.cfgname = 'pt_sem_acento' and n.nspname = 'vila_da_serra'
+  ) then
+    create text search configuration vila_da_serra.pt_sem_acento (copy = pg_catalog.portuguese);
+    alter text search configuration vila_da_serra.pt_sem_acento
+      alter mapping for hword, hword_part, word with extensions.unaccent, portuguese_stem;
+  end if;
+end
+$$;
+
+-- Vetor de busca mantido pelo próprio Postgres (título pesa mais que descrição)
+alter table vila_da_serra.ocorrencias
+  add column if not exists busca tsvector
+  generated always as (
+    setweight(to_tsvector('vila_da_serra.pt_sem_acento'::regconfig, coalesce(titulo, '')), 'A') ||
+    setweight(to_tsvector('vila_da_serra.pt_sem_acento'::regconfig, coalesce(descricao, '')), 'B')
+  ) stored;
+
+create index if not exists ocorrencias_busca_idx
+  on vila_da_serra.ocorrencias using gin (busca);
+
+-- Resultados ordenados por relevância; `total` traz o nº de resultados do filtro
+create or replace function vila_da_serra.buscar_ocorrencias(
+  p_termo text,
+  p_status text default null,
+  p_limite int default 20,
+  p_offset int default 0
+)
+returns table (
+  id vila_da_serra.ocorrencias.id%type,
+  titulo vila_da_serra.ocorrencias.titulo%type,
+  descricao vila_da_serra.ocorrencias.descricao%type,
+  status vila_da_serra.ocorrencias.status%type,
+  morador_id vila_da_serra.ocorrencias.morador_id%type,
+  data_evento vila_da_serra.ocorrencias.data_evento%type,
+  created_at vila_da_serra.ocorrencias.created_at%type,
+  rank real,
+  total bigint
+)
+language sql
+stable
+security invoker
+set search_path = vila_da_serra, public
+as $$
+  with consulta as (
+    select websearch_to_tsquery('vila_da_serra.pt_sem_acento'::regconfig, p_termo) as q
+  ),
+  achados as (
+    select o.*, ts_rank_cd(o.busca, c.q) as rank
+      from ocorrencias o, consulta c
+     where o.busca @@ c.q
+       and (p_status is null or o.status = p_status)
+  )
+  select a.id, a.titulo, a.descricao, a.status, a.morador_id, a.data_evento,
+         a.created_at, a.rank, count(*) over () as total
+    from achados a
+   order by a.rank desc, a.created_at desc, a.id desc
+   limit greatest(p_limite, 1)
+  offset greatest(p_offset, 0);
+$$;
+
+grant execute on function vila_da_serra.buscar_ocorrencias(text, text, int, int) to authenticated;
@@ -0,0 +1,63 @@
+-- sql/003_ocorrencias_resumo.sql
+-- Resumo da descrição calculado no banco, para as listagens não trafegarem
+-- o texto completo. Campo computado do PostgREST:
+--   GET /ocorrencias?select=id,titulo,descricao_resumo
+
+create or replace function vila_da_serra.descricao_resumo(o vila_da_serra.ocorrencias)
+returns text
+language sql
+immutable
+as $$
+  select case
+           when o.descricao is null or btrim(o.descricao) = '' then null
+           when length(btrim(o.descricao)) <= 240 then btrim(o.descricao)
+           else rtrim(left(btrim(o.descricao), 240)) || '...'
+         end;
+$$;
+
+grant execute on function vila_da_serra.descricao_resumo(vila_da_serra.ocorrencias) to authenticated;
+
+-- A busca textual (sql/002) passa a devolver o resumo no lugar da descrição
+drop function if exists vila_da_serra.buscar_ocorrencias(text, text, int, int);
+
+create function vila_da_serra.buscar_ocorrencias(
+  p_termo text,
+  p_status text default null,
+  p_limite int default 20,
+  p_offset int default 0
+)
+returns table (
+  id vila_da_serra.ocorrencias.id%type,
+  titulo vila_da_serra.ocorrencias.titulo%type,
+  descricao_resumo text,
+  status vila_da_serra.ocorrencias.status%type,
+  morador_id vila_da_serra.ocorrencias.morador_id%type,
+  data_evento vila_da_serra.ocorrencias.data_evento%type,
+  created_at vila_da_serra.ocorrencias.created_at%type,
+  rank real,
+  total bigint
+)
+language sql
+stable
+security invoker
+set search_path = vila_da_serra, public
+as $$
+  with consulta as (
+    select websearch_to_tsquery('vila_da_serra.pt_sem_acento'::regconfig, p_termo) as q
+  ),
+  achados as (
+    select o as linha, ts_rank_cd(o.busca, c.q) as rank
+      from ocorrencias o, consulta c
+     where o.busca @@ c.q
+       and (p_status is null or o.status = p_status)
+  )
+  select (a.linha).id, (a.linha).titulo, descricao_resumo(a.linha), (a.linha).status,
+         (a.linha).morador_id, (a.linha).data_evento, (a.linha).created_at,
+         a.rank, count(*) over () as total
+    from achados a
+   order by a.rank desc, (a.linha).created_at desc, (a.linha).id desc
+   limit greatest(p_limite, 1)
+  offset greatest(p_offset, 0);
+$$;
+
+grant execute on function vila_da_serra.buscar_ocorrencias(text, text, int, int) to authenticated;
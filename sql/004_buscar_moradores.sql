@@ -0,0 +1,59 @@
+-- sql/004_buscar_moradores.sql
+-- Busca de moradores enquanto se digita (seletor de morador dos formulários):
+-- prefixo ou trigramas em nome/prédio/apto, sem diferenciar acentos.
+--   select * from vila_da_serra.buscar_moradores('joao 3', 20);
+
+create extension if not exists pg_trgm with schema extensions;
+create extension if not exists unaccent with schema extensions;
+
+-- unaccent() não é immutable (depende do dicionário padrão); com o dicionário
+-- explícito a função pode ser usada em índices de expressão
+create or replace function vila_da_serra.sem_acento(t text)
+returns text
+language sql
+immutable
+parallel safe
+as $$
+  select lower(extensions.unaccent('extensions.unaccent'::regdictionary, coalesce(t, '')));
+$$;
+
+create index if not exists moradores_nome_trgm_idx
+  on vila_da_serra.moradores
+  using gin (vila_da_serra.sem_acento(nome) extensions.gin_trgm_ops);
+
+create index if not exists moradores_unidade_trgm_idx
+  on vila_da_serra.moradores
+  using gin (vila_da_serra.sem_acento(coalesce(predio, '') || ' ' || coalesce(apto, '')) extensions.gin_trgm_ops);
+
+-- Prefixos primeiro, depois os mais parecidos; limite de 50 por chamada
+create or replace function vila_da_serra.buscar_moradores(
+  p_termo text,
+  p_limite int default 20
+)
+returns setof vila_da_serra.moradores
+language sql
+stable
+security invoker
+set search_path = vila_da_serra, extensions, public
+as $$
+  with t as (
+    select replace(replace(replace(vila_da_serra.sem_acento(btrim(p_termo)), '\', '\\'), '%', '\%'), '_', '\_') as termo,
+           vila_da_serra.sem_acento(btrim(p_termo)) as bruto
+  )
+  select m.*
+    from moradores m, t
+   where t.termo <> ''
+     and (
+          vila_da_serra.sem_acento(m.nome) like t.termo || '%'
+       or vila_da_serra.sem_acento(m.nome) like '% ' || t.termo || '%'
+       or vila_da_serra.sem_acento(coalesce(m.predio, '') || ' ' || coalesce(m.apto, '')) like '%' || t.termo || '%'
+       or vila_da_serra.sem_acento(m.nome) % t.bruto
+     )
+   order by (vila_da_serra.sem_acento(m.nome) like t.termo || '%') desc,
+            similarity(vila_da_serra.sem_acento(m.nome), t.bruto) desc,
+            m.nome
+   limit least(greatest(coalesce(p_limite, 20), 1), 50);
+$$;
+
+grant execute on function vila_da_serra.sem_acento(text) to authenticated;
+grant execute on function vila_da_serra.buscar_moradores(text, int) to authenticated;
@@ -0,0 +1,62 @@
+-- sql/005_moradores_sincronizacao.sql
+-- Sincronização incremental do diretório de moradores (src/diretorio.py):
+-- `updated_at` marca cada inserção/alteração e `moradores_excluidos` guarda
+-- os ids removidos (tombstones), para o app buscar só o que mudou.
+--   GET /moradores?updated_at=gte.<marca>
+--   GET /moradores_excluidos?excluido_em=gte.<marca>
+
+alter table vila_da_serra.moradores
+  add column if not exists updated_at timestamptz not null default now();
+
+create index if not exists moradores_updated_at_idx
+  on vila_da_serra.moradores (updated_at, id);
+
+create or replace function vila_da_serra.tocar_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.updated_at := clock_timestamp();
+  return new;
+end;
+$$;
+
+drop trigger if exists moradores_updated_at on vila_da_serra.moradores;
+create trigger moradores_updated_at
+  before insert or update on vila_da_serra.moradores
+  for each row execute function vila_da_serra.tocar_updated_at();
+
+create table if not exists vila_da_serra.moradores_excluidos (
+  id uuid primary key,
+  excluido_em timestamptz not null default clock_timestamp()
+);
+
+create index if not exists moradores_excluidos_em_idx
+  on vila_da_serra.moradores_excluidos (excluido_em);
+
+create or replace function vila_da_serra.registrar_morador_excluido()
+returns trigger
+language plpgsql
+security definer
+set search_path = vila_da_serra, public
+as $$
+begin
+  insert into moradores_excluidos (id) values (old.id)
+  on conflict (id) do update set excluido_em = clock_timestamp();
+  return old;
+end;
+$$;
+
+drop trigger if exists moradores_excluidos_trg on vila_da_serra.moradores;
+create trigger moradores_excluidos_trg
+  after delete on vila_da_serra.moradores
+  for each row execute function vila_da_serra.registrar_morador_excluido();
+
+alter table vila_da_serra.moradores_excluidos enable row level security;
+
+drop policy if exists moradores_excluidos_leitura on vila_da_serra.moradores_excluidos;
+create policy moradores_excluidos_leitura
+  on vila_da_serra.moradores_excluidos
+  for select to authenticated using (true);
+
+grant select on vila_da_serra.moradores_excluidos to authenticated;
@@ -0,0 +1,54 @@
+-- sql/006_filtrar_moradores.sql
+-- Filtro único da página Moradores: cada palavra digitada precisa aparecer
+-- no nome, prédio ou apto (sem diferenciar acentos), paginado, com o total.
+-- Usa vila_da_serra.sem_acento() de sql/004.
+--   select * from vila_da_serra.filtrar_moradores('joao bloco b', 20, 0);
+
+create extension if not exists pg_trgm with schema extensions;
+
+-- Índice de trigramas sobre o texto combinado: atende like '%palavra%'
+create index if not exists moradores_filtro_trgm_idx
+  on vila_da_serra.moradores
+  using gin (
+    vila_da_serra.sem_acento(coalesce(nome, '') || ' ' || coalesce(predio, '') || ' ' || coalesce(apto, ''))
+    extensions.gin_trgm_ops
+  );
+
+create or replace function vila_da_serra.filtrar_moradores(
+  p_termo text default '',
+  p_limite int default 20,
+  p_offset int default 0
+)
+returns table (
+  id vila_da_serra.moradores.id%type,
+  nome vila_da_serra.moradores.nome%type,
+  telefone vila_da_serra.moradores.telefone%type,
+  predio vila_da_serra.moradores.predio%type,
+  apto vila_da_serra.moradores.apto%type,
+  created_at vila_da_serra.moradores.created_at%type,
+  total bigint
+)
+language sql
+stable
+security invoker
+set search_path = vila_da_serra, extensions, public
+as $$
+  with palavras as (
+    select array(
+      select '%' || replace(replace(replace(p, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+        from regexp_split_to_table(vila_da_serra.sem_acento(btrim(coalesce(p_termo, ''))), '\s+') p
+       where p <> ''
+    ) as padroes
+  )
+  select m.id, m.nome, m.telefone, m.predio, m.apto, m.created_at,
+         count(*) over () as total
+    from moradores m, palavras w
+   where vila_da_serra.sem_acento(coalesce(m.nome, '') || ' ' || coalesce(m.predio, '') || ' ' || coalesce(m.apto, ''))
+         like all (w.padroes)
+   order by similarity(vila_da_serra.sem_acento(m.nome), vila_da_serra.sem_acento(p_termo)) desc,
+            m.nome, m.id
+   limit greatest(p_limite, 1)
+  offset greatest(p_offset, 0);
+$$;
+
+grant execute on function vila_da_serra.filtrar_moradores(text, int, int) to authenticated;
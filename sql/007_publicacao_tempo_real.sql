@@ -0,0 +1,23 @@
+-- sql/007_publicacao_tempo_real.sql
+-- Publica as mudanças das tabelas do app no Supabase Realtime, para o ouvinte
+-- de src/tempo_real.py invalidar o cache só quando os dados mudam.
+-- O papel da chave usada pelo ouvinte (VDS_TEMPO_REAL_CHAVE) precisa ter
+-- leitura nas tabelas pelas políticas de RLS.
+
+do $$
+declare
+  t text;
+begin
+  foreach t in array array['moradores', 'ocorrencias', 'transacoes'] loop
+    if not exists (
+      select 1 from pg_publication_tables
+       where pubname = 'supabase_realtime' and schemaname = 'vila_da_serra' and tablename = t
+    ) then
+      execute format('alter publication supabase_realtime add table vila_da_serra.%I', t);
+    end if;
+  end loop;
+end
+$$;
+
+-- O Realtime precisa enxergar o schema
+grant usage on schema vila_da_serra to supabase_realtime_admin;
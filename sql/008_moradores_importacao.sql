@@ -0,0 +1,13 @@
+-- sql/008_moradores_importacao.sql
+-- Importação em lote de moradores (src/importacao.py): o upsert por lote usa
+-- (predio, apto, nome) como alvo de conflito, então a combinação precisa de
+-- um índice único.
+--   POST /moradores?on_conflict=predio,apto,nome
+--   Prefer: resolution=ignore-duplicates
+--
+-- Antes de criar o índice, confira se já há repetidos:
+--   select predio, apto, nome, count(*) from vila_da_serra.moradores
+--   group by 1, 2, 3 having count(*) > 1;
+
+create unique index if not exists moradores_unidade_nome_uidx
+  on vila_da_serra.moradores (predio, apto, nome);
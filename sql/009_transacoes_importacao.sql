@@ -0,0 +1,14 @@
+-- sql/009_transacoes_importacao.sql
+-- Importação de extratos (src/extrato.py): cada transação importada guarda o
+-- hash do seu conteúdo (data, valor, descrição normalizada e ordem entre
+-- lançamentos iguais do arquivo). O índice único torna a reimportação do
+-- mesmo extrato idempotente; transações digitadas à mão ficam com null.
+--   GET  /transacoes?select=hash_importacao&data=gte.<ini>&data=lte.<fim>&hash_importacao=not.is.null
+--   POST /transacoes?on_conflict=hash_importacao
+--   Prefer: resolution=ignore-duplicates
+
+alter table vila_da_serra.transacoes
+  add column if not exists hash_importacao text;
+
+create unique index if not exists transacoes_hash_importacao_uidx
+  on vila_da_serra.transacoes (hash_importacao);
@@ -0,0 +1,153 @@
+-- sql/010_transacoes_mensal.sql
+-- Consolidação mensal do Fluxo de Caixa: totais de entradas e saídas por mês,
+-- mantidos por gatilho a cada insert/update/delete em transacoes. O cabeçalho
+-- e o gráfico mensal da página leem só daqui, sem varrer as transações.
+--   select * from vila_da_serra.fluxo_mensal('2025-01-01', null);
+--   select vila_da_serra.reconstruir_transacoes_mensal_interno();  -- recalcula tudo
+
+create table if not exists vila_da_serra.transacoes_mensal (
+  mes date primary key,  -- primeiro dia do mês
+  entradas numeric(14, 2) not null default 0,
+  saidas numeric(14, 2) not null default 0,
+  quantidade int not null default 0,
+  atualizado_em timestamptz not null default now()
+);
+
+create or replace function vila_da_serra.acumular_transacao_mensal(
+  p_data date,
+  p_tipo text,
+  p_valor numeric,
+  p_sinal int
+)
+returns void
+language sql
+set search_path = vila_da_serra, public
+as $$
+  insert into transacoes_mensal as m (mes, entradas, saidas, quantidade)
+  values (
+    date_trunc('month', p_data)::date,
+    case when p_tipo = 'entrada' then p_sinal * p_valor else 0 end,
+    case when p_tipo = 'saida' then p_sinal * p_valor else 0 end,
+    p_sinal
+  )
+  on conflict (mes) do update set
+    entradas = m.entradas + excluded.entradas,
+    saidas = m.saidas + excluded.saidas,
+    quantidade = m.quantidade + excluded.quantidade,
+    atualizado_em = now();
+$$;
+
+create or replace function vila_da_serra.transacoes_mensal_trg()
+returns trigger
+language plpgsql
+security definer
+set search_path = vila_da_serra, public
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    perform acumular_transacao_mensal(old.data, old.tipo, old.valor, -1);
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    perform acumular_transacao_mensal(new.data, new.tipo, new.valor, 1);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists transacoes_mensal_trg on vila_da_serra.transacoes;
+create trigger transacoes_mensal_trg
+  after insert or delete or update of data, tipo, valor on vila_da_serra.transacoes
+  for each row execute function vila_da_serra.transacoes_mensal_trg();
+
+-- Recalcula a consolidação a partir das transações (bloqueia escritas em
+-- transacoes enquanto roda). Retorna o número de meses. Sem grant para
+-- ninguém: só o dono (migrações) e a função restrita abaixo a chamam.
+create or replace function vila_da_serra.reconstruir_transacoes_mensal_interno()
+returns int
+language plpgsql
+security definer
+set search_path = vila_da_serra, public
+as $$
+declare
+  n int;
+begin
+  lock table transacoes in share mode;
+  delete from transacoes_mensal;
+  insert into transacoes_mensal (mes, entradas, saidas, quantidade)
+  select date_trunc('month', data)::date,
+         coalesce(sum(valor) filter (where tipo = 'entrada'), 0),
+         coalesce(sum(valor) filter (where tipo = 'saida'), 0),
+         count(*)
+    from transacoes
+   group by 1;
+  get diagnostics n = row_count;
+  return n;
+end;
+$$;
+
+revoke all on function vila_da_serra.reconstruir_transacoes_mensal_interno() from public, anon, authenticated;
+
+-- Versão exposta no PostgREST: só service_role ou usuários com
+-- app_metadata.vds_admin = true no token (definido pelo painel do Supabase
+-- ou pela API admin; o usuário não consegue alterar app_metadata)
+create or replace function vila_da_serra.reconstruir_transacoes_mensal()
+returns int
+language plpgsql
+security definer
+set search_path = vila_da_serra, public
+as $$
+begin
+  if coalesce(auth.role(), '') <> 'service_role'
+     and not coalesce((auth.jwt() -> 'app_metadata' ->> 'vds_admin')::boolean, false) then
+    raise exception 'apenas administradores podem reconstruir a consolidação mensal'
+      using errcode = '42501';
+  end if;
+  return reconstruir_transacoes_mensal_interno();
+end;
+$$;
+
+-- Meses do período com o saldo do mês e o acumulado desde o primeiro mês
+-- (a janela percorre só as linhas mensais, não as transações).
+create or replace function vila_da_serra.fluxo_mensal(
+  p_inicio date default null,
+  p_fim date default null
+)
+returns table (
+  mes date,
+  entradas numeric,
+  saidas numeric,
+  quantidade int,
+  saldo_mes numeric,
+  saldo_acumulado numeric
+)
+language sql
+stable
+security invoker
+set search_path = vila_da_serra, public
+as $$
+  select *
+    from (
+      select m.mes, m.entradas, m.saidas, m.quantidade,
+             m.entradas - m.saidas as saldo_mes,
+             sum(m.entradas - m.saidas) over (order by m.mes) as saldo_acumulado
+        from transacoes_mensal m
+    ) f
+   where (p_inicio is null or f.mes >= date_trunc('month', p_inicio)::date)
+     and (p_fim is null or f.mes <= p_fim)
+   order by f.mes;
+$$;
+
+alter table vila_da_serra.transacoes_mensal enable row level security;
+
+drop policy if exists transacoes_mensal_leitura on vila_da_serra.transacoes_mensal;
+create policy transacoes_mensal_leitura
+  on vila_da_serra.transacoes_mensal
+  for select to authenticated using (true);
+
+grant select on vila_da_serra.transacoes_mensal to authenticated;
+grant execute on function vila_da_serra.fluxo_mensal(date, date) to authenticated;
+revoke all on function vila_da_serra.reconstruir_transacoes_mensal() from public, anon;
+grant execute on function vila_da_serra.reconstruir_transacoes_mensal() to authenticated, service_role;
+
+-- carga inicial
+select vila_da_serra.reconstruir_transacoes_mensal_interno();
@@ -1,31 +1,114 @@
 # src/auth.py
+import time
+
 import streamlit as st
-from src.supabase_client import supabase
 
+from src.config import ADMINS, AUTH_MARGEM_EXPIRACAO, AUTH_RECHECK_SEGUNDOS
+from src.rastreamento import cronometrar
+from src.supabase_client import descartar_cliente_atual, get_client, token_atual
+from src.tokens import validar_token, verificar_assinatura
+
+# Usuário em cache na sessão do Streamlit (evita get_user() a cada rerun)
+_CHAVE_CACHE = "_auth_usuario"
+
+
+@cronometrar("auth.get_user")
 def _get_user():
     try:
-        resp = supabase.auth.get_user()
+        resp = get_client().auth.get_user()
         return getattr(resp, "user", None)
     except Exception:
         return None
 
+
+def limpar_usuario_cache():
+    st.session_state.pop(_CHAVE_CACHE, None)
+
+
+@cronometrar("auth.usuario_atual")
+def usuario_atual(token: str | None = None):
+    """
+    Retorna o usuário da sessão atual, validando o access token localmente.
+    O GoTrue (get_user) só é consultado quando não há usuário em cache para o
+    `sub` do token, quando o token está perto de vencer ou quando passou o
+    intervalo de reconfirmação (VDS_AUTH_RECHECK_SEGUNDOS). Se a assinatura
+    não pôde ser verificada localmente (sem segredo/JWKS), o cache só vale
+    para o mesmo token: um token novo sempre passa pelo GoTrue.
+    Chame depois de ensure_postgrest_auth(), que aplica/renova o token.
+    """
+    token = token or token_atual()
+    claims = validar_token(token)
+    if claims is None:
+        limpar_usuario_cache()
+        return None
+
+    agora = time.time()
+    cache = st.session_state.get(_CHAVE_CACHE)
+    if (
+        cache
+        and cache["sub"] == claims["sub"]
+        and (cache["token"] == token or verificar_assinatura(token) is True)
+        and agora < cache["valido_ate"]
+        and agora - cache["verificado_em"] < AUTH_RECHECK_SEGUNDOS
+    ):
+        return cache["user"]
+
+    user = _get_user()
+    if user is None or str(getattr(user, "id", "")) != str(claims["sub"]):
+        limpar_usuario_cache()
+        return None
+    st.session_state[_CHAVE_CACHE] = {
+        "sub": claims["sub"],
+        "token": token,
+        "user": user,
+        "verificado_em": agora,
+        "valido_ate": float(claims["exp"]) - AUTH_MARGEM_EXPIRACAO,
+    }
+    return user
+
+
+def eh_admin(user) -> bool:
+    # administradores configurados em VDS_ADMINS (painel de desempenho etc.)
+    return bool(user) and str(getattr(user, "email", "") or "").lower() in ADMINS
+
+
+@cronometrar("auth.sair")
+def sair():
+    # Encerra a sessão no GoTrue e limpa o token/usuário locais
+    supabase = get_client()
+    try:
+        supabase.auth.sign_out()
+    except Exception:
+        pass
+    try:
+        supabase.postgrest.auth(None)
+    except Exception:
+        pass
+    descartar_cliente_atual()
+    limpar_usuario_cache()
+
+
+@cronometrar("auth.entrar")
+def entrar_com_senha(email: str, senha: str):
+    return get_client().auth.sign_in_with_password({"email": email, "password": senha})
+
+
 def login_widget(title: str = "Acesso"):
     st.subheader(title)
 
-    user = _get_user()
+    user = usuario_atual()
     if user:
         cols = st.columns([3, 1])
         cols[0].success(f"Conectado: {user.email}")
         if cols[1].button("Sair"):
-            try:
-                supabase.auth.sign_out()
-            finally:
-                pass
+            sair()
         return True
 
     with st.form("form_login"):
         email = st.text_input("E-mail", autocomplete="username")
-        password = st.text_input("Senha", type="password", autocomplete="current-password")
+        password = st.text_input(
+            "Senha", type="password", autocomplete="current-password"
+        )
         entrar = st.form_submit_button("Entrar", type="primary")
 
     if entrar:
@@ -33,7 +116,7 @@ def login_widget(title: str = "Acesso"):
             st.error("Informe e-mail e senha.")
         else:
             try:
-                supabase.auth.sign_in_with_password({"email": email, "password": password})
+                entrar_com_senha(email, password)
                 st.success("Autenticado.")
                 return True
             except Exception as e:
@@ -0,0 +1,1216 @@
+# src/backend_sqlite.py
+"""
+Backend local em SQLite, selecionado com VDS_BACKEND=sqlite.
+
+Implementa o mesmo recorte da interface do cliente Supabase que o app usa,
+para que src/supabase_client.py (pool, cache, Consulta) funcione igual:
+  cliente.auth      -> sign_in_with_password, get_session, refresh_session,
+                       get_user, sign_out (tokens HS256 locais)
+  cliente.postgrest -> auth(token), from_(tabela), rpc(funcao, params)
+  from_(t)          -> select(..., count=) / insert / upsert / update / delete
+  filtros           -> eq, neq, gt, gte, lt, lte, like, ilike, is_, in_, or_, not_
+  modificadores     -> order, limit, offset, range, csv
+Embutidos ("alias:tabela(colunas)") e o campo computado descricao_resumo são
+resolvidos aqui; as funções RPC chamam os equivalentes em Python
+(metricas_em_processo, índice invertido local, buscas de moradores) ou leem a
+consolidação mensal de transacoes_mensal, mantida por gatilhos como em sql/010.
+Como lá, reconstruir_transacoes_mensal só atende tokens com
+app_metadata.vds_admin, que aqui vem de VDS_ADMINS.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from postgrest.exceptions import APIError
+
+from src.config import (
+    ADMINS,
+    LOCAL_EMAIL,
+    LOCAL_JWT_SEGREDO,
+    LOCAL_SENHA,
+    SQLITE_CAMINHO,
+    SQLITE_SEMENTE_MORADORES,
+    SQLITE_SEMENTE_OCORRENCIAS,
+    SQLITE_SEMENTE_TRANSACOES,
+    SUPABASE_URL,
+)
+from src.esquemas import STATUS_OCORRENCIA, TIPOS_TRANSACAO
+from src.ocorrencias import resumo
+from src.supabase_client import medindo_resposta, registrar_resposta
+from src.tokens import AUDIENCIA, emitir_token, validar_token
+
+ESQUEMA_SQL = """
+create table if not exists usuarios (
+  id text primary key,
+  email text not null unique,
+  senha_hash text not null
+);
+
+create table if not exists moradores (
+  id text primary key,
+  nome text not null,
+  telefone text,
+  predio text,
+  apto text,
+  created_at text not null,
+  updated_at text not null
+);
+create index if not exists moradores_nome_idx on moradores (nome);
+create index if not exists moradores_updated_at_idx on moradores (updated_at, id);
+create unique index if not exists moradores_unidade_nome_uidx
+    on moradores (predio, apto, nome);
+
+create table if not exists moradores_excluidos (
+  id text primary key,
+  excluido_em text not null
+);
+create trigger if not exists moradores_excluidos_trg
+after delete on moradores
+begin
+  insert into moradores_excluidos (id, excluido_em)
+  values (old.id, strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+  on conflict (id) do update set excluido_em = excluded.excluido_em;
+end;
+
+create table if not exists ocorrencias (
+  id text primary key,
+  titulo text not null,
+  descricao text,
+  status text not null default 'aberta',
+  morador_id text references moradores (id) on delete set null,
+  data_evento text,
+  created_at text not null
+);
+create index if not exists ocorrencias_created_at_idx on ocorrencias (created_at, id);
+create index if not exists ocorrencias_status_idx
+    on ocorrencias (status, created_at, id);
+create index if not exists ocorrencias_data_evento_idx on ocorrencias (data_evento);
+
+create table if not exists transacoes (
+  id text primary key,
+  data text not null,
+  descricao text,
+  valor real not null,
+  tipo text not null,
+  created_at text not null,
+  hash_importacao text
+);
+create index if not exists transacoes_data_idx on transacoes (data, created_at);
+
+-- consolidação mensal (sql/010), em centavos inteiros para somas exatas
+create table if not exists transacoes_mensal (
+  mes text primary key,
+  entradas_centavos integer not null default 0,
+  saidas_centavos integer not null default 0,
+  quantidade integer not null default 0
+);
+create trigger if not exists transacoes_mensal_ins
+after insert on transacoes
+begin
+  insert into transacoes_mensal (mes, entradas_centavos, saidas_centavos, quantidade)
+  values (
+    substr(new.data, 1, 7) || '-01',
+    case when new.tipo = 'entrada'
+        then cast(round(new.valor * 100) as integer) else 0 end,
+    case when new.tipo = 'saida'
+        then cast(round(new.valor * 100) as integer) else 0 end,
+    1
+  )
+  on conflict (mes) do update set
+    entradas_centavos = entradas_centavos + excluded.entradas_centavos,
+    saidas_centavos = saidas_centavos + excluded.saidas_centavos,
+    quantidade = quantidade + excluded.quantidade;
+end;
+create trigger if not exists transacoes_mensal_del
+after delete on transacoes
+begin
+  insert into transacoes_mensal (mes, entradas_centavos, saidas_centavos, quantidade)
+  values (
+    substr(old.data, 1, 7) || '-01',
+    case when old.tipo = 'entrada'
+        then -cast(round(old.valor * 100) as integer) else 0 end,
+    case when old.tipo = 'saida'
+        then -cast(round(old.valor * 100) as integer) else 0 end,
+    -1
+  )
+  on conflict (mes) do update set
+    entradas_centavos = entradas_centavos + excluded.entradas_centavos,
+    saidas_centavos = saidas_centavos + excluded.saidas_centavos,
+    quantidade = quantidade + excluded.quantidade;
+end;
+create trigger if not exists transacoes_mensal_upd
+after update of data, tipo, valor on transacoes
+begin
+  insert into transacoes_mensal (mes, entradas_centavos, saidas_centavos, quantidade)
+  values (
+    substr(old.data, 1, 7) || '-01',
+    case when old.tipo = 'entrada'
+        then -cast(round(old.valor * 100) as integer) else 0 end,
+    case when old.tipo = 'saida'
+        then -cast(round(old.valor * 100) as integer) else 0 end,
+    -1
+  )
+  on conflict (mes) do update set
+    entradas_centavos = entradas_centavos + excluded.entradas_centavos,
+    saidas_centavos = saidas_centavos + excluded.saidas_centavos,
+    quantidade = quantidade + excluded.quantidade;
+  insert into transacoes_mensal (mes, entradas_centavos, saidas_centavos, quantidade)
+  values (
+    substr(new.data, 1, 7) || '-01',
+    case when new.tipo = 'entrada'
+        then cast(round(new.valor * 100) as integer) else 0 end,
+    case when new.tipo = 'saida'
+        then cast(round(new.valor * 100) as integer) else 0 end,
+    1
+  )
+  on conflict (mes) do update set
+    entradas_centavos = entradas_centavos + excluded.entradas_centavos,
+    saidas_centavos = saidas_centavos + excluded.saidas_centavos,
+    quantidade = quantidade + excluded.quantidade;
+end;
+"""
+
+RECONSTRUIR_MENSAL_SQL = """
+delete from transacoes_mensal;
+insert into transacoes_mensal (mes, entradas_centavos, saidas_centavos, quantidade)
+select substr(data, 1, 7) || '-01',
+       coalesce(sum(case when tipo = 'entrada'
+           then cast(round(valor * 100) as integer) end), 0),
+       coalesce(sum(case when tipo = 'saida'
+           then cast(round(valor * 100) as integer) end), 0),
+       count(*)
+  from transacoes
+ group by 1;
+"""
+
+FLUXO_MENSAL_SQL = """
+select * from (
+  select mes,
+         entradas_centavos / 100.0 as entradas,
+         saidas_centavos / 100.0 as saidas,
+         quantidade,
+         (entradas_centavos - saidas_centavos) / 100.0 as saldo_mes,
+         sum(entradas_centavos - saidas_centavos) over (order by mes) / 100.0
+             as saldo_acumulado
+    from transacoes_mensal
+)
+where (:inicio is null or mes >= substr(:inicio, 1, 7) || '-01')
+  and (:fim is null or mes <= :fim)
+order by mes
+"""
+
+# Colunas acrescentadas depois (bancos em arquivo criados antes delas) e os
+# índices que dependem delas, aplicados depois de ESQUEMA_SQL
+COLUNAS_POSTERIORES = {"transacoes": {"hash_importacao": "text"}}
+INDICES_POSTERIORES_SQL = """
+create unique index if not exists transacoes_hash_importacao_uidx
+    on transacoes (hash_importacao);
+"""
+
+# Embutidos muitos-para-um: tabela base -> {tabela embutida: coluna da FK}
+RELACOES = {"ocorrencias": {"moradores": "morador_id"}}
+
+# Campos computados (equivalentes às funções do PostgREST em sql/)
+COMPUTADOS = {"ocorrencias": {"descricao_resumo": "descricao_resumo(descricao)"}}
+
+# Colunas preenchidas pelo "banco" quando ausentes no insert
+_GERADAS = ("id", "created_at", "updated_at")
+
+_RE_EMBUTIDO = re.compile(r"^(?:(\w+):)?(\w+)(?:!\w+)?\((.*)\)$", re.S)
+
+
+def agora_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _valor_sql(v):
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, ensure_ascii=False)
+    return v
+
+
+def _erro(mensagem: str, codigo: str = "PGRST100") -> APIError:
+    return APIError(
+        {"message": mensagem, "code": codigo, "hint": None, "details": None}
+    )
+
+
+def _separar(texto: str) -> list[str]:
+    # divide por vírgulas de nível zero (fora de parênteses e aspas)
+    partes, atual, nivel, aspas, escape = [], [], 0, False, False
+    for c in texto:
+        if escape:
+            atual.append(c)
+            escape = False
+        elif c == "\\" and aspas:
+            atual.append(c)
+            escape = True
+        elif c == '"':
+            aspas = not aspas
+            atual.append(c)
+        elif c == "(" and not aspas:
+            nivel += 1
+            atual.append(c)
+        elif c == ")" and not aspas:
+            nivel -= 1
+            atual.append(c)
+        elif c == "," and nivel == 0 and not aspas:
+            partes.append("".join(atual).strip())
+            atual = []
+        else:
+            atual.append(c)
+    if atual or partes:
+        partes.append("".join(atual).strip())
+    return [p for p in partes if p]
+
+
+def _literal(texto: str) -> str:
+    # valor do filtro PostgREST: tira aspas e desfaz \" e \\
+    texto = texto.strip()
+    if len(texto) >= 2 and texto[0] == texto[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", texto[1:-1])
+    return texto
+
+
+# ---------- banco ----------
+class BancoLocal:
+    """Conexão SQLite única do processo (compartilhada pelas sessões, com lock)."""
+
+    def __init__(self, caminho: str = SQLITE_CAMINHO):
+        self.conexao = sqlite3.connect(
+            caminho, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self.conexao.row_factory = sqlite3.Row
+        self.conexao.create_function("descricao_resumo", 1, resumo, deterministic=True)
+        self.lock = threading.RLock()
+        with self.lock:
+            self.conexao.execute("pragma foreign_keys = on")
+            if caminho != ":memory:":
+                # arquivo compartilhado entre processos: leitores não
+                # bloqueiam a escrita
+                self.conexao.execute("pragma journal_mode = wal")
+            self.conexao.executescript(ESQUEMA_SQL)
+            for tabela, novas in COLUNAS_POSTERIORES.items():
+                existentes = {
+                    r["name"]
+                    for r in self.conexao.execute(f"pragma table_info({tabela})")
+                }
+                for coluna, tipo in novas.items():
+                    if coluna not in existentes:
+                        self.conexao.execute(
+                            f"alter table {tabela} add column {coluna} {tipo}"
+                        )
+            self.conexao.executescript(INDICES_POSTERIORES_SQL)
+        self._colunas: dict[str, list[str]] = {}
+        # banco em arquivo criado antes da consolidação mensal
+        if not self.executar(
+            "select 1 from transacoes_mensal limit 1"
+        ) and self.executar("select 1 from transacoes limit 1"):
+            self.reconstruir_mensal()
+
+    def executar(self, sql: str, params=()) -> list[dict]:
+        with self.lock:
+            try:
+                return [dict(r) for r in self.conexao.execute(sql, params).fetchall()]
+            except sqlite3.Error as e:
+                raise _erro(str(e), "PGRST000") from e
+
+    def colunas(self, tabela: str) -> list[str]:
+        if tabela not in self._colunas:
+            linhas = self.executar(f"pragma table_info({tabela})")
+            if not linhas:
+                raise _erro(
+                    f"Could not find the table '{tabela}' in the schema cache",
+                    "PGRST205",
+                )
+            self._colunas[tabela] = [linha["name"] for linha in linhas]
+        return self._colunas[tabela]
+
+    def reconstruir_mensal(self) -> int:
+        with self.lock:
+            self.executar("begin")
+            try:
+                for comando in RECONSTRUIR_MENSAL_SQL.split(";"):
+                    if comando.strip():
+                        self.executar(comando)
+                self.executar("commit")
+            except Exception:
+                self.executar("rollback")
+                raise
+        return self.executar("select count(*) as n from transacoes_mensal")[0]["n"]
+
+    def vazio(self) -> bool:
+        return not self.executar("select 1 from moradores limit 1")
+
+
+_banco: BancoLocal | None = None
+_banco_lock = threading.Lock()
+
+
+def banco_local() -> BancoLocal:
+    # criado (e semeado, se vazio) no primeiro uso
+    global _banco
+    with _banco_lock:
+        if _banco is None:
+            banco = BancoLocal()
+            semear(banco)
+            _banco = banco
+        return _banco
+
+
+# ---------- consultas ----------
+class ConsultaLocal:
+    """Operação sobre uma tabela (select/insert/upsert/update/delete)."""
+
+    def __init__(self, banco: BancoLocal, tabela: str, operacao: str, **opcoes):
+        self.banco = banco
+        self.tabela = tabela
+        self.operacao = operacao
+        self.opcoes = opcoes
+        self._filtros: list[tuple[str, list]] = []
+        self._ordens: list[tuple[str, bool, bool | None]] = []
+        self._limite: int | None = None
+        self._deslocamento: int | None = None
+        self._csv = False
+        self._negar = False
+
+    # ----- colunas -----
+    def _coluna(self, nome: str) -> str:
+        nome = nome.strip()
+        computados = COMPUTADOS.get(self.tabela, {})
+        if nome in computados:
+            return computados[nome]
+        if nome not in self.banco.colunas(self.tabela):
+            raise _erro(f"column {self.tabela}.{nome} does not exist", "42703")
+        return f'"{nome}"'
+
+    # ----- filtros -----
+    def _condicao(self, coluna: str, op: str, valor) -> tuple[str, list]:
+        c = self._coluna(coluna)
+        if op in ("eq", "neq", "gt", "gte", "lt", "lte"):
+            sinal = {
+                "eq": "=",
+                "neq": "<>",
+                "gt": ">",
+                "gte": ">=",
+                "lt": "<",
+                "lte": "<=",
+            }[op]
+            return f"{c} {sinal} ?", [_valor_sql(valor)]
+        if op in ("like", "ilike"):
+            padrao = str(valor).replace("*", "%")
+            return f"{c} like ?", [padrao]
+        if op == "is":
+            texto = str(valor).lower()
+            if texto in ("null", "none"):
+                return f"{c} is null", []
+            return f"{c} is ?", [1 if texto == "true" else 0]
+        if op == "in":
+            valores = list(valor)
+            if not valores:
+                return "0", []
+            return f"{c} in ({','.join('?' * len(valores))})", [
+                _valor_sql(v) for v in valores
+            ]
+        raise _erro(f"operador não suportado: {op}")
+
+    def _adicionar(self, sql: str, params: list):
+        if self._negar:
+            sql, self._negar = f"not ({sql})", False
+        self._filtros.append((sql, params))
+        return self
+
+    def eq(self, coluna, valor):
+        return self._adicionar(*self._condicao(coluna, "eq", valor))
+
+    def neq(self, coluna, valor):
+        return self._adicionar(*self._condicao(coluna, "neq", valor))
+
+    def gt(self, coluna, valor):
+        return self._adicionar(*self._condicao(coluna, "gt", valor))
+
+    def gte(self, coluna, valor):
+        return self._adicionar(*self._condicao(coluna, "gte", valor))
+
+    def lt(self, coluna, valor):
+        return self._adicionar(*self._condicao(coluna, "lt", valor))
+
+    def lte(self, coluna, valor):
+        return self._adicionar(*self._condicao(coluna, "lte", valor))
+
+    def like(self, coluna, padrao):
+        return self._adicionar(*self._condicao(coluna, "like", padrao))
+
+    def ilike(self, coluna, padrao):
+        return self._adicionar(*self._condicao(coluna, "ilike", padrao))
+
+    def is_(self, coluna, valor):
+        return self._adicionar(*self._condicao(coluna, "is", valor))
+
+    def in_(self, coluna, valores):
+        return self._adicionar(*self._condicao(coluna, "in", valores))
+
+    @property
+    def not_(self):
+        # como no postgrest-py: o próximo filtro entra negado
+        self._negar = True
+        return self
+
+    def _termo_logico(self, termo: str) -> tuple[str, list]:
+        # "col.op.valor", "col.not.op.valor", "and(...)", "or(...)", "not.and(...)"
+        negar = False
+        if termo.startswith("not."):
+            negar, termo = True, termo[4:]
+        m = re.match(r"^(and|or)\((.*)\)$", termo, re.S)
+        if m:
+            sql, params = self._grupo(m.group(2), m.group(1))
+        else:
+            coluna, resto = termo.split(".", 1)
+            op, valor = resto.split(".", 1)
+            if op == "not":
+                negar = not negar
+                op, valor = valor.split(".", 1)
+            if op == "in":
+                valor = [_literal(v) for v in _separar(valor.strip()[1:-1])]
+            else:
+                valor = _literal(valor)
+            sql, params = self._condicao(coluna, op, valor)
+        return (f"not ({sql})", params) if negar else (sql, params)
+
+    def _grupo(self, texto: str, juncao: str) -> tuple[str, list]:
+        partes, params = [], []
+        for termo in _separar(texto):
+            sql, p = self._termo_logico(termo)
+            partes.append(f"({sql})")
+            params.extend(p)
+        return f" {juncao} ".join(partes) or "1", params
+
+    def or_(self, filtros: str, reference_table: str | None = None):
+        return self._adicionar(*self._grupo(filtros, "or"))
+
+    # ----- modificadores -----
+    def order(self, coluna, *, desc=False, nullsfirst=None, foreign_table=None):
+        self._ordens.append((coluna, desc, nullsfirst))
+        return self
+
+    def limit(self, n, *, foreign_table=None):
+        self._limite = int(n)
+        return self
+
+    def offset(self, n):
+        self._deslocamento = int(n)
+        return self
+
+    def range(self, inicio, fim, foreign_table=None):
+        self._deslocamento = int(inicio)
+        self._limite = int(fim) - int(inicio) + 1
+        return self
+
+    def csv(self):
+        self._csv = True
+        return self
+
+    # ----- execução -----
+    def _where(self) -> tuple[str, list]:
+        if not self._filtros:
+            return "", []
+        params = [p for _, ps in self._filtros for p in ps]
+        return " where " + " and ".join(f"({sql})" for sql, _ in self._filtros), params
+
+    def _order_by(self) -> str:
+        termos = []
+        for coluna, desc, nullsfirst in self._ordens:
+            c = self._coluna(coluna)
+            # como no Postgres: asc -> nulos por último; desc -> nulos primeiro
+            nulos_primeiro = desc if nullsfirst is None else nullsfirst
+            termos.append(f"({c} is null) {'desc' if nulos_primeiro else 'asc'}")
+            termos.append(f"{c} {'desc' if desc else 'asc'}")
+        return " order by " + ", ".join(termos) if termos else ""
+
+    def _limit_offset(self) -> str:
+        if self._limite is None and self._deslocamento is None:
+            return ""
+        limite = -1 if self._limite is None else self._limite
+        return f" limit {limite} offset {self._deslocamento or 0}"
+
+    def _projecao(
+        self,
+    ) -> tuple[list[tuple[str, str]], list[tuple[str, str, list[str]]]]:
+        simples, embutidos = [], []
+        for item in _separar(",".join(self.opcoes.get("colunas") or ("*",))):
+            m = _RE_EMBUTIDO.match(item)
+            if m:
+                alias, tabela, subcolunas = m.groups()
+                embutidos.append(
+                    (alias or tabela, tabela, _separar(subcolunas) or ["*"])
+                )
+            elif item == "*":
+                simples.extend((c, f'"{c}"') for c in self.banco.colunas(self.tabela))
+            else:
+                alias, _, nome = item.rpartition(":")
+                nome = nome.split("::")[0]
+                simples.append((alias or nome, self._coluna(nome)))
+        return simples, embutidos
+
+    def _embutir(self, linhas: list[dict], embutidos, ocultas: set) -> None:
+        for alias, tabela, subcolunas in embutidos:
+            fk = RELACOES.get(self.tabela, {}).get(tabela)
+            if fk is None:
+                raise _erro(
+                    "Could not find a relationship between "
+                    f"'{self.tabela}' and '{tabela}'",
+                    "PGRST200",
+                )
+            ids = sorted({linha[fk] for linha in linhas if linha.get(fk)})
+            mapa = {}
+            if ids:
+                cols = (
+                    self.banco.colunas(tabela)
+                    if subcolunas == ["*"]
+                    else [c.strip() for c in subcolunas]
+                )
+                lista = ", ".join(f'"{c}"' for c in cols)
+                sql = (
+                    f"select id, {lista} from {tabela} "
+                    f"where id in ({','.join('?' * len(ids))})"
+                )
+                mapa = {
+                    r.pop("id") if "id" not in cols else r["id"]: r
+                    for r in self.banco.executar(sql, ids)
+                }
+            for linha in linhas:
+                linha[alias] = mapa.get(linha.get(fk))
+        for linha in linhas:
+            for c in ocultas:
+                linha.pop(c, None)
+
+    def _select(self) -> SimpleNamespace:
+        simples, embutidos = self._projecao()
+        nomes = {n for n, _ in simples}
+        ocultas = set()
+        for _, tabela, _ in embutidos:
+            fk = RELACOES.get(self.tabela, {}).get(tabela)
+            if fk and fk not in nomes:
+                simples.append((fk, f'"{fk}"'))
+                ocultas.add(fk)
+        where, params = self._where()
+        projecao = (
+            ", ".join(f'{expr} as "{nome}"' for nome, expr in simples) or "null as _"
+        )
+        sql = (
+            f"select {projecao} from {self.tabela}{where}"
+            f"{self._order_by()}{self._limit_offset()}"
+        )
+        linhas = self.banco.executar(sql, params)
+        self._embutir(linhas, embutidos, ocultas)
+
+        contagem = None
+        if self.opcoes.get("count"):
+            contagem = self.banco.executar(
+                f"select count(*) as n from {self.tabela}{where}", params
+            )[0]["n"]
+        if self._csv:
+            return SimpleNamespace(
+                data=_para_csv(linhas, [n for n, _ in simples if n not in ocultas]),
+                count=contagem,
+            )
+        return SimpleNamespace(data=linhas, count=contagem)
+
+    def _preparar_linhas(self, json_) -> tuple[list[str], list[dict]]:
+        linhas = [
+            dict(linha) for linha in (json_ if isinstance(json_, list) else [json_])
+        ]
+        existentes = self.banco.colunas(self.tabela)
+        agora = agora_iso()
+        for linha in linhas:
+            for c in _GERADAS:
+                if c in existentes and not linha.get(c):
+                    linha[c] = str(uuid.uuid4()) if c == "id" else agora
+        colunas = list(dict.fromkeys(c for linha in linhas for c in linha))
+        for c in colunas:
+            if c not in existentes:
+                raise _erro(
+                    f"Could not find the '{c}' column of '{self.tabela}' "
+                    "in the schema cache",
+                    "PGRST204",
+                )
+        return colunas, linhas
+
+    def _inserir(self) -> SimpleNamespace:
+        colunas, linhas = self._preparar_linhas(self.opcoes["json"])
+        if not linhas:
+            return SimpleNamespace(data=[], count=None)
+        lista = ", ".join(f'"{c}"' for c in colunas)
+        valores = f"({', '.join('?' * len(colunas))})"
+        conflito = ""
+        if self.operacao == "upsert":
+            alvo = [
+                c.strip() for c in (self.opcoes.get("on_conflict") or "id").split(",")
+            ]
+            if self.opcoes.get("ignore_duplicates"):
+                conflito = f" on conflict ({', '.join(alvo)}) do nothing"
+            else:
+                atualizar = [
+                    c
+                    for c in colunas
+                    if c not in alvo and c not in ("id", "created_at")
+                ]
+                sets = (
+                    ", ".join(f'"{c}" = excluded."{c}"' for c in atualizar)
+                    or f'"{alvo[0]}" = excluded."{alvo[0]}"'
+                )
+                conflito = f" on conflict ({', '.join(alvo)}) do update set {sets}"
+        sql = (
+            f"insert into {self.tabela} ({lista}) values {valores}{conflito} "
+            "returning *"
+        )
+        resultado = []
+        with self.banco.lock:
+            self.banco.executar("begin")
+            try:
+                for linha in linhas:
+                    resultado.extend(
+                        self.banco.executar(
+                            sql, [_valor_sql(linha.get(c)) for c in colunas]
+                        )
+                    )
+                self.banco.executar("commit")
+            except Exception:
+                self.banco.executar("rollback")
+                raise
+        return SimpleNamespace(
+            data=resultado, count=len(resultado) if self.opcoes.get("count") else None
+        )
+
+    def _atualizar(self) -> SimpleNamespace:
+        dados = dict(self.opcoes["json"])
+        if "updated_at" in self.banco.colunas(self.tabela):
+            dados["updated_at"] = agora_iso()
+        sets = ", ".join(f"{self._coluna(c)} = ?" for c in dados)
+        where, params = self._where()
+        sql = f"update {self.tabela} set {sets}{where} returning *"
+        linhas = self.banco.executar(
+            sql, [_valor_sql(v) for v in dados.values()] + params
+        )
+        return SimpleNamespace(
+            data=linhas, count=len(linhas) if self.opcoes.get("count") else None
+        )
+
+    def _excluir(self) -> SimpleNamespace:
+        where, params = self._where()
+        linhas = self.banco.executar(
+            f"delete from {self.tabela}{where} returning *", params
+        )
+        return SimpleNamespace(
+            data=linhas, count=len(linhas) if self.opcoes.get("count") else None
+        )
+
+    def _executar(self):
+        if self.operacao == "select":
+            return self._select()
+        if self.operacao in ("insert", "upsert"):
+            return self._inserir()
+        if self.operacao == "update":
+            return self._atualizar()
+        return self._excluir()
+
+    def execute(self):
+        return _medir(self._executar())
+
+
+def _medir(res):
+    # tamanho que a resposta teria na rede (JSON compacto ou CSV), para o
+    # rastreamento; só calculado durante uma execução observada
+    if medindo_resposta():
+        dados = res.data
+        corpo = (
+            dados
+            if isinstance(dados, str)
+            else json.dumps(dados, default=str, separators=(",", ":"))
+        )
+        registrar_resposta(len(corpo.encode()))
+    return res
+
+
+def _para_csv(linhas: list[dict], colunas: list[str]) -> str:
+    # mesmo formato do Accept: text/csv do PostgREST (cabeçalho + valores;
+    # nulo = vazio)
+    saida = io.StringIO()
+    escritor = csv.writer(saida, lineterminator="\n")
+    escritor.writerow(colunas)
+    for linha in linhas:
+        escritor.writerow(
+            (
+                ""
+                if linha.get(c) is None
+                else (
+                    json.dumps(linha[c], ensure_ascii=False)
+                    if isinstance(linha[c], dict)
+                    else linha[c]
+                )
+            )
+            for c in colunas
+        )
+    return saida.getvalue()
+
+
+class TabelaLocal:
+    def __init__(self, banco: BancoLocal, tabela: str):
+        self.banco = banco
+        self.tabela = tabela
+
+    def select(self, *colunas, count=None, head=None):
+        return ConsultaLocal(
+            self.banco, self.tabela, "select", colunas=colunas, count=count
+        )
+
+    def insert(
+        self, json, *, count=None, returning=None, upsert=False, default_to_null=True
+    ):
+        return ConsultaLocal(
+            self.banco,
+            self.tabela,
+            "upsert" if upsert else "insert",
+            json=json,
+            count=count,
+        )
+
+    def upsert(
+        self,
+        json,
+        *,
+        count=None,
+        returning=None,
+        ignore_duplicates=False,
+        on_conflict="",
+        default_to_null=True,
+    ):
+        return ConsultaLocal(
+            self.banco,
+            self.tabela,
+            "upsert",
+            json=json,
+            count=count,
+            on_conflict=on_conflict,
+            ignore_duplicates=ignore_duplicates,
+        )
+
+    def update(self, json, *, count=None, returning=None):
+        return ConsultaLocal(self.banco, self.tabela, "update", json=json, count=count)
+
+    def delete(self, *, count=None, returning=None):
+        return ConsultaLocal(self.banco, self.tabela, "delete", count=count)
+
+
+# ---------- RPC: equivalentes em Python das funções de sql/ ----------
+def _rpc_metricas_dashboard(params: dict):
+    from src.metricas import metricas_em_processo
+
+    return metricas_em_processo()
+
+
+def _rpc_buscar_ocorrencias(params: dict):
+    from src.busca import buscar_ocorrencias_local
+
+    linhas, total = buscar_ocorrencias_local(
+        params.get("p_termo") or "",
+        params.get("p_status"),
+        int(params.get("p_limite") or 20),
+        int(params.get("p_offset") or 0),
+    )
+    return [{**linha, "rank": None, "total": total} for linha in linhas]
+
+
+def _rpc_buscar_moradores(params: dict):
+    from src.moradores import buscar_moradores_prefixo
+
+    return buscar_moradores_prefixo(
+        params.get("p_termo") or "", int(params.get("p_limite") or 20)
+    )
+
+
+def _rpc_filtrar_moradores(params: dict):
+    from src.moradores import filtrar_moradores_local
+
+    linhas, total = filtrar_moradores_local(
+        params.get("p_termo") or "",
+        int(params.get("p_offset") or 0),
+        int(params.get("p_limite") or 20),
+    )
+    return [{**linha, "total": total} for linha in linhas]
+
+
+def _rpc_fluxo_mensal(params: dict):
+    return banco_local().executar(
+        FLUXO_MENSAL_SQL, {"inicio": params.get("p_inicio"), "fim": params.get("p_fim")}
+    )
+
+
+def _rpc_reconstruir_transacoes_mensal(params: dict):
+    return banco_local().reconstruir_mensal()
+
+
+FUNCOES_RPC = {
+    "metricas_dashboard": _rpc_metricas_dashboard,
+    "fluxo_mensal": _rpc_fluxo_mensal,
+    "reconstruir_transacoes_mensal": _rpc_reconstruir_transacoes_mensal,
+    "buscar_ocorrencias": _rpc_buscar_ocorrencias,
+    "buscar_moradores": _rpc_buscar_moradores,
+    "filtrar_moradores": _rpc_filtrar_moradores,
+}
+
+# Funções que exigem app_metadata.vds_admin no token (sql/010)
+FUNCOES_ADMIN = {"reconstruir_transacoes_mensal"}
+
+
+def _token_admin(token: str | None) -> bool:
+    claims = validar_token(token, LOCAL_JWT_SEGREDO)
+    return bool(claims and (claims.get("app_metadata") or {}).get("vds_admin"))
+
+
+class RpcLocal:
+    def __init__(self, nome: str, params: dict, token: str | None = None):
+        self.nome = nome
+        self.params = params or {}
+        self.token = token
+        self._colunas: list[str] | None = None
+
+    def select(self, *colunas, count=None, head=None):
+        self._colunas = [c for c in _separar(",".join(colunas)) if c != "*"] or None
+        return self
+
+    def execute(self):
+        funcao = FUNCOES_RPC.get(self.nome)
+        if funcao is None:
+            raise _erro(
+                f"Could not find the function vila_da_serra.{self.nome}", "PGRST202"
+            )
+        if self.nome in FUNCOES_ADMIN and not _token_admin(self.token):
+            raise _erro(
+                "apenas administradores podem reconstruir a consolidação mensal",
+                "42501",
+            )
+        # sem o lock do banco: as funções fazem suas próprias consultas (até em
+        # paralelo)
+        dados = funcao(self.params)
+        if self._colunas and isinstance(dados, list):
+            dados = [{c: d.get(c) for c in self._colunas} for d in dados]
+        return _medir(SimpleNamespace(data=dados, count=None))
+
+
+class PostgrestLocal:
+    def __init__(self, banco: BancoLocal):
+        self.banco = banco
+        self.token: str | None = None
+
+    def auth(self, token):
+        self.token = token
+
+    def from_(self, tabela: str) -> TabelaLocal:
+        self.banco.colunas(tabela)  # erro cedo para tabela inexistente
+        return TabelaLocal(self.banco, tabela)
+
+    table = from_
+
+    def rpc(self, funcao: str, params: dict | None = None, **_):
+        return RpcLocal(funcao, params or {}, self.token)
+
+
+# ---------- autenticação local ----------
+_ITERACOES_SENHA = 100_000
+_VALIDADE_TOKEN = 3600
+_CHAVE_SESSAO = "vds-local-sessao"
+
+
+def _hash_senha(senha: str, sal: str) -> str:
+    return hashlib.pbkdf2_hmac(
+        "sha256", senha.encode(), sal.encode(), _ITERACOES_SENHA
+    ).hex()
+
+
+def _emissor() -> str:
+    return f"{(SUPABASE_URL or 'http://localhost').rstrip('/')}/auth/v1"
+
+
+class AuthLocal:
+    """
+    Login contra a tabela local `usuarios`, com access tokens HS256 no
+    formato do GoTrue (validáveis por src/tokens.py com LOCAL_JWT_SEGREDO).
+    A sessão fica no mesmo armazenamento por sessão do Streamlit do cliente real.
+    """
+
+    def __init__(self, banco: BancoLocal, armazenamento):
+        self.banco = banco
+        self.armazenamento = armazenamento
+
+    def _emitir(self, usuario: dict) -> SimpleNamespace:
+        agora = int(time.time())
+        claims = {
+            "sub": usuario["id"],
+            "aud": AUDIENCIA,
+            "role": "authenticated",
+            "iss": _emissor(),
+            "email": usuario["email"],
+            # como o app_metadata definido pelo painel do Supabase (sql/010)
+            "app_metadata": {"vds_admin": usuario["email"].lower() in ADMINS},
+            "iat": agora,
+            "exp": agora + _VALIDADE_TOKEN,
+        }
+        dados = {
+            "access_token": emitir_token(claims, LOCAL_JWT_SEGREDO),
+            "refresh_token": uuid.uuid4().hex,
+            "expires_at": claims["exp"],
+            "user": {"id": usuario["id"], "email": usuario["email"]},
+        }
+        self.armazenamento.set_item(_CHAVE_SESSAO, json.dumps(dados))
+        return self._sessao(dados)
+
+    @staticmethod
+    def _sessao(dados: dict) -> SimpleNamespace:
+        user = SimpleNamespace(**dados["user"], role="authenticated")
+        return SimpleNamespace(
+            access_token=dados["access_token"],
+            refresh_token=dados["refresh_token"],
+            expires_at=dados["expires_at"],
+            expires_in=max(0, dados["expires_at"] - int(time.time())),
+            token_type="bearer",
+            user=user,
+        )
+
+    def _salva(self) -> dict | None:
+        bruto = self.armazenamento.get_item(_CHAVE_SESSAO)
+        return json.loads(bruto) if bruto else None
+
+    def sign_in_with_password(self, credenciais: dict):
+        email = str(credenciais.get("email") or "").strip().lower()
+        linhas = self.banco.executar("select * from usuarios where email = ?", [email])
+        if (
+            not linhas
+            or _hash_senha(str(credenciais.get("password") or ""), linhas[0]["id"])
+            != linhas[0]["senha_hash"]
+        ):
+            raise _erro("Invalid login credentials", "invalid_credentials")
+        sessao = self._emitir(linhas[0])
+        return SimpleNamespace(session=sessao, user=sessao.user)
+
+    def get_session(self):
+        dados = self._salva()
+        if not dados:
+            return None
+        if (
+            dados["expires_at"] - time.time() < 10
+        ):  # como o GoTrue: renova perto de vencer
+            return self.refresh_session().session
+        return self._sessao(dados)
+
+    def refresh_session(self, refresh_token: str | None = None):
+        dados = self._salva()
+        if not dados:
+            raise _erro("Auth session missing!", "session_not_found")
+        sessao = self._emitir(dados["user"])
+        return SimpleNamespace(session=sessao, user=sessao.user)
+
+    def get_user(self, jwt: str | None = None):
+        dados = self._salva()
+        token = jwt or (dados or {}).get("access_token")
+        claims = validar_token(token, LOCAL_JWT_SEGREDO)
+        if claims is None:
+            return None
+        return SimpleNamespace(
+            user=SimpleNamespace(
+                id=claims["sub"], email=claims.get("email"), role="authenticated"
+            )
+        )
+
+    def sign_out(self, options=None):
+        self.armazenamento.remove_item(_CHAVE_SESSAO)
+
+
+class ClienteLocal:
+    """Substituto do supabase.Client no backend SQLite (um por sessão)."""
+
+    def __init__(self, armazenamento):
+        banco = banco_local()
+        self.auth = AuthLocal(banco, armazenamento)
+        self.postgrest = PostgrestLocal(banco)
+
+    def table(self, tabela: str):
+        return self.postgrest.from_(tabela)
+
+
+# ---------- dados de exemplo ----------
+_NOMES = (
+    "Ana",
+    "Bruno",
+    "Carla",
+    "Daniel",
+    "Eduarda",
+    "Felipe",
+    "Gabriela",
+    "Heitor",
+    "Isabela",
+    "João",
+    "Larissa",
+    "Marcos",
+    "Natália",
+    "Otávio",
+    "Patrícia",
+    "Rafael",
+    "Sofia",
+    "Tiago",
+    "Vitória",
+    "Wagner",
+)
+_SOBRENOMES = (
+    "Almeida",
+    "Barbosa",
+    "Cardoso",
+    "Costa",
+    "Ferreira",
+    "Gomes",
+    "Lima",
+    "Martins",
+    "Oliveira",
+    "Pereira",
+    "Ribeiro",
+    "Rocha",
+    "Santos",
+    "Silva",
+    "Souza",
+)
+_TITULOS = (
+    "Vazamento na garagem",
+    "Lâmpada queimada no hall",
+    "Barulho após as 22h",
+    "Portão emperrado",
+    "Interfone sem sinal",
+    "Infiltração no teto",
+    "Elevador parado",
+    "Lixo fora do horário",
+    "Vaga ocupada indevidamente",
+    "Manutenção da piscina",
+    "Cano estourado na área de serviço",
+    "Câmera da portaria desligada",
+)
+_FRASES = (
+    "Morador relatou o problema pela manhã.",
+    "A situação se repete há alguns dias.",
+    "Solicitada visita da manutenção com urgência.",
+    "O síndico já foi informado e aguarda orçamento.",
+    "Há risco para quem circula pelo local.",
+    "Foram tiradas fotos e anexadas ao livro de ocorrências.",
+    "A administradora pediu retorno até o fim da semana.",
+)
+_TRANSACOES = (
+    ("Taxa condominial", "entrada", 300, 900),
+    ("Aluguel do salão de festas", "entrada", 150, 400),
+    ("Multa por atraso", "entrada", 20, 120),
+    ("Conta de água", "saida", 800, 3000),
+    ("Energia das áreas comuns", "saida", 500, 2500),
+    ("Manutenção do elevador", "saida", 400, 1800),
+    ("Jardinagem", "saida", 200, 700),
+    ("Salário da portaria", "saida", 1800, 3500),
+)
+
+
+def semear(banco: BancoLocal, semente: int = 42) -> None:
+    """Popula o banco vazio com dados determinísticos (mesma semente, mesmos dados)."""
+    if not banco.vazio():
+        return
+    rnd = random.Random(semente)
+    hoje = date.today()
+    agora = datetime.now(timezone.utc)
+
+    def instante(dias_atras: float) -> str:
+        return (agora - timedelta(days=dias_atras)).isoformat(timespec="microseconds")
+
+    def uid() -> str:
+        return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+    usuario_id = uid()
+    moradores = []
+    for i in range(SQLITE_SEMENTE_MORADORES):
+        criado = instante(rnd.uniform(30, 720))
+        moradores.append(
+            (
+                uid(),
+                " ".join(
+                    (
+                        rnd.choice(_NOMES),
+                        rnd.choice(_SOBRENOMES),
+                        rnd.choice(_SOBRENOMES),
+                    )
+                ),
+                f"(31) 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}",
+                "ABCD"[i % 4],
+                f"{(i // 4) // 4 + 1}0{(i // 4) % 4 + 1}",
+                criado,
+                criado,
+            )
+        )
+    ocorrencias = []
+    for _ in range(SQLITE_SEMENTE_OCORRENCIAS):
+        dias = rnd.uniform(0, 365)
+        evento = hoje - timedelta(days=int(dias) - rnd.randint(0, 30))
+        descricao = " ".join(rnd.choice(_FRASES) for _ in range(rnd.randint(1, 8)))
+        ocorrencias.append(
+            (
+                uid(),
+                rnd.choice(_TITULOS),
+                descricao,
+                rnd.choices(STATUS_OCORRENCIA, weights=(3, 2, 5))[0],
+                rnd.choice(moradores)[0] if moradores and rnd.random() < 0.8 else None,
+                evento.isoformat() if rnd.random() < 0.9 else None,
+                instante(dias),
+            )
+        )
+    transacoes = []
+    for _ in range(SQLITE_SEMENTE_TRANSACOES):
+        descricao, tipo, minimo, maximo = rnd.choice(_TRANSACOES)
+        dias = rnd.uniform(0, 365)
+        transacoes.append(
+            (
+                uid(),
+                (hoje - timedelta(days=int(dias))).isoformat(),
+                descricao,
+                round(rnd.uniform(minimo, maximo), 2),
+                tipo if tipo in TIPOS_TRANSACAO else "entrada",
+                instante(dias),
+            )
+        )
+
+    with banco.lock:
+        c = banco.conexao
+        c.execute("begin")
+        c.execute(
+            "insert or ignore into usuarios (id, email, senha_hash) values (?, ?, ?)",
+            (
+                usuario_id,
+                LOCAL_EMAIL.strip().lower(),
+                _hash_senha(LOCAL_SENHA, usuario_id),
+            ),
+        )
+        c.executemany("insert into moradores values (?, ?, ?, ?, ?, ?, ?)", moradores)
+        c.executemany(
+            "insert into ocorrencias (id, titulo, descricao, status, morador_id, "
+            "data_evento, created_at) values (?, ?, ?, ?, ?, ?, ?)",
+            ocorrencias,
+        )
+        c.executemany(
+            "insert into transacoes (id, data, descricao, valor, tipo, created_at) "
+            "values (?, ?, ?, ?, ?, ?)",
+            transacoes,
+        )
+        c.execute("commit")
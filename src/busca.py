@@ -0,0 +1,318 @@
+# src/busca.py
+import math
+import re
+import threading
+import unicodedata
+
+from src.cache import cache_consultas
+from src.ocorrencias import anexar_moradores, resumo
+from src.paginacao import Pagina, ler_tudo
+from src.supabase_client import _chave_sessao, funcao_ausente, rpc, table
+
+# Colunas lidas para o índice local (o texto completo é indexado, mas a busca
+# devolve só o resumo, como a listagem)
+COLUNAS_INDICE = "id,titulo,descricao,status,morador_id,data_evento,created_at"
+
+# Pesos equivalentes a setweight 'A' (título) e 'B' (descrição) no Postgres
+PESO_TITULO = 1.0
+PESO_DESCRICAO = 0.4
+
+_STOPWORDS = {
+    "a",
+    "ao",
+    "aos",
+    "as",
+    "com",
+    "como",
+    "da",
+    "das",
+    "de",
+    "do",
+    "dos",
+    "e",
+    "ela",
+    "ele",
+    "em",
+    "entre",
+    "era",
+    "essa",
+    "esse",
+    "esta",
+    "este",
+    "eu",
+    "foi",
+    "ha",
+    "isso",
+    "ja",
+    "mais",
+    "mas",
+    "me",
+    "mesmo",
+    "na",
+    "nao",
+    "nas",
+    "no",
+    "nos",
+    "o",
+    "os",
+    "ou",
+    "para",
+    "pela",
+    "pelo",
+    "por",
+    "qual",
+    "que",
+    "se",
+    "sem",
+    "seu",
+    "sua",
+    "sao",
+    "ta",
+    "tem",
+    "um",
+    "uma",
+    "foram",
+    "ser",
+}
+
+# Sufixos removidos pelo radicalizador, do mais longo ao mais curto.
+# Aplicado igualmente a documentos e consultas, então basta ser consistente.
+_PLURAIS = (
+    ("oes", "ao"),
+    ("aes", "ao"),
+    ("ais", "al"),
+    ("eis", "el"),
+    ("ois", "ol"),
+    ("ns", "m"),
+)
+_SUFIXOS = (
+    "amentos",
+    "imentos",
+    "amento",
+    "imento",
+    "acoes",
+    "icoes",
+    "mente",
+    "idade",
+    "acao",
+    "icao",
+    "ancia",
+    "encia",
+    "avel",
+    "ivel",
+    "ismo",
+    "ista",
+    "eiro",
+    "eira",
+    "ando",
+    "endo",
+    "indo",
+    "aram",
+    "eram",
+    "iram",
+    "ados",
+    "idos",
+    "adas",
+    "idas",
+    "ado",
+    "ido",
+    "ada",
+    "ida",
+    "ava",
+    "iam",
+    "ar",
+    "er",
+    "ir",
+)
+_RE_PALAVRA = re.compile(r"\w+")
+
+
+def normalizar(texto: str | None) -> str:
+    # minúsculas e sem acentos ("Manutenção" -> "manutencao")
+    decomposto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def radical(palavra: str) -> str:
+    """
+    Radicalizador leve para português (plural, sufixos nominais/verbais,
+    vogal temática).
+    """
+    if len(palavra) <= 3:
+        return palavra
+    for suf, troca in _PLURAIS:
+        if palavra.endswith(suf):
+            palavra = palavra[: -len(suf)] + troca
+            break
+    else:
+        if palavra.endswith("es") and palavra[-3:-2] in ("r", "s", "z"):
+            palavra = palavra[:-2]
+        elif palavra.endswith("s") and len(palavra) > 4:
+            palavra = palavra[:-1]
+    for suf in _SUFIXOS:
+        if palavra.endswith(suf) and len(palavra) - len(suf) >= 3:
+            palavra = palavra[: -len(suf)]
+            break
+    if len(palavra) > 3 and palavra[-1] in "aeo":
+        palavra = palavra[:-1]
+    return palavra
+
+
+def termos(texto: str | None) -> list[str]:
+    return [
+        radical(p)
+        for p in _RE_PALAVRA.findall(normalizar(texto))
+        if p not in _STOPWORDS and len(p) > 1
+    ]
+
+
+class IndiceInvertido:
+    """
+    Índice invertido em memória, equivalente ao tsvector + GIN do Postgres:
+    termo radicalizado -> {id: peso acumulado}. Usado pelo backend local e
+    como alternativa quando a função buscar_ocorrencias não existe no banco.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, dict] = {}
+        self._docs: dict = {}  # id -> linha original
+        self._comprimentos: dict = {}
+        self._termos_doc: dict = {}  # id -> termos, para remover sem varrer o índice
+
+    def adicionar(self, linha: dict) -> None:
+        doc_id = linha["id"]
+        self.remover(doc_id)
+        self._docs[doc_id] = linha
+        n = 0
+        vistos = set()
+        for texto, peso in (
+            (linha.get("titulo"), PESO_TITULO),
+            (linha.get("descricao"), PESO_DESCRICAO),
+        ):
+            for t in termos(texto):
+                docs = self._postings.setdefault(t, {})
+                docs[doc_id] = docs.get(doc_id, 0.0) + peso
+                vistos.add(t)
+                n += 1
+        self._comprimentos[doc_id] = n
+        self._termos_doc[doc_id] = vistos
+
+    def remover(self, doc_id) -> None:
+        if self._docs.pop(doc_id, None) is None:
+            return
+        self._comprimentos.pop(doc_id, None)
+        for t in self._termos_doc.pop(doc_id, ()):
+            docs = self._postings.get(t, {})
+            docs.pop(doc_id, None)
+            if not docs:
+                self._postings.pop(t, None)
+
+    def buscar(self, consulta: str, filtro=None) -> list[tuple[dict, float]]:
+        """
+        Todos os termos da consulta precisam aparecer (E lógico, como
+        websearch_to_tsquery). Ordena por relevância, depois mais recentes.
+        """
+        ts = list(dict.fromkeys(termos(consulta)))
+        if not ts:
+            return []
+        listas = [self._postings.get(t, {}) for t in ts]
+        candidatos = set(min(listas, key=len))
+        for docs in listas:
+            candidatos &= docs.keys()
+
+        total_docs = max(len(self._docs), 1)
+        resultado = []
+        for doc_id in candidatos:
+            linha = self._docs[doc_id]
+            if filtro and not filtro(linha):
+                continue
+            score = sum(
+                docs[doc_id] * math.log(1 + total_docs / len(docs)) for docs in listas
+            ) / (1 + math.log(1 + self._comprimentos.get(doc_id, 0)))
+            resultado.append((linha, score))
+        # mais recentes primeiro como desempate; sort estável preserva isso
+        resultado.sort(
+            key=lambda par: (str(par[0].get("created_at") or ""), str(par[0]["id"])),
+            reverse=True,
+        )
+        resultado.sort(key=lambda par: -par[1])
+        return resultado
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+
+# ---------- índice local de ocorrências (fallback) ----------
+# Um índice por usuário do token, como o cache e o diretório: cada um só
+# indexa as ocorrências que o RLS deixa ele ler
+# sessão -> (índice, geração)
+_indices: dict[str, tuple[IndiceInvertido, object]] = {}
+_indice_lock = threading.Lock()
+
+
+def indice_ocorrencias() -> IndiceInvertido:
+    # Reconstrói o índice quando houve escrita em ocorrências (geração mudou)
+    # (a leitura do banco fica fora do lock: uma sessão lenta não trava as outras)
+    chave = _chave_sessao()
+    geracao = cache_consultas.geracoes(("ocorrencias",))
+    with _indice_lock:
+        atual = _indices.get(chave)
+    if atual is not None and atual[1] == geracao:
+        return atual[0]
+    indice = IndiceInvertido()
+    for linha in ler_tudo(lambda: table("ocorrencias").select(COLUNAS_INDICE)):
+        indice.adicionar(linha)
+    with _indice_lock:
+        _indices[chave] = (indice, geracao)
+    return indice
+
+
+def buscar_ocorrencias_local(
+    termo: str, status: str | None, limite: int, offset: int
+) -> tuple[list[dict], int]:
+    filtro = (lambda linha: linha.get("status") == status) if status else None
+    achados = indice_ocorrencias().buscar(termo, filtro)
+    linhas = [
+        {
+            **{k: v for k, v in linha.items() if k != "descricao"},
+            "descricao_resumo": resumo(linha.get("descricao")),
+        }
+        for linha, _ in achados[offset : offset + limite]
+    ]
+    return linhas, len(achados)
+
+
+def buscar_ocorrencias(
+    termo: str, status: str | None, offset: int, limite: int, cache: bool = True
+) -> tuple[Pagina, int]:
+    """
+    Busca textual ranqueada (título + descrição) com filtro de status.
+    Usa a função buscar_ocorrencias do banco (sql/002); só se ela não existir
+    no backend usa o índice invertido em memória (outros erros sobem).
+    Retorna (página, total); o cursor da próxima página é o offset seguinte.
+    Leituras de uma só vez (exportação) passam cache=False.
+    """
+    params = {
+        "p_termo": termo,
+        "p_status": status,
+        "p_limite": limite,
+        "p_offset": offset,
+    }
+    try:
+        res = rpc("buscar_ocorrencias", params, tabelas=("ocorrencias",)).execute(
+            cache=cache
+        )
+        dados = res.data or []
+        total = int(dados[0]["total"]) if dados else 0
+        linhas = [
+            {k: v for k, v in d.items() if k not in ("rank", "total")} for d in dados
+        ]
+    except Exception as e:
+        if not funcao_ausente(e):
+            raise
+        linhas, total = buscar_ocorrencias_local(termo, status, limite, offset)
+    # a função de busca não embute o solicitante: só os da página são buscados
+    anexar_moradores(linhas, cache=cache)
+
+    proximo = offset + limite if offset + limite < total else None
+    return Pagina(linhas=linhas, proximo_cursor=proximo), total
@@ -0,0 +1,91 @@
+# src/cache.py
+import threading
+import time
+from collections import OrderedDict
+
+from src.config import CACHE_MAX_ENTRADAS, CACHE_TTL
+
+
+def chave_linha(tabela: str, linha_id) -> str:
+    # geração de uma linha: leituras por id (eq id) dependem só dela...
+    return f"{tabela}#{linha_id}"
+
+
+def chave_linhas(tabela: str) -> str:
+    # ...e desta, incrementada por escritas sem id conhecido (inserts, em lote)
+    return f"{tabela}!"
+
+
+class CacheConsultas:
+    """
+    Cache LRU com validade (TTL) para resultados de leitura.
+    Cada entrada guarda a "geração" das tabelas envolvidas no momento da
+    leitura; uma escrita incrementa a geração da tabela e invalida, de uma
+    vez, as leituras anteriores de todas as sessões. Leituras por id dependem
+    da geração da linha (chave_linha), e não da tabela: alterar uma linha não
+    descarta as leituras por id das demais.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, max_entradas: int = CACHE_MAX_ENTRADAS):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.acertos = 0
+        self.faltas = 0
+        self._dados: OrderedDict = OrderedDict()
+        self._geracoes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def geracoes(self, tabelas) -> tuple:
+        # Retrato das gerações atuais; deve ser tirado ANTES de executar a leitura
+        with self._lock:
+            return tuple((t, self._geracoes.get(t, 0)) for t in tabelas)
+
+    def obter(self, chave):
+        """Retorna (True, valor) se houver entrada válida, senão (False, None)."""
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._dados.get(chave)
+            if entrada is not None:
+                expira_em, geracoes, valor = entrada
+                if expira_em > agora and all(
+                    self._geracoes.get(t, 0) == g for t, g in geracoes
+                ):
+                    self._dados.move_to_end(chave)
+                    self.acertos += 1
+                    return True, valor
+                del self._dados[chave]
+            self.faltas += 1
+            return False, None
+
+    def guardar(self, chave, geracoes: tuple, valor) -> None:
+        with self._lock:
+            # Escrita concorrente durante a leitura: o resultado já nasceu velho
+            if any(self._geracoes.get(t, 0) != g for t, g in geracoes):
+                return
+            self._dados[chave] = (time.monotonic() + self.ttl, geracoes, valor)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+
+    def invalidar(self, tabela: str, linha_id=None) -> None:
+        """
+        Escrita em `tabela`: invalida sempre as listagens; das leituras por id,
+        só a da linha `linha_id` ou, sem id (insert/escrita em lote), todas.
+        """
+        chave = (
+            chave_linhas(tabela) if linha_id is None else chave_linha(tabela, linha_id)
+        )
+        with self._lock:
+            for g in (tabela, chave):
+                self._geracoes[g] = self._geracoes.get(g, 0) + 1
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self) -> int:
+        return len(self._dados)
+
+
+# Instância única por processo, particionada por sessão na chave
+cache_consultas = CacheConsultas()
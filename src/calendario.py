@@ -0,0 +1,99 @@
+# src/calendario.py
+from datetime import date, datetime, timedelta
+
+from src.carregamento import pre_carregar
+from src.formatacao import MORADOR_EMBUTIDO
+from src.supabase_client import table
+
+# Visões do FullCalendar usadas na Agenda (nome interno -> rótulo)
+VISOES = {
+    "multiMonthYear": "Ano",
+    "dayGridMonth": "Mês",
+    "timeGridWeek": "Semana",
+    "timeGridDay": "Dia",
+}
+
+PRIMEIRO_DIA_SEMANA = 0  # domingo, como no locale pt-br do FullCalendar
+
+# só o resumo da descrição; o texto completo vem ao clicar no evento
+COLUNAS_EVENTO = (
+    f"id,titulo,descricao_resumo,status,morador_id,data_evento,{MORADOR_EMBUTIDO}"
+)
+
+
+def _inicio_semana(d: date) -> date:
+    # date.weekday(): segunda=0 ... domingo=6
+    return d - timedelta(days=(d.weekday() - (PRIMEIRO_DIA_SEMANA - 1)) % 7)
+
+
+def _somar_meses(d: date, meses: int) -> date:
+    total = d.year * 12 + (d.month - 1) + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def intervalo_visivel(visao: str, ref: date) -> tuple[date, date]:
+    """
+    Intervalo [início, fim) exibido pelo FullCalendar para a visão e a data
+    de referência. A visão mensal mostra 6 semanas completas (fixedWeekCount).
+    """
+    if visao == "timeGridDay":
+        return ref, ref + timedelta(days=1)
+    if visao == "timeGridWeek":
+        inicio = _inicio_semana(ref)
+        return inicio, inicio + timedelta(days=7)
+    if visao == "multiMonthYear":
+        return date(ref.year, 1, 1), date(ref.year + 1, 1, 1)
+    inicio = _inicio_semana(ref.replace(day=1))
+    return inicio, inicio + timedelta(days=42)
+
+
+def deslocar(visao: str, ref: date, passos: int) -> date:
+    # equivalente aos botões anterior/próximo do FullCalendar
+    if visao == "timeGridDay":
+        return ref + timedelta(days=passos)
+    if visao == "timeGridWeek":
+        return ref + timedelta(weeks=passos)
+    if visao == "multiMonthYear":
+        return date(ref.year + passos, 1, 1)
+    return _somar_meses(ref, passos)
+
+
+def visao_exibida(view: dict | None) -> tuple[str, date] | None:
+    """
+    (visão, data de referência) a partir do `view` que o streamlit-calendar
+    devolve nos callbacks (type, currentStart, currentEnd em ISO/UTC). A
+    referência é o meio do período atual, imune ao fuso do navegador.
+    """
+    try:
+        inicio = datetime.fromisoformat(view["currentStart"].replace("Z", "+00:00"))
+        fim = datetime.fromisoformat(view["currentEnd"].replace("Z", "+00:00"))
+        visao = view["type"]
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+    if visao not in VISOES:
+        return None
+    return visao, (inicio + (fim - inicio) / 2).date()
+
+
+def carregar_ocorrencias_periodo(inicio: date, fim: date) -> list[dict]:
+    # filtro de data no servidor: o volume depende só do período visível
+    res = (
+        table("ocorrencias")
+        .select(COLUNAS_EVENTO)
+        .gte("data_evento", inicio.isoformat())
+        .lt("data_evento", fim.isoformat())
+        .order("data_evento")
+        .execute()
+    )
+    return res.data or []
+
+
+def pre_carregar_vizinhos(visao: str, ref: date) -> None:
+    # aquece o cache com os períodos anterior e seguinte (navegação instantânea)
+    consultas = {}
+    for passos in (-1, 1):
+        inicio, fim = intervalo_visivel(visao, deslocar(visao, ref, passos))
+        consultas[f"agenda_{passos}"] = (
+            lambda i=inicio, f=fim: carregar_ocorrencias_periodo(i, f)
+        )
+    pre_carregar(consultas)
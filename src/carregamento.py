@@ -0,0 +1,95 @@
+# src/carregamento.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from src.config import CARGA_MAX_THREADS, CARGA_TIMEOUT
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except Exception:  # fora do Streamlit (scripts, benchmarks)
+    add_script_run_ctx = get_script_run_ctx = None
+
+# Pool compartilhado pelo processo: as consultas são I/O (HTTP), então threads bastam
+_executor = ThreadPoolExecutor(
+    max_workers=CARGA_MAX_THREADS, thread_name_prefix="vds-carga"
+)
+
+
+@dataclass
+class ResultadoCarga:
+    """Resultados de carregar_em_paralelo(), com erro e duração por consulta."""
+
+    valores: dict[str, Any] = field(default_factory=dict)
+    erros: dict[str, BaseException] = field(default_factory=dict)
+    duracoes: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.erros
+
+    def __getitem__(self, nome: str):
+        # Acesso direto: relança o erro da consulta, se houver
+        if nome in self.erros:
+            raise self.erros[nome]
+        return self.valores[nome]
+
+
+def _no_contexto(fn: Callable, ctx, nome: str, duracoes: dict):
+    def executar():
+        thread = threading.current_thread()
+        if ctx is not None:
+            # permite usar st.session_state e afins dentro da consulta
+            add_script_run_ctx(thread, ctx)
+        inicio = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            duracoes[nome] = time.perf_counter() - inicio
+            if ctx is not None:
+                add_script_run_ctx(thread, None)
+
+    return executar
+
+
+def carregar_em_paralelo(
+    consultas: dict[str, Callable[[], Any]], timeout: float | None = None
+) -> ResultadoCarga:
+    """
+    Executa consultas independentes ao mesmo tempo e devolve todos os resultados.
+    A latência total passa a ser a da consulta mais lenta, não a soma delas.
+    Erros (inclusive estouro do `timeout`, em segundos) são reportados por
+    consulta em `ResultadoCarga.erros`, sem interromper as demais.
+    """
+    timeout = CARGA_TIMEOUT if timeout is None else timeout
+    ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+    resultado = ResultadoCarga()
+    futuros = {
+        nome: _executor.submit(_no_contexto(fn, ctx, nome, resultado.duracoes))
+        for nome, fn in consultas.items()
+    }
+    wait(futuros.values(), timeout=timeout)
+
+    for nome, futuro in futuros.items():
+        if not futuro.done():
+            futuro.cancel()
+            resultado.erros[nome] = TimeoutError(
+                f"Consulta '{nome}' excedeu {timeout:g}s."
+            )
+        elif futuro.exception() is not None:
+            resultado.erros[nome] = futuro.exception()
+        else:
+            resultado.valores[nome] = futuro.result()
+    return resultado
+
+
+def pre_carregar(consultas: dict[str, Callable[[], Any]]) -> None:
+    """
+    Dispara consultas em segundo plano sem esperar o resultado. Útil para
+    aquecer o cache (ex.: períodos vizinhos da agenda); erros são ignorados.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+    for nome, fn in consultas.items():
+        _executor.submit(_no_contexto(fn, ctx, nome, {}))
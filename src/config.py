@@ -0,0 +1,132 @@
+# src/config.py
+import os
+
+from dotenv import load_dotenv
+
+# Carrega variáveis do .env
+load_dotenv()
+
+
+def env_int(nome: str, padrao: int) -> int:
+    try:
+        return int(os.getenv(nome, padrao))
+    except (TypeError, ValueError):
+        return padrao
+
+
+def env_float(nome: str, padrao: float) -> float:
+    try:
+        return float(os.getenv(nome, padrao))
+    except (TypeError, ValueError):
+        return padrao
+
+
+def env_bool(nome: str, padrao: bool) -> bool:
+    valor = os.getenv(nome)
+    if valor is None or not valor.strip():
+        return padrao
+    return valor.strip().lower() not in ("0", "false", "nao", "não", "off")
+
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+SCHEMA = "vila_da_serra"
+
+# Backend de dados: "supabase" (padrão) ou "sqlite" (em processo, sem rede:
+# desenvolvimento local, testes de carga e benchmarks determinísticos)
+BACKEND = os.getenv("VDS_BACKEND", "supabase").strip().lower()
+SQLITE_CAMINHO = os.getenv("VDS_SQLITE_CAMINHO", ":memory:")
+# Dados de exemplo gerados quando o banco SQLite está vazio (0 desliga)
+SQLITE_SEMENTE_MORADORES = env_int("VDS_SQLITE_SEMENTE_MORADORES", 200)
+SQLITE_SEMENTE_OCORRENCIAS = env_int("VDS_SQLITE_SEMENTE_OCORRENCIAS", 1000)
+SQLITE_SEMENTE_TRANSACOES = env_int("VDS_SQLITE_SEMENTE_TRANSACOES", 1000)
+# Login do backend local (tokens HS256 assinados com LOCAL_JWT_SEGREDO)
+LOCAL_EMAIL = os.getenv("VDS_LOCAL_EMAIL", "admin@vila.local")
+LOCAL_SENHA = os.getenv("VDS_LOCAL_SENHA", "admin")
+LOCAL_JWT_SEGREDO = os.getenv("VDS_LOCAL_JWT_SEGREDO", "vila-da-serra-local")
+
+# Cache de leituras (src/cache.py): validade em segundos e nº máximo de entradas
+CACHE_TTL = env_float("VDS_CACHE_TTL", 30.0)
+CACHE_MAX_ENTRADAS = env_int("VDS_CACHE_MAX_ENTRADAS", 256)
+
+# Carregamento concorrente (src/carregamento.py): tempo máximo e nº de threads
+CARGA_TIMEOUT = env_float("VDS_CARGA_TIMEOUT", 15.0)
+CARGA_MAX_THREADS = env_int("VDS_CARGA_MAX_THREADS", 8)
+
+# Autenticação (src/auth.py, src/tokens.py)
+# Assinatura conferida localmente: HS256 com o segredo JWT do projeto
+# (Settings → API); ES256/RS256 com as chaves públicas do JWKS do GoTrue
+# (requer pyjwt[crypto], extra "jwks"). Sem segredo (HS256) ou sem acesso ao
+# JWKS, o token NÃO é verificado localmente: só validade e claims são
+# conferidas aqui, e quem confirma o usuário é o GoTrue (get_user).
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET") or (
+    LOCAL_JWT_SEGREDO if BACKEND == "sqlite" else None
+)
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL") or (
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+    if SUPABASE_URL and BACKEND == "supabase"
+    else None
+)
+AUTH_JWKS_CACHE_SEGUNDOS = env_float("VDS_AUTH_JWKS_CACHE_SEGUNDOS", 600.0)
+# Intervalo máximo (s) entre consultas ao GoTrue para reconfirmar o usuário
+AUTH_RECHECK_SEGUNDOS = env_float("VDS_AUTH_RECHECK_SEGUNDOS", 300.0)
+# Antecedência (s) em relação ao vencimento do token para descartar o usuário
+# em cache
+AUTH_MARGEM_EXPIRACAO = env_float("VDS_AUTH_MARGEM_EXPIRACAO", 60.0)
+
+# Pool de clientes Supabase por sessão (src/supabase_client.py)
+POOL_MAX_CONEXOES = env_int("VDS_POOL_MAX_CONEXOES", 10)  # conexões HTTP por cliente
+POOL_MAX_KEEPALIVE = env_int("VDS_POOL_MAX_KEEPALIVE", 5)  # conexões mantidas abertas
+POOL_KEEPALIVE_SEGUNDOS = env_float("VDS_POOL_KEEPALIVE_SEGUNDOS", 60.0)
+POOL_TIMEOUT_HTTP = env_float("VDS_POOL_TIMEOUT_HTTP", 20.0)
+POOL_OCIOSO_SEGUNDOS = env_float(
+    "VDS_POOL_OCIOSO_SEGUNDOS", 1800.0
+)  # descarta clientes parados
+POOL_MAX_CLIENTES = env_int("VDS_POOL_MAX_CLIENTES", 500)
+
+# Listagens paginadas (src/paginacao.py): tamanho padrão da página
+PAGINA_TAMANHO = env_int("VDS_PAGINA_TAMANHO", 20)
+
+# Seletor de morador (src/ui.py): máximo de resultados e mínimo de caracteres
+# para buscar
+BUSCA_MORADOR_LIMITE = env_int("VDS_BUSCA_MORADOR_LIMITE", 20)
+BUSCA_MORADOR_MIN_CHARS = env_int("VDS_BUSCA_MORADOR_MIN_CHARS", 2)
+
+# Importação de moradores por planilha (src/importacao.py) e de extratos
+# (src/extrato.py): linhas validadas por bloco lido do arquivo e linhas por
+# requisição de gravação
+IMPORTACAO_BLOCO = env_int("VDS_IMPORTACAO_BLOCO", 1000)
+IMPORTACAO_LOTE = env_int("VDS_IMPORTACAO_LOTE", 500)
+
+# Exportação de listagens (src/exportacao.py): linhas por página lida do banco
+# e tamanho máximo do arquivo gerado (o download o carrega inteiro na memória)
+EXPORTACAO_LOTE = env_int("VDS_EXPORTACAO_LOTE", 1000)
+EXPORTACAO_MAX_MB = env_int("VDS_EXPORTACAO_MAX_MB", 200)
+
+# Diretório de moradores em memória (src/diretorio.py): intervalo mínimo (s)
+# entre sincronizações incrementais com o banco
+DIRETORIO_SYNC_SEGUNDOS = env_float("VDS_DIRETORIO_SYNC_SEGUNDOS", 15.0)
+# um diretório por papel do token (padrão) ou por usuário, se o RLS de
+# moradores depender do usuário
+DIRETORIO_POR_USUARIO = env_bool("VDS_DIRETORIO_POR_USUARIO", False)
+
+# Mudanças em tempo real (src/tempo_real.py): um ouvinte por processo invalida
+# o cache quando o banco muda. Com ele conectado, as leituras em cache valem
+# por CACHE_TTL_TEMPO_REAL (a expiração vira só uma rede de segurança).
+# A chave da conexão precisa enxergar as linhas (RLS do Realtime); por padrão
+# o ouvinte só liga quando uma chave própria é configurada.
+TEMPO_REAL_CHAVE = os.getenv("VDS_TEMPO_REAL_CHAVE") or SUPABASE_KEY
+TEMPO_REAL_ATIVO = env_bool("VDS_TEMPO_REAL", bool(os.getenv("VDS_TEMPO_REAL_CHAVE")))
+CACHE_TTL_TEMPO_REAL = env_float("VDS_CACHE_TTL_TEMPO_REAL", 600.0)
+
+# Rastreamento (src/rastreamento.py): painel de desempenho do rerun para os
+# administradores (e-mails separados por vírgula), log JSON por consulta e
+# endpoint Prometheus /metrics (porta 0 desliga)
+ADMINS = {
+    e.strip().lower() for e in os.getenv("VDS_ADMINS", "").split(",") if e.strip()
+}
+if BACKEND == "sqlite":
+    ADMINS.add(LOCAL_EMAIL.strip().lower())
+RASTREAMENTO_LOG = env_bool("VDS_RASTREAMENTO_LOG", False)
+METRICAS_PORTA = env_int("VDS_METRICAS_PORTA", 0)
+METRICAS_HOST = os.getenv("VDS_METRICAS_HOST", "127.0.0.1")
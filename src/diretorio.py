@@ -0,0 +1,288 @@
+# src/diretorio.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.cache import cache_consultas
+from src.config import DIRETORIO_POR_USUARIO, DIRETORIO_SYNC_SEGUNDOS
+from src.formatacao import rotulo_morador
+from src.paginacao import ler_tudo
+from src.supabase_client import _chave_sessao, table, token_atual
+from src.tokens import payload_sem_verificar
+
+COLUNAS_DIRETORIO = "id,nome,telefone,predio,apto,created_at,updated_at"
+
+# Sobreposição ao buscar deltas: transações que gravaram updated_at antes da
+# marca mas só confirmaram depois ainda entram (reaplicar é idempotente)
+FOLGA_SINCRONIZACAO = timedelta(seconds=5)
+
+
+def _instante(valor) -> datetime | None:
+    # ISO 8601 do PostgREST, com 0 a 6 casas nos segundos (fromisoformat só
+    # aceita 3 ou 6 antes do Python 3.11)
+    if valor is None:
+        return None
+    try:
+        instante = pd.to_datetime(str(valor), utc=True, format="ISO8601")
+    except (TypeError, ValueError):
+        return None
+    return None if pd.isna(instante) else instante.to_pydatetime()
+
+
+def _unidade(linha: dict) -> tuple[str, str]:
+    return (
+        str(linha.get("predio") or "").strip(),
+        str(linha.get("apto") or "").strip(),
+    )
+
+
+def _id_valido(morador_id) -> bool:
+    # linhas vindas de DataFrame trazem NaN (verdadeiro em bool) para "sem morador"
+    return isinstance(morador_id, str) and bool(morador_id)
+
+
+class DiretorioMoradores:
+    """
+    Cópia em memória da tabela moradores, indexada por id e por (prédio, apto).
+    Sincroniza de forma incremental: busca só as linhas com `updated_at` desde
+    a última marca e os ids em `moradores_excluidos` (sql/005). Sem essas
+    colunas no banco, recarrega a tabela inteira a cada sincronização.
+    As leituras do banco acontecem fora do lock dos índices: quem só consulta
+    o diretório nunca espera uma sincronização (exceto a primeira).
+    """
+
+    def __init__(self, intervalo: float = DIRETORIO_SYNC_SEGUNDOS):
+        self.intervalo = intervalo
+        self.acertos = 0
+        self.faltas = 0
+        self.sincronizacoes = 0
+        self._por_id: dict = {}
+        self._por_unidade: dict[tuple[str, str], set] = {}
+        self._marca: datetime | None = None  # maior updated_at visto
+        self._marca_exclusao: datetime | None = None  # maior excluido_em visto
+        # time.monotonic() da última sincronização
+        self._ultima_sync: float | None = None
+        self._geracao = None  # geração de "moradores" no cache na última sincronização
+        self._incremental = True
+        self._lock = threading.RLock()  # índices e marcas
+        self._lock_sync = threading.Lock()  # uma sincronização por vez
+
+    # ---------- índices ----------
+    def aplicar(self, linha: dict) -> None:
+        # inclui/atualiza uma linha (também usado por quem recebe mudanças de fora)
+        with self._lock:
+            self.remover(linha["id"])
+            self._por_id[linha["id"]] = linha
+            self._por_unidade.setdefault(_unidade(linha), set()).add(linha["id"])
+            instante = _instante(linha.get("updated_at"))
+            if instante and (self._marca is None or instante > self._marca):
+                self._marca = instante
+
+    def remover(self, morador_id) -> None:
+        with self._lock:
+            antiga = self._por_id.pop(morador_id, None)
+            if antiga is None:
+                return
+            ids = self._por_unidade.get(_unidade(antiga))
+            if ids is not None:
+                ids.discard(morador_id)
+                if not ids:
+                    del self._por_unidade[_unidade(antiga)]
+
+    # ---------- sincronização ----------
+    def _desde(self, marca: datetime | None) -> str | None:
+        return (marca - FOLGA_SINCRONIZACAO).isoformat() if marca else None
+
+    def _sincronizar_incremental(self) -> None:
+        with self._lock:
+            desde = self._desde(self._marca)
+            desde_exclusao = self._desde(self._marca_exclusao or self._marca)
+
+        def montar():
+            q = table("moradores").select(COLUNAS_DIRETORIO)
+            return q.gte("updated_at", desde) if desde else q
+
+        alteradas = ler_tudo(montar, cache=False)
+        excluidos = []
+        if self._ultima_sync is not None:
+            q = table("moradores_excluidos").select("id,excluido_em")
+            if desde_exclusao:
+                q = q.gte("excluido_em", desde_exclusao)
+            excluidos = q.execute(cache=False).data or []
+
+        with self._lock:
+            for linha in alteradas:
+                self.aplicar(linha)
+            for lapide in excluidos:
+                # só remove se não houve nova gravação do mesmo id depois da exclusão
+                atual = self._por_id.get(lapide["id"])
+                excluido_em = _instante(lapide.get("excluido_em"))
+                if (
+                    atual is None
+                    or _instante(atual.get("updated_at")) is None
+                    or (
+                        excluido_em
+                        and excluido_em >= _instante(atual.get("updated_at"))
+                    )
+                ):
+                    self.remover(lapide["id"])
+                if excluido_em and (
+                    self._marca_exclusao is None or excluido_em > self._marca_exclusao
+                ):
+                    self._marca_exclusao = excluido_em
+
+    def _sincronizar_completo(self) -> None:
+        linhas = ler_tudo(
+            lambda: table("moradores").select(
+                "id,nome,telefone,predio,apto,created_at"
+            ),
+            cache=False,
+        )
+        with self._lock:
+            self._por_id.clear()
+            self._por_unidade.clear()
+            for linha in linhas:
+                self.aplicar(linha)
+
+    def _em_dia(self, geracao) -> bool:
+        return (
+            self._ultima_sync is not None
+            and geracao == self._geracao
+            and time.monotonic() - self._ultima_sync < self.intervalo
+        )
+
+    def sincronizar(self, forcar: bool = False) -> None:
+        """
+        Busca as mudanças desde a última marca, se já passou o intervalo ou
+        se houve escrita em moradores neste processo (geração do cache mudou).
+        Com outra sincronização em andamento, segue com o que já está em
+        memória (só a primeira carga faz esperar).
+        """
+        geracao = cache_consultas.geracoes(("moradores",))
+        if not forcar and self._em_dia(geracao):
+            return
+        if not self._lock_sync.acquire(blocking=self._ultima_sync is None):
+            return
+        try:
+            if not forcar and self._em_dia(geracao):
+                return  # outra thread sincronizou enquanto esta esperava
+            if self._incremental:
+                try:
+                    self._sincronizar_incremental()
+                except Exception:
+                    # banco sem sql/005 (updated_at / moradores_excluidos):
+                    # daqui em diante, recarga completa
+                    self._incremental = False
+            if not self._incremental:
+                self._sincronizar_completo()
+            with self._lock:
+                self._ultima_sync = time.monotonic()
+                self._geracao = geracao
+                self.sincronizacoes += 1
+        finally:
+            self._lock_sync.release()
+
+    # ---------- leitura ----------
+    def obter(self, morador_id) -> dict | None:
+        # falta -> busca só esse id no banco e guarda no diretório
+        if not _id_valido(morador_id):
+            return None
+        with self._lock:
+            linha = self._por_id.get(morador_id)
+            if linha is not None:
+                self.acertos += 1
+                return linha
+            self.faltas += 1
+        self.garantir([morador_id])
+        return self._por_id.get(morador_id)
+
+    def garantir(self, ids) -> None:
+        # busca de uma vez os ids que ainda não estão no diretório
+        faltando = sorted({i for i in ids if _id_valido(i) and i not in self._por_id})
+        if not faltando:
+            return
+        res = table("moradores").select(
+            COLUNAS_DIRETORIO
+            if self._incremental
+            else "id,nome,telefone,predio,apto,created_at"
+        )
+        for linha in res.in_("id", faltando).execute(cache=False).data or []:
+            self.aplicar(linha)
+
+    def rotulo(self, morador_id, vazio: str = "—") -> str:
+        return rotulo_morador(self.obter(morador_id), vazio)
+
+    def por_unidade(self, predio: str, apto: str) -> list[dict]:
+        with self._lock:
+            ids = self._por_unidade.get((str(predio).strip(), str(apto).strip()), ())
+            linhas = [self._por_id[i] for i in ids]
+            if linhas:
+                self.acertos += 1
+            else:
+                self.faltas += 1
+        return sorted(linhas, key=lambda m: str(m.get("nome") or ""))
+
+    def todos(self) -> list[dict]:
+        with self._lock:
+            return sorted(self._por_id.values(), key=lambda m: str(m.get("nome") or ""))
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            consultas = self.acertos + self.faltas
+            return {
+                "registros": len(self._por_id),
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "taxa_acerto": self.acertos / consultas if consultas else None,
+                "sincronizacoes": self.sincronizacoes,
+                "incremental": self._incremental,
+                "marca": self._marca.isoformat() if self._marca else None,
+                # segundos desde a última sincronização (None = nunca sincronizou)
+                "atraso_s": (
+                    time.monotonic() - self._ultima_sync
+                    if self._ultima_sync is not None
+                    else None
+                ),
+            }
+
+    def __len__(self) -> int:
+        return len(self._por_id)
+
+
+# Um diretório por escopo de RLS, compartilhado pelas sessões: as políticas de
+# moradores liberam a leitura para o papel `authenticated` inteiro, então o
+# que muda o que se enxerga é o papel do token, não o usuário. Com políticas
+# por usuário, VDS_DIRETORIO_POR_USUARIO=1 volta a um diretório por usuário.
+_diretorios: dict[str, DiretorioMoradores] = {}
+_diretorios_lock = threading.Lock()
+
+
+def _escopo() -> str:
+    if DIRETORIO_POR_USUARIO:
+        return _chave_sessao()
+    token = token_atual()
+    return str(payload_sem_verificar(token).get("role") or "anon") if token else "anon"
+
+
+def diretorio(sincronizar: bool = True) -> DiretorioMoradores:
+    chave = _escopo()
+    with _diretorios_lock:
+        dir_ = _diretorios.get(chave)
+        if dir_ is None:
+            dir_ = _diretorios[chave] = DiretorioMoradores()
+    if sincronizar:
+        dir_.sincronizar()
+    return dir_
+
+
+def aplicar_mudanca(tipo: str, registro: dict, antigo: dict) -> None:
+    # mudança recebida do banco (src/tempo_real.py), aplicada a todos os diretórios
+    with _diretorios_lock:
+        diretorios = list(_diretorios.values())
+    for dir_ in diretorios:
+        if tipo == "DELETE":
+            dir_.remover(antigo.get("id"))
+        elif registro.get("id"):
+            dir_.aplicar(registro)
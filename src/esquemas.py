@@ -0,0 +1,95 @@
+# src/esquemas.py
+import io
+
+import pandas as pd
+
+from src.formatacao import centavos
+
+# Valores válidos das colunas categóricas
+STATUS_OCORRENCIA = ["aberta", "em_andamento", "finalizada"]
+TIPOS_TRANSACAO = ["entrada", "saida"]
+
+# Tipos declarados por tabela para montar DataFrames já tipados.
+#   "texto"     -> string do pandas
+#   "data"      -> datetime64 (só a data, meia-noite)
+#   "timestamp" -> datetime64 em UTC
+#   "numero"    -> float64
+#   "centavos"  -> dinheiro em reais no banco, Int64 em centavos no DataFrame
+#                  (lido do texto, sem passar por float; Int64 fica como está)
+#   [valores]   -> categórica com essas categorias
+ESQUEMAS: dict[str, dict] = {
+    "moradores": {
+        "id": "texto",
+        "nome": "texto",
+        "telefone": "texto",
+        "predio": "texto",
+        "apto": "texto",
+        "created_at": "timestamp",
+        "updated_at": "timestamp",
+    },
+    "ocorrencias": {
+        "id": "texto",
+        "titulo": "texto",
+        "descricao": "texto",
+        "status": STATUS_OCORRENCIA,
+        "morador_id": "texto",
+        "data_evento": "data",
+        "created_at": "timestamp",
+    },
+    "transacoes": {
+        "id": "texto",
+        "data": "data",
+        "descricao": "texto",
+        "valor": "centavos",
+        "tipo": TIPOS_TRANSACAO,
+        "created_at": "timestamp",
+    },
+}
+
+
+def tipar(df: pd.DataFrame, tabela: str) -> pd.DataFrame:
+    """Converte as colunas presentes em `df` para os tipos declarados da tabela."""
+    esquema = ESQUEMAS.get(tabela, {})
+    for coluna, tipo in esquema.items():
+        if coluna not in df.columns:
+            continue
+        serie = df[coluna]
+        if isinstance(tipo, list):
+            df[coluna] = pd.Categorical(serie, categories=tipo)
+        elif tipo == "texto":
+            df[coluna] = serie.astype("string")
+        elif tipo == "numero":
+            df[coluna] = pd.to_numeric(serie, errors="coerce").astype("float64")
+        elif tipo == "centavos" and serie.dtype != "Int64":
+            # Int64 = já em centavos (quadro tipado de novo)
+            df[coluna] = centavos(serie)
+        elif tipo == "data":
+            df[coluna] = pd.to_datetime(
+                serie, errors="coerce", format="ISO8601"
+            ).dt.normalize()
+        elif tipo == "timestamp":
+            df[coluna] = pd.to_datetime(
+                serie, errors="coerce", format="ISO8601", utc=True
+            )
+    return df
+
+
+def ler_csv(texto: str, tabela: str) -> pd.DataFrame:
+    """
+    Lê a resposta CSV do PostgREST direto para um DataFrame tipado.
+    Texto, categorias e dinheiro são lidos como texto puro (sem inferência);
+    datas e números são convertidos coluna a coluna, de forma vetorizada.
+    """
+    if not texto or not texto.strip():
+        return pd.DataFrame(columns=list(ESQUEMAS.get(tabela, {})))
+    esquema = ESQUEMAS.get(tabela, {})
+    dtypes = {c: "string" for c, t in esquema.items() if t != "numero"}
+    df = pd.read_csv(
+        io.StringIO(texto), dtype=dtypes, keep_default_na=False, na_values=[""]
+    )
+    return tipar(df, tabela)
+
+
+def registros(df: pd.DataFrame) -> list[dict]:
+    # linhas como dicts com None no lugar de NA/NaT (para formulários e payloads)
+    return df.astype(object).where(df.notna(), None).to_dict("records")
@@ -0,0 +1,265 @@
+# src/exportacao.py
+"""
+Exportação de listagens (transações, ocorrências) em CSV, XLSX ou Parquet.
+
+As linhas vêm do banco em páginas de EXPORTACAO_LOTE, sem passar pelo cache
+de consultas, e cada página é escrita no arquivo assim que chega: em memória
+fica uma página por vez, qualquer que seja o tamanho do resultado. O arquivo
+é temporário, em disco; o conteúdo só é lido quando o download é pedido
+(Exportacao.ler). XLSX usa o modo write_only do openpyxl e Parquet grava um
+row group por página (pyarrow).
+
+O st.download_button não aceita um fluxo: `data` precisa ser bytes, e o
+Streamlit guarda o arquivo inteiro em memória até o download terminar. Por
+isso o arquivo gerado tem um teto, EXPORTACAO_MAX_MB; acima dele a
+exportação para com ErroExportacao pedindo filtros mais restritos.
+"""
+
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Iterator
+
+import pandas as pd
+
+from src.config import EXPORTACAO_LOTE, EXPORTACAO_MAX_MB
+from src.esquemas import ESQUEMAS, tipar
+from src.paginacao import ORDEM_PADRAO, Pagina, buscar_pagina
+
+try:
+    import openpyxl
+except ImportError:  # XLSX é opcional, como na importação
+    openpyxl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet é opcional
+    pa = pq = None
+
+
+@dataclass(frozen=True)
+class Formato:
+    rotulo: str
+    mime: str
+
+
+FORMATOS = {
+    "csv": Formato("CSV", "text/csv"),
+    "xlsx": Formato(
+        "Excel (XLSX)",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "parquet": Formato("Parquet", "application/vnd.apache.parquet"),
+}
+
+
+class ErroExportacao(Exception):
+    """Formato indisponível ou falha ao montar o arquivo."""
+
+
+def formatos_disponiveis() -> list[str]:
+    # CSV sempre; os outros só com a dependência instalada
+    return [
+        f
+        for f in FORMATOS
+        if f == "csv"
+        or (f == "xlsx" and openpyxl is not None)
+        or (f == "parquet" and pq is not None)
+    ]
+
+
+@dataclass
+class Exportacao:
+    arquivo: object  # tempfile.TemporaryFile, apagado ao fechar
+    nome: str
+    mime: str
+    linhas: int
+    baixada: bool = False
+
+    def ler(self) -> bytes:
+        # data adiado do st.download_button: roda só no clique, fora do rerun.
+        # Lê o arquivo inteiro (o Streamlit só aceita bytes, não um fluxo); o
+        # tamanho já foi limitado por exportar()
+        self.arquivo.seek(0)
+        dados = self.arquivo.read()
+        self.baixada = True
+        return dados
+
+    def fechar(self) -> None:
+        self.arquivo.close()
+
+
+# ---------- páginas ----------
+def paginas_keyset(
+    montar: Callable[[], object], ordem=ORDEM_PADRAO, lote: int = EXPORTACAO_LOTE
+) -> Iterator[list[dict]]:
+    """Linhas de `montar()` (select + filtros) em páginas por keyset, na `ordem`."""
+    cursor = None
+    while True:
+        pagina = buscar_pagina(montar, cursor, lote, ordem, cache=False)
+        if pagina.linhas:
+            yield pagina.linhas
+        if not pagina.tem_proxima:
+            return
+        cursor = pagina.proximo_cursor
+
+
+def paginas_offset(
+    buscar: Callable[[int, int], Pagina], lote: int = EXPORTACAO_LOTE
+) -> Iterator[list[dict]]:
+    # para fontes ranqueadas (busca textual), cujo cursor é o offset seguinte
+    offset = 0
+    while offset is not None:
+        pagina = buscar(offset, lote)
+        if pagina.linhas:
+            yield pagina.linhas
+        offset = pagina.proximo_cursor
+
+
+# ---------- escritores ----------
+class _EscritorCsv:
+    def __init__(self, arquivo, colunas: dict[str, str], tabela: str):
+        self.arquivo = arquivo
+        self.rotulos = list(colunas.values())
+        self.arquivo.write("\ufeff".encode())  # BOM: o Excel reconhece o UTF-8
+
+    def escrever(self, df: pd.DataFrame, primeira: bool) -> None:
+        texto = df.to_csv(index=False, header=self.rotulos if primeira else False)
+        self.arquivo.write(texto.encode())
+
+    def fechar(self) -> None:
+        pass
+
+
+class _EscritorXlsx:
+    def __init__(self, arquivo, colunas: dict[str, str], tabela: str):
+        if openpyxl is None:
+            raise ErroExportacao(
+                "Para exportar XLSX, instale o pacote openpyxl (ou exporte em CSV)."
+            )
+        self.arquivo = arquivo
+        self.livro = openpyxl.Workbook(write_only=True)
+        self.planilha = self.livro.create_sheet(tabela[:31])
+        self.planilha.append(list(colunas.values()))
+
+    def escrever(self, df: pd.DataFrame, primeira: bool) -> None:
+        # o Excel não aceita fuso: timestamps vão em UTC sem fuso
+        for coluna in df.select_dtypes("datetimetz").columns:
+            df[coluna] = df[coluna].dt.tz_localize(None)
+        df = df.astype(object).where(df.notna(), None)
+        for valores in df.itertuples(index=False, name=None):
+            self.planilha.append(
+                [
+                    v.to_pydatetime() if isinstance(v, pd.Timestamp) else v
+                    for v in valores
+                ]
+            )
+
+    def fechar(self) -> None:
+        self.livro.save(self.arquivo)
+
+
+class _EscritorParquet:
+    def __init__(self, arquivo, colunas: dict[str, str], tabela: str):
+        if pq is None:
+            raise ErroExportacao(
+                "Para exportar Parquet, instale o pacote pyarrow (ou exporte em CSV)."
+            )
+        esquema = ESQUEMAS.get(tabela, {})
+        # tipos de src/esquemas.py; texto, categorias e colunas derivadas viram string
+        tipos = {
+            "data": pa.date32(),
+            "numero": pa.float64(),
+            "centavos": pa.float64(),  # em reais (_em_reais)
+            "timestamp": pa.timestamp("us", tz="UTC"),
+        }
+        self.esquema = pa.schema(
+            [(c, tipos.get(str(esquema.get(c)), pa.string())) for c in colunas]
+        )
+        self.escritor = pq.ParquetWriter(arquivo, self.esquema)
+
+    def escrever(self, df: pd.DataFrame, primeira: bool) -> None:
+        for coluna in df.select_dtypes("category").columns:
+            df[coluna] = df[coluna].astype("string")
+        tabela = pa.Table.from_pandas(df, preserve_index=False, safe=False)
+        self.escritor.write_table(tabela.cast(self.esquema))
+
+    def fechar(self) -> None:
+        self.escritor.close()
+
+
+ESCRITORES = {"csv": _EscritorCsv, "xlsx": _EscritorXlsx, "parquet": _EscritorParquet}
+
+
+def _conferir_tamanho(arquivo, max_bytes: int) -> None:
+    arquivo.seek(0, 2)
+    if arquivo.tell() > max_bytes:
+        raise ErroExportacao(
+            f"O arquivo passou de {max_bytes // (1024 * 1024)} MB. "
+            "Restrinja os filtros (período, status) e exporte em partes."
+        )
+
+
+def _em_reais(df: pd.DataFrame, tabela: str) -> pd.DataFrame:
+    # dinheiro (centavos no DataFrame, src/esquemas.py) sai em reais
+    for coluna, tipo in ESQUEMAS.get(tabela, {}).items():
+        if tipo == "centavos" and coluna in df.columns:
+            df[coluna] = df[coluna] / 100
+    return df
+
+
+def exportar(
+    paginas: Iterator[list[dict]],
+    colunas: dict[str, str],
+    tabela: str,
+    formato: str,
+    nome_base: str,
+    preparar: Callable[[list[dict]], list[dict]] | None = None,
+    progresso=None,
+    total: int | None = None,
+    max_bytes: int = EXPORTACAO_MAX_MB * 1024 * 1024,
+) -> Exportacao:
+    """
+    Escreve as `paginas` no `formato` pedido, uma página por vez.
+    `colunas` (chave -> cabeçalho) define a ordem; os tipos vêm de
+    ESQUEMAS[`tabela`] (Parquet usa as chaves como nomes de coluna, CSV e
+    XLSX os cabeçalhos). `preparar(linhas)` completa cada página (ex.:
+    rótulo do solicitante) e `progresso(escritas, total)` é chamado a cada
+    página. Lança ErroExportacao se o formato não estiver disponível ou se o
+    arquivo passar de `max_bytes`.
+    """
+    if formato not in FORMATOS:
+        raise ErroExportacao(f"Formato desconhecido: {formato}.")
+    arquivo = tempfile.TemporaryFile(suffix=f".{formato}")
+    try:
+        escritor = ESCRITORES[formato](arquivo, colunas, tabela)
+        escritas = 0
+        for linhas in paginas:
+            if preparar:
+                linhas = preparar(linhas)
+            df = _em_reais(
+                tipar(pd.DataFrame(linhas).reindex(columns=list(colunas)), tabela),
+                tabela,
+            )
+            escritor.escrever(df, primeira=escritas == 0)
+            escritas += len(df)
+            _conferir_tamanho(arquivo, max_bytes)
+            if progresso:
+                progresso(escritas, total)
+        if not escritas:
+            escritor.escrever(
+                _em_reais(tipar(pd.DataFrame(columns=list(colunas)), tabela), tabela),
+                primeira=True,
+            )
+        escritor.fechar()
+        _conferir_tamanho(arquivo, max_bytes)  # XLSX só é gravado no fechamento
+    except Exception:
+        arquivo.close()
+        raise
+    return Exportacao(
+        arquivo=arquivo,
+        nome=f"{nome_base}_{date.today():%Y%m%d}.{formato}",
+        mime=FORMATOS[formato].mime,
+        linhas=escritas,
+    )
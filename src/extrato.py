@@ -0,0 +1,416 @@
+# src/extrato.py
+"""
+Importação de extratos bancários (OFX ou CSV) para o Fluxo de Caixa.
+
+O arquivo é lido como fluxo: o OFX tag a tag (SGML 1.x ou XML 2.x), o CSV em
+blocos do pandas. Créditos viram "entrada" e débitos "saida" (valor sempre
+positivo). Cada lançamento recebe um hash_importacao: no OFX, do FITID (id
+do lançamento dado pelo banco, com a conta); sem FITID, de data, valor em
+centavos, descrição normalizada e ordem entre lançamentos idênticos do
+arquivo. A cada IMPORTACAO_LOTE lançamentos, os hashes já gravados no
+período do lote são consultados e só os novos são inseridos (sql/009).
+Reimportar o mesmo extrato não duplica nada, nem um OFX importado antes do
+FITID entrar no hash (o hash pelo conteúdo também é conferido).
+"""
+
+import codecs
+import hashlib
+import re
+from pathlib import Path
+
+import pandas as pd
+
+from src.busca import normalizar
+from src.config import IMPORTACAO_BLOCO, IMPORTACAO_LOTE
+from src.esquemas import registros
+from src.formatacao import centavos
+from src.importacao import (
+    ErroImportacao,
+    ErroLinha,
+    ResultadoImportacao,
+    detectar_codificacao,
+    ler_blocos,
+)
+from src.paginacao import ler_tudo
+from src.supabase_client import table
+
+EXTENSOES = ("ofx", "csv")
+
+# cabeçalhos do CSV (minúsculos, sem acento e sem "R$") -> coluna
+SINONIMOS = {
+    "data": "data",
+    "data lancamento": "data",
+    "data do lancamento": "data",
+    "data movimento": "data",
+    "date": "data",
+    "descricao": "descricao",
+    "historico": "descricao",
+    "lancamento": "descricao",
+    "detalhes": "descricao",
+    "memo": "descricao",
+    "valor": "valor",
+    "montante": "valor",
+    "amount": "valor",
+    "credito": "credito",
+    "entrada": "credito",
+    "debito": "debito",
+    "saida": "debito",
+}
+
+# TRNTYPE de saída quando o banco manda o valor sem sinal
+TIPOS_DEBITO_OFX = {
+    "DEBIT",
+    "PAYMENT",
+    "FEE",
+    "SRVCHG",
+    "ATM",
+    "POS",
+    "CHECK",
+    "DIRECTDEBIT",
+    "CASH",
+}
+
+_RE_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+# ---------- valores ----------
+def valores_em_centavos(serie: pd.Series) -> pd.Series:
+    """
+    Texto de valor -> centavos com sinal (Int64). Aceita "1.234,56",
+    "1.234", "1234.56", "-50,00", "(50,00)", "R$ 50,00" e sufixo D/C
+    ("50,00 D"). Ponto seguido de exatamente 3 dígitos (ou mais de um ponto)
+    é separador de milhar.
+    """
+    texto = serie.astype("string").str.strip().str.upper()
+    negativo = (
+        texto.str.startswith("-") | texto.str.startswith("(") | texto.str.endswith("D")
+    )
+    numero = texto.str.replace(r"[^\d,.]", "", regex=True)
+    decimal_virgula = numero.str.contains(r",\d{1,2}$", regex=True)
+    milhar_ponto = numero.str.fullmatch(r"\d{1,3}(\.\d{3})+") | (
+        numero.str.count(r"\.") > 1
+    )
+    sem_pontos = numero.str.replace(".", "", regex=False)
+    # ponto decimal (vírgula de milhar) -> milhar com ponto -> vírgula decimal
+    numero = numero.str.replace(",", "", regex=False)
+    numero = numero.mask(
+        milhar_ponto.fillna(False), sem_pontos.str.replace(",", "", regex=False)
+    )
+    numero = numero.mask(
+        decimal_virgula.fillna(False), sem_pontos.str.replace(",", ".", regex=False)
+    )
+    valor = centavos(numero.mask(numero == ""))
+    return valor.where(~negativo.fillna(False), -valor)
+
+
+def datas(serie: pd.Series) -> pd.Series:
+    # "dd/mm/aaaa", "dd/mm/aa", ISO ou OFX ("20250131120000[-3:BRT]")
+    texto = serie.astype("string").str.strip()
+    resultado = pd.to_datetime(texto, format="%d/%m/%Y", errors="coerce")
+    for formato in ("%d/%m/%y", "ISO8601"):
+        resultado = resultado.fillna(
+            pd.to_datetime(texto, format=formato, errors="coerce")
+        )
+    ofx = pd.to_datetime(texto.str[:8], format="%Y%m%d", errors="coerce")
+    return resultado.fillna(ofx).dt.normalize()
+
+
+# ---------- leitura ----------
+def _extensao(nome: str) -> str:
+    extensao = Path(nome or "").suffix.lower().lstrip(".")
+    if extensao not in EXTENSOES:
+        raise ErroImportacao("Envie um extrato .ofx ou .csv.")
+    return extensao
+
+
+def _tags_ofx(arquivo, pedaco: int = 64 * 1024):
+    # (linha, fechamento?, TAG, valor) na ordem do arquivo, lendo aos pedaços
+    amostra = arquivo.read(pedaco)
+    arquivo.seek(0)
+    decodificador = codecs.getincrementaldecoder(detectar_codificacao(amostra))(
+        errors="replace"
+    )
+    resto, linha = "", 1
+    while True:
+        bruto = arquivo.read(pedaco)
+        texto = resto + decodificador.decode(bruto, final=not bruto)
+        # a última tag pode continuar no próximo pedaço
+        corte = max(texto.rfind("<"), 0) if bruto else len(texto)
+        atual, resto = texto[:corte], texto[corte:]
+        pos = 0
+        for m in _RE_TAG.finditer(atual):
+            linha += atual.count("\n", pos, m.start())
+            pos = m.start()
+            yield linha, m.group(1) == "/", m.group(2).upper(), m.group(3).strip()
+        linha += atual.count("\n", pos)
+        if not bruto:
+            return
+
+
+def _quadro_ofx(lancamentos: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(
+        lancamentos,
+        columns=[
+            "linha",
+            "ACCTID",
+            "FITID",
+            "TRNTYPE",
+            "DTPOSTED",
+            "TRNAMT",
+            "NAME",
+            "MEMO",
+        ],
+    )
+    fitid = df["FITID"].astype("string")
+    valor = valores_em_centavos(df["TRNAMT"])
+    debito = df["TRNTYPE"].astype("string").str.upper().isin(TIPOS_DEBITO_OFX)
+    return pd.DataFrame(
+        {
+            "linha": df["linha"],
+            "data": datas(df["DTPOSTED"]),
+            "descricao": df["MEMO"].fillna(df["NAME"]).astype("string").fillna(""),
+            "centavos": valor.where(~(debito & (valor > 0)), -valor),
+            # o FITID só é único dentro da conta
+            "fitid": (df["ACCTID"].astype("string").fillna("") + "|" + fitid).where(
+                fitid.notna()
+            ),
+        }
+    )
+
+
+def _blocos_ofx(arquivo, tamanho: int):
+    atual, bloco, conta = None, [], None
+    for linha, fechamento, tag, valor in _tags_ofx(arquivo):
+        if tag == "ACCTID" and not fechamento and atual is None:
+            conta = valor
+        elif tag == "STMTTRN":
+            if fechamento and atual is not None:
+                bloco.append(atual)
+                atual = None
+                if len(bloco) == tamanho:
+                    yield _quadro_ofx(bloco)
+                    bloco = []
+            elif not fechamento:
+                atual = {"linha": linha, "ACCTID": conta}
+        elif atual is not None and not fechamento and valor:
+            atual.setdefault(tag, valor)
+    if bloco:
+        yield _quadro_ofx(bloco)
+
+
+def _padronizar_csv(df: pd.DataFrame, primeira_linha: int) -> pd.DataFrame:
+    def cabecalho(c: str) -> str | None:
+        texto = re.sub(r"\(?r\$\)?|[^a-z0-9 ]", " ", normalizar(c))
+        return SINONIMOS.get(" ".join(texto.split()))
+
+    df = df.rename(columns={c: cabecalho(c) for c in df.columns if cabecalho(c)})
+    df = df.loc[:, ~df.columns.duplicated()]
+    if (
+        "data" not in df
+        or "descricao" not in df
+        or not ("valor" in df or "credito" in df or "debito" in df)
+    ):
+        raise ErroImportacao(
+            "O CSV precisa das colunas Data, Descrição (ou Histórico) e Valor "
+            "(ou Crédito/Débito)."
+        )
+    if "valor" in df:
+        valor = valores_em_centavos(df["valor"])
+    else:
+        credito = valores_em_centavos(
+            df.get("credito", pd.Series("", index=df.index))
+        ).abs()
+        debito = valores_em_centavos(
+            df.get("debito", pd.Series("", index=df.index))
+        ).abs()
+        valor = credito.fillna(0) - debito.fillna(0)
+        valor = valor.mask(credito.isna() & debito.isna())
+    return pd.DataFrame(
+        {
+            "linha": range(primeira_linha, primeira_linha + len(df)),
+            "data": datas(df["data"]).to_numpy(),
+            "descricao": df["descricao"].astype("string").fillna("").to_numpy(),
+            "centavos": valor.to_numpy(),
+        }
+    )
+
+
+def ler_lancamentos(arquivo, nome: str, tamanho: int = IMPORTACAO_BLOCO):
+    """Blocos de lançamentos (linha, data, descricao, centavos com sinal)."""
+    if _extensao(nome) == "ofx":
+        try:
+            yield from _blocos_ofx(arquivo, tamanho)
+        except Exception as e:
+            raise ErroImportacao(f"Não foi possível ler o OFX: {e}") from e
+        return
+    proxima = 2  # a linha 1 é o cabeçalho
+    for bloco in ler_blocos(arquivo, nome, tamanho):
+        preenchida = bloco.apply(lambda c: c.str.strip() != "").any(axis=1)
+        yield _padronizar_csv(bloco, proxima)[preenchida.to_numpy()]
+        proxima += len(bloco)
+
+
+def estimar_lancamentos(arquivo, nome: str) -> int | None:
+    # para a barra de progresso
+    if not hasattr(arquivo, "getvalue"):
+        return None
+    if _extensao(nome) == "ofx":
+        return arquivo.getvalue().upper().count(b"<STMTTRN>") or None
+    total = arquivo.getvalue().count(b"\n")
+    return max(total - 1, 1) if total else None
+
+
+# ---------- validação e hash ----------
+def _sha256(texto: str) -> str:
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def preparar(
+    df: pd.DataFrame, ocorrencias: dict
+) -> tuple[pd.DataFrame, list[ErroLinha]]:
+    """
+    Valida os lançamentos e calcula tipo, valor, hash_importacao (do `fitid`,
+    quando houver) e hash_conteudo (sempre do conteúdo, o hash de antes do
+    FITID). `ocorrencias` (conteúdo -> vezes já visto no arquivo) é
+    atualizado, para lançamentos idênticos em blocos diferentes receberem
+    hashes diferentes.
+    """
+    df = df.set_index("linha")
+    df["descricao"] = df["descricao"].str.split().str.join(" ")
+    motivo = pd.Series("", index=df.index, dtype="string")
+    motivo = motivo.mask(df["data"].isna(), "Data inválida.")
+    motivo = motivo.mask((motivo == "") & df["centavos"].isna(), "Valor inválido.")
+    motivo = motivo.mask((motivo == "") & (df["centavos"] == 0), "Valor zerado.")
+    motivo = motivo.mask(
+        (motivo == "") & (df["descricao"] == ""), "Informe a descrição."
+    )
+    motivo = motivo.mask(
+        (motivo == "") & (df["descricao"].str.len() > 200),
+        "Descrição com mais de 200 caracteres.",
+    )
+    erros = [ErroLinha(int(n), str(m)) for n, m in motivo[motivo != ""].items()]
+
+    df = df[motivo == ""].copy()
+    data_iso = df["data"].dt.strftime("%Y-%m-%d")
+    conteudo = (
+        data_iso
+        + "|"
+        + df["centavos"].astype("string")
+        + "|"
+        + df["descricao"].map(normalizar).str.split().str.join(" ")
+    )
+    ordem = conteudo.groupby(conteudo).cumcount() + conteudo.map(ocorrencias).fillna(
+        0
+    ).astype(int)
+    for chave, vezes in conteudo.value_counts().items():
+        ocorrencias[chave] = ocorrencias.get(chave, 0) + int(vezes)
+    hash_conteudo = (conteudo + "|" + ordem.astype("string")).map(_sha256)
+    fitid = (
+        df["fitid"]
+        if "fitid" in df
+        else pd.Series(pd.NA, index=df.index, dtype="string")
+    )
+
+    return (
+        pd.DataFrame(
+            {
+                "data": data_iso,
+                "descricao": df["descricao"],
+                "valor": df["centavos"].abs() / 100,
+                "tipo": df["centavos"].gt(0).map({True: "entrada", False: "saida"}),
+                "hash_importacao": ("fitid|" + fitid)
+                .map(_sha256, na_action="ignore")
+                .fillna(hash_conteudo),
+                "hash_conteudo": hash_conteudo,
+            },
+            index=df.index,
+        ),
+        erros,
+    )
+
+
+# ---------- gravação ----------
+def hashes_existentes(inicio: str, fim: str) -> set[str]:
+    """Hashes de importação já gravados entre as datas (inclusive)."""
+    linhas = ler_tudo(
+        lambda: table("transacoes")
+        .select("hash_importacao")
+        .gte("data", inicio)
+        .lte("data", fim)
+        .not_.is_("hash_importacao", "null"),
+        cache=False,
+    )
+    return {linha["hash_importacao"] for linha in linhas}
+
+
+def _gravar_lote(lote: pd.DataFrame, resultado: ResultadoImportacao) -> None:
+    existentes = hashes_existentes(lote["data"].min(), lote["data"].max())
+    # mesmo FITID duas vezes no arquivo é o mesmo lançamento
+    repetido = (
+        lote["hash_importacao"].isin(existentes)
+        | lote["hash_conteudo"].isin(existentes)
+        | lote["hash_importacao"].duplicated()
+    )
+    resultado.repetidas += int(repetido.sum())
+    resultado.erros += [
+        ErroLinha(int(n), "Já importado.", True) for n in lote.index[repetido]
+    ]
+    novos = lote[~repetido]
+    if novos.empty:
+        return
+    try:
+        res = (
+            table("transacoes")
+            .upsert(
+                registros(novos.drop(columns="hash_conteudo")),
+                on_conflict="hash_importacao",
+                ignore_duplicates=True,
+            )
+            .execute()
+        )
+    except Exception as e:
+        resultado.erros += [
+            ErroLinha(int(n), f"Falha ao gravar o lote: {e}") for n in novos.index
+        ]
+        return
+    gravadas = len(res.data or [])
+    resultado.importadas += gravadas
+    # importadas por outra sessão entre a consulta dos hashes e a gravação
+    resultado.repetidas += len(novos) - gravadas
+
+
+def importar_extrato(
+    arquivo,
+    nome: str,
+    progresso=None,
+    bloco: int = IMPORTACAO_BLOCO,
+    lote: int = IMPORTACAO_LOTE,
+) -> ResultadoImportacao:
+    """
+    Importa os lançamentos do extrato `arquivo` (OFX ou CSV, pelo `nome`).
+    `progresso(lidos, total_estimado)` é chamado a cada bloco lido.
+    Lança ErroImportacao se o arquivo inteiro não puder ser lido.
+    """
+    resultado = ResultadoImportacao()
+    total = estimar_lancamentos(arquivo, nome)
+    ocorrencias: dict = {}
+    pendentes, n_pendentes = [], 0
+
+    for cru in ler_lancamentos(arquivo, nome, bloco):
+        validos, erros = preparar(cru, ocorrencias)
+        resultado.lidas += len(cru)
+        resultado.erros += erros
+        pendentes.append(validos)
+        n_pendentes += len(validos)
+        while n_pendentes >= lote:
+            fila = pd.concat(pendentes)
+            _gravar_lote(fila.iloc[:lote], resultado)
+            pendentes, n_pendentes = [fila.iloc[lote:]], len(fila) - lote
+        if progresso:
+            progresso(resultado.lidas, total)
+    if n_pendentes:
+        _gravar_lote(pd.concat(pendentes), resultado)
+    if progresso:
+        progresso(resultado.lidas, resultado.lidas)
+    resultado.erros.sort(key=lambda e: e.linha)
+    return resultado
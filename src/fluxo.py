@@ -0,0 +1,94 @@
+# src/fluxo.py
+from datetime import date, timedelta
+
+import pandas as pd
+
+from src.cache import cache_consultas
+from src.formatacao import centavos
+from src.paginacao import ler_tudo
+from src.supabase_client import funcao_ausente, rpc, table
+
+# Tabelas de que a consolidação mensal depende (ver sql/010_transacoes_mensal.sql):
+# escrever em transacoes invalida as leituras em cache
+TABELAS_FLUXO = ("transacoes",)
+
+
+def carregar_fluxo_mensal(
+    inicio: date | None = None, fim: date | None = None
+) -> list[dict]:
+    """
+    Totais por mês (entradas, saidas, quantidade, saldo_mes, saldo_acumulado)
+    lidos só da consolidação mensal (RPC fluxo_mensal): o custo depende do
+    número de meses, não de transações. O saldo acumulado conta desde o
+    primeiro mês, mesmo com `inicio`. Só quando a função não existe no banco
+    (sql/010 não aplicado) calcula o mesmo em processo; outros erros sobem.
+    """
+    params = {
+        "p_inicio": inicio.isoformat() if inicio else None,
+        "p_fim": fim.isoformat() if fim else None,
+    }
+    try:
+        return rpc("fluxo_mensal", params, tabelas=TABELAS_FLUXO).execute().data or []
+    except Exception as e:
+        if not funcao_ausente(e):
+            raise
+        return fluxo_mensal_em_processo(inicio, fim)
+
+
+def fluxo_mensal_em_processo(
+    inicio: date | None = None, fim: date | None = None
+) -> list[dict]:
+    # Mesmo resultado da RPC, a partir das linhas (banco sem sql/010)
+    linhas = ler_tudo(lambda: table("transacoes").select("id,data,tipo,valor"))
+    df = pd.DataFrame(linhas, columns=["id", "data", "tipo", "valor"])
+    if df.empty:
+        return []
+    df["mes"] = df["data"].astype(str).str[:7] + "-01"
+    df["centavos"] = centavos(df["valor"]).fillna(0).astype("int64")
+    mensal = (
+        df.pivot_table(
+            index="mes", columns="tipo", values="centavos", aggfunc="sum", fill_value=0
+        )
+        .reindex(columns=["entrada", "saida"], fill_value=0)
+        .join(df.groupby("mes").size().rename("quantidade"))
+        .sort_index()
+    )
+    saldo = mensal["entrada"] - mensal["saida"]
+    resultado = pd.DataFrame(
+        {
+            "mes": mensal.index,
+            "entradas": mensal["entrada"] / 100,
+            "saidas": mensal["saida"] / 100,
+            "quantidade": mensal["quantidade"],
+            "saldo_mes": saldo / 100,
+            "saldo_acumulado": saldo.cumsum() / 100,
+        }
+    )
+    if inicio:
+        resultado = resultado[resultado["mes"] >= inicio.isoformat()[:7] + "-01"]
+    if fim:
+        resultado = resultado[resultado["mes"] <= fim.isoformat()]
+    return resultado.to_dict("records")
+
+
+def saldo_antes_de(inicio: date | None):
+    """
+    Saldo acumulado até o fim do mês anterior ao de `inicio`, da mesma
+    consolidação mensal (0 sem `inicio` ou sem meses antes dele): a semente do
+    acumulado numa janela em que nenhum mês tem transação.
+    """
+    if inicio is None:
+        return 0
+    anteriores = carregar_fluxo_mensal(None, inicio.replace(day=1) - timedelta(days=1))
+    return anteriores[-1]["saldo_acumulado"] if anteriores else 0
+
+
+def reconstruir_fluxo_mensal() -> int:
+    """
+    Recalcula a consolidação mensal a partir das transações; retorna o número
+    de meses.
+    """
+    res = rpc("reconstruir_transacoes_mensal").execute(cache=False)
+    cache_consultas.invalidar("transacoes")
+    dados = res.data
+    return int(dados[0] if isinstance(dados, list) else dados or 0)
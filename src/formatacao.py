@@ -0,0 +1,93 @@
+# src/formatacao.py
+# Rótulos e formatos compartilhados pelas páginas
+#   - funções escalares para um valor (formulários, avisos)
+#   - funções vetorizadas para colunas inteiras (src/quadros.py)
+from datetime import date, datetime
+
+import pandas as pd
+
+# Embutido do PostgREST: traz só os moradores referenciados pelas linhas
+# buscadas, na chave "morador" (None quando não há vínculo)
+MORADOR_EMBUTIDO = "morador:moradores(nome,predio,apto)"
+
+
+def rotulo_morador(m: dict | None, vazio: str = "—") -> str:
+    # "Nome — Prédio X, Apto Y"
+    if not m:
+        return vazio
+    return f"{m.get('nome','')} — Prédio {m.get('predio','')}, Apto {m.get('apto','')}"
+
+
+def fmt_data_ddmmaaaa(v) -> str:
+    # date/datetime/Timestamp ou texto ISO ("YYYY-MM-DD[T...]") -> "dd/mm/aaaa"
+    if v is None or v == "" or (not isinstance(v, str) and pd.isna(v)):
+        return ""
+    try:
+        if isinstance(v, datetime):
+            d = v.date()
+        elif isinstance(v, date):
+            d = v
+        else:
+            d = datetime.strptime(str(v)[:10], "%Y-%m-%d").date()
+        return d.strftime("%d/%m/%Y")
+    except Exception:
+        return str(v)
+
+
+def fmt_reais(centavos_) -> str:
+    # centavos -> "R$ 1,234.56" (mesmo formato de formatar_reais)
+    if centavos_ is None or pd.isna(centavos_):
+        return ""
+    return f"R$ {int(centavos_) / 100:,.2f}"
+
+
+# ---------- colunas ----------
+def formatar_datas(serie: pd.Series) -> pd.Series:
+    # datetime64 (ou texto ISO) -> "dd/mm/aaaa"; vazio onde não há data
+    if not pd.api.types.is_datetime64_any_dtype(serie):
+        serie = pd.to_datetime(serie, errors="coerce", format="ISO8601", utc=True)
+    return serie.dt.strftime("%d/%m/%Y").fillna("").astype("string")
+
+
+def centavos(serie: pd.Series) -> pd.Series:
+    # valores em reais -> inteiros em centavos (Int64: NA preservado, somas exatas).
+    # Texto decimal ("-12.345") é convertido pelos dígitos, sem passar por float;
+    # números, pela menor representação decimal que os reproduz (0.1 + 0.2 ->
+    # "0.30000000000000004"). Meio centavo arredonda para longe do zero.
+    texto = serie.astype("string").str.strip()
+    partes = texto.str.extract(r"^([+-]?)(\d*)(?:\.(\d*))?$")
+    inteiros, fracao = partes[1].fillna(""), partes[2].fillna("")
+    valido = (inteiros.str.len() + fracao.str.len()).gt(0).fillna(False)
+    fracao = (fracao + "000").str[:3]
+    absoluto = (
+        inteiros.where(inteiros != "", "0").astype("Int64") * 100
+        + fracao.str[:2].astype("Int64")
+        + fracao.str[2].ge("5").astype("Int64")
+    )
+    exato = absoluto.where(partes[0].ne("-").fillna(True), -absoluto)
+    # fora desse formato (ex.: "1e-05"): pelo float
+    aproximado = (pd.to_numeric(texto, errors="coerce") * 100).round().astype("Int64")
+    return exato.where(valido, aproximado)
+
+
+def formatar_reais(centavos_: pd.Series) -> pd.Series:
+    # centavos -> "R$ 1,234.56" (mesmo formato dos rótulos antigos); vazio se NA
+    c = centavos_.astype("Int64")
+    sinal = c.lt(0).map({True: "-", False: ""}, na_action="ignore").astype("string")
+    absoluto = c.abs()
+    reais = (absoluto // 100).astype("string")
+    resto = (absoluto % 100).astype("string").str.zfill(2)
+    # separador de milhar: inverte, agrupa de 3 em 3 e desinverte
+    reais = reais.str[::-1].str.replace(r"(\d{3})(?=\d)", r"\1,", regex=True).str[::-1]
+    return ("R$ " + sinal + reais + "." + resto).fillna("")
+
+
+def id_curto(serie: pd.Series) -> pd.Series:
+    # uuid -> "#1A2B3C4D"
+    return ("#" + serie.astype("string").str[:8].str.upper()).fillna("#--------")
+
+
+def rotulos_moradores(df: pd.DataFrame) -> pd.Series:
+    # versão em coluna de rotulo_morador: "Nome — Prédio X, Apto Y"
+    texto = {c: df[c].astype("string").fillna("") for c in ("nome", "predio", "apto")}
+    return texto["nome"] + " — Prédio " + texto["predio"] + ", Apto " + texto["apto"]
@@ -0,0 +1,316 @@
+# src/importacao.py
+"""
+Importação de moradores em lote a partir de planilha (CSV ou XLSX).
+
+O arquivo é lido em blocos de IMPORTACAO_BLOCO linhas; cada bloco é validado
+com operações de coluna (obrigatórios, tamanhos e repetidos, no próprio
+arquivo e contra o diretório de moradores) e as linhas válidas vão ao banco
+em upserts de IMPORTACAO_LOTE linhas, com (predio, apto, nome) como alvo de
+conflito (sql/008). Linhas recusadas voltam com o número da linha no arquivo.
+"""
+
+import codecs
+import csv
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+from src.busca import normalizar
+from src.config import IMPORTACAO_BLOCO, IMPORTACAO_LOTE
+from src.diretorio import diretorio
+from src.esquemas import registros
+from src.supabase_client import table
+
+try:
+    import openpyxl
+except ImportError:  # XLSX é opcional; CSV funciona sem ele
+    openpyxl = None
+
+COLUNAS = ("nome", "telefone", "predio", "apto")
+OBRIGATORIAS = {"nome": "o nome", "predio": "o prédio", "apto": "o apartamento"}
+LIMITES = {
+    "nome": 200,
+    "telefone": 30,
+    "predio": 30,
+    "apto": 30,
+}  # mesmos do formulário
+ROTULOS = {"nome": "Nome", "telefone": "Telefone", "predio": "Prédio", "apto": "Apto"}
+
+# cabeçalhos aceitos (minúsculos, sem acento) -> coluna
+SINONIMOS = {
+    "nome": "nome",
+    "morador": "nome",
+    "telefone": "telefone",
+    "celular": "telefone",
+    "fone": "telefone",
+    "predio": "predio",
+    "bloco": "predio",
+    "torre": "predio",
+    "apto": "apto",
+    "ap": "apto",
+    "apartamento": "apto",
+    "unidade": "apto",
+}
+
+EXTENSOES = ("csv", "xlsx")
+
+
+class ErroImportacao(Exception):
+    """Arquivo que não dá para importar (formato, cabeçalho, dependência)."""
+
+
+@dataclass
+class ErroLinha:
+    linha: int  # linha no arquivo (o cabeçalho é a linha 1)
+    motivo: str
+    repetida: bool = False
+
+
+@dataclass
+class ResultadoImportacao:
+    lidas: int = 0
+    importadas: int = 0
+    repetidas: int = 0
+    erros: list[ErroLinha] = field(default_factory=list)
+
+    def quadro_erros(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "Linha": [e.linha for e in self.erros],
+                "Motivo": [e.motivo for e in self.erros],
+            }
+        )
+
+
+def chave_morador(m: dict) -> str:
+    # (prédio, apto, nome) sem acento, caixa ou espaços repetidos
+    return "\x1f".join(
+        " ".join(normalizar(m.get(c)).split()) for c in ("predio", "apto", "nome")
+    )
+
+
+def _chaves(df: pd.DataFrame) -> pd.Series:
+    partes = [
+        df[c].map(normalizar).str.split().str.join(" ")
+        for c in ("predio", "apto", "nome")
+    ]
+    return partes[0] + "\x1f" + partes[1] + "\x1f" + partes[2]
+
+
+# ---------- leitura ----------
+def _extensao(nome: str) -> str:
+    extensao = Path(nome or "").suffix.lower().lstrip(".")
+    if extensao not in EXTENSOES:
+        raise ErroImportacao("Envie um arquivo .csv ou .xlsx.")
+    return extensao
+
+
+def detectar_codificacao(amostra: bytes) -> str:
+    # planilhas salvas no Excel em português costumam vir em latin-1
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(amostra, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def _blocos_csv(arquivo, tamanho: int):
+    amostra = arquivo.read(64 * 1024)
+    arquivo.seek(0)
+    codificacao = detectar_codificacao(amostra)
+    try:
+        separador = (
+            csv.Sniffer()
+            .sniff(amostra.decode(codificacao, errors="ignore"), ";,\t|")
+            .delimiter
+        )
+    except csv.Error:
+        separador = ","
+    yield from pd.read_csv(
+        arquivo,
+        sep=separador,
+        dtype=str,
+        keep_default_na=False,
+        # linhas em branco vêm como linhas vazias, para a numeração das
+        # linhas (erros) bater com o arquivo; quem as descarta é a validação
+        skip_blank_lines=False,
+        encoding=codificacao,
+        chunksize=tamanho,
+    )
+
+
+def _blocos_xlsx(arquivo, tamanho: int):
+    if openpyxl is None:
+        raise ErroImportacao(
+            "Para importar XLSX, instale o pacote openpyxl "
+            "(ou salve a planilha como CSV)."
+        )
+    livro = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = livro.active.iter_rows(values_only=True)
+        cabecalho = [str(c or "") for c in next(linhas, ())]
+        n = len(cabecalho)
+        bloco = []
+        for valores in linhas:
+            # modo read_only pode trazer linhas mais curtas que o cabeçalho
+            valores = tuple(valores[:n]) + (None,) * (n - len(valores))
+            bloco.append(["" if v is None else str(v) for v in valores])
+            if len(bloco) == tamanho:
+                yield pd.DataFrame(bloco, columns=cabecalho)
+                bloco = []
+        if bloco or not cabecalho:
+            yield pd.DataFrame(bloco, columns=cabecalho)
+    finally:
+        livro.close()
+
+
+def ler_blocos(arquivo, nome: str, tamanho: int = IMPORTACAO_BLOCO):
+    """DataFrames de até `tamanho` linhas (tudo texto), na ordem do arquivo."""
+    leitor = _blocos_csv if _extensao(nome) == "csv" else _blocos_xlsx
+    try:
+        yield from leitor(arquivo, tamanho)
+    except ErroImportacao:
+        raise
+    except Exception as e:
+        raise ErroImportacao(f"Não foi possível ler o arquivo: {e}") from e
+
+
+def estimar_linhas(arquivo, nome: str) -> int | None:
+    # para a barra de progresso: quebras de linha do CSV (XLSX: sem estimativa)
+    if _extensao(nome) == "csv":
+        total = (
+            arquivo.getvalue().count(b"\n") if hasattr(arquivo, "getvalue") else None
+        )
+        return max(total - 1, 1) if total else None
+    return None
+
+
+def padronizar(df: pd.DataFrame) -> pd.DataFrame:
+    """Renomeia cabeçalhos conhecidos, exige as obrigatórias e limpa os espaços."""
+    nomes = {c: SINONIMOS.get(" ".join(normalizar(c).split())) for c in df.columns}
+    df = df.rename(columns={c: n for c, n in nomes.items() if n}).loc[
+        :, lambda d: ~d.columns.duplicated()
+    ]
+    faltando = [c for c in OBRIGATORIAS if c not in df.columns]
+    if faltando:
+        raise ErroImportacao(
+            f"Colunas obrigatórias ausentes: {', '.join(faltando)}. "
+            f"Cabeçalhos aceitos: {', '.join(sorted(SINONIMOS))}."
+        )
+    if "telefone" not in df.columns:
+        df["telefone"] = ""
+    df = df[list(COLUNAS)].astype("string").fillna("")
+    for c in COLUNAS:
+        df[c] = df[c].str.split().str.join(" ")
+    return df
+
+
+# ---------- validação ----------
+def validar_bloco(
+    df: pd.DataFrame, primeira_linha: int, vistos: dict
+) -> tuple[pd.DataFrame, list[ErroLinha]]:
+    """
+    Valida um bloco já padronizado. `vistos` (chave -> linha do arquivo, ou
+    None para quem já está no banco) é atualizado com as linhas aceitas.
+    Retorna (linhas válidas indexadas pela linha do arquivo, recusadas).
+    """
+    df = df.set_axis(pd.RangeIndex(primeira_linha, primeira_linha + len(df)))
+    df = df[(df != "").any(axis=1)]  # linhas em branco são ignoradas
+
+    motivo = pd.Series("", index=df.index, dtype="string")
+    for coluna, rotulo in OBRIGATORIAS.items():
+        motivo = motivo.mask((motivo == "") & (df[coluna] == ""), f"Informe {rotulo}.")
+    for coluna, limite in LIMITES.items():
+        motivo = motivo.mask(
+            (motivo == "") & (df[coluna].str.len() > limite),
+            f"{ROTULOS[coluna]} com mais de {limite} caracteres.",
+        )
+
+    chave = _chaves(df)
+    linhas = pd.Series(df.index, index=df.index)
+    ok = motivo == ""
+    primeira = linhas[ok].groupby(chave[ok]).transform("first").reindex(df.index)
+    anterior = chave.map(vistos)
+    no_banco = chave.isin(vistos) & anterior.isna()
+    no_arquivo = (chave.isin(vistos) & anterior.notna()) | (primeira != linhas)
+    repetida = ok & (no_banco | no_arquivo)
+    origem = anterior.fillna(primeira).astype("Int64").astype("string")
+    motivo = motivo.mask(repetida & no_banco, "Já cadastrado.")
+    motivo = motivo.mask(
+        repetida & ~no_banco, "Repetido no arquivo (linha " + origem + ")."
+    )
+
+    validas = df[motivo == ""]
+    vistos.update(zip(chave[validas.index].tolist(), validas.index.tolist()))
+    erros = [
+        ErroLinha(int(n), str(m), bool(r))
+        for n, m, r in zip(motivo.index, motivo, repetida)
+        if m
+    ]
+    return validas, erros
+
+
+# ---------- gravação ----------
+def _gravar_lote(lote: pd.DataFrame, resultado: ResultadoImportacao) -> None:
+    payload = registros(
+        lote.assign(telefone=lote["telefone"].mask(lote["telefone"] == ""))
+    )
+    try:
+        res = (
+            table("moradores")
+            .upsert(payload, on_conflict="predio,apto,nome", ignore_duplicates=True)
+            .execute()
+        )
+    except Exception as e:
+        resultado.erros += [
+            ErroLinha(int(n), f"Falha ao gravar o lote: {e}") for n in lote.index
+        ]
+        return
+    gravadas = len(res.data or [])
+    resultado.importadas += gravadas
+    # cadastradas por outra sessão entre a leitura do diretório e o upsert
+    resultado.repetidas += len(lote) - gravadas
+
+
+def importar_moradores(
+    arquivo,
+    nome: str,
+    progresso=None,
+    bloco: int = IMPORTACAO_BLOCO,
+    lote: int = IMPORTACAO_LOTE,
+) -> ResultadoImportacao:
+    """
+    Importa os moradores da planilha `arquivo` (CSV ou XLSX, pelo `nome`).
+    `progresso(lidas, total_estimado)` é chamado a cada bloco lido (o total
+    é None quando não dá para estimar).
+    Lança ErroImportacao se o arquivo inteiro não puder ser lido.
+    """
+    resultado = ResultadoImportacao()
+    total = estimar_linhas(arquivo, nome)
+    vistos = {chave_morador(m): None for m in diretorio().todos()}
+    pendentes = []
+    n_pendentes = 0
+    proxima_linha = 2  # a linha 1 é o cabeçalho
+
+    for cru in ler_blocos(arquivo, nome, bloco):
+        df = padronizar(cru)
+        validas, erros = validar_bloco(df, proxima_linha, vistos)
+        proxima_linha += len(df)
+        resultado.lidas += int((df != "").any(axis=1).sum())  # sem as linhas em branco
+        resultado.erros += erros
+        resultado.repetidas += sum(e.repetida for e in erros)
+        pendentes.append(validas)
+        n_pendentes += len(validas)
+        while n_pendentes >= lote:
+            fila = pd.concat(pendentes)
+            _gravar_lote(fila.iloc[:lote], resultado)
+            pendentes, n_pendentes = [fila.iloc[lote:]], len(fila) - lote
+        if progresso:
+            progresso(proxima_linha - 2, total)
+    if n_pendentes:
+        _gravar_lote(pd.concat(pendentes), resultado)
+    if progresso:
+        progresso(resultado.lidas, resultado.lidas)
+    resultado.erros.sort(key=lambda e: e.linha)
+    return resultado
@@ -0,0 +1,97 @@
+# src/metricas.py
+from datetime import date
+
+from src.carregamento import carregar_em_paralelo
+from src.paginacao import ler_tudo
+from src.supabase_client import funcao_ausente, rpc, table
+
+# Tabelas lidas pela função metricas_dashboard (ver sql/001_metricas_dashboard.sql)
+TABELAS_METRICAS = ("moradores", "ocorrencias")
+
+
+def carregar_metricas() -> dict:
+    """
+    Contadores do painel em uma única ida ao banco (RPC metricas_dashboard).
+    Só se a função não existir no backend calcula o mesmo resultado em
+    processo a partir das tabelas; outros erros (rede, auth, RLS) sobem.
+    Formato:
+      {"moradores": {"total": n},
+       "ocorrencias": {"total": n, "em_aberto": n, "por_status": {status: n},
+                       "por_mes": [{"mes": "AAAA-MM", "status": s, "total": n}]}}
+    """
+    try:
+        res = rpc("metricas_dashboard", tabelas=TABELAS_METRICAS).execute()
+    except Exception as e:
+        if not funcao_ausente(e):
+            raise
+        return metricas_em_processo()
+    dados = res.data
+    if isinstance(dados, list):  # algumas versões embrulham o escalar em lista
+        dados = dados[0] if dados else {}
+    if not isinstance(dados, dict) or "ocorrencias" not in dados:
+        raise ValueError(f"Resposta inesperada de metricas_dashboard: {dados!r}")
+    if "em_aberto" not in dados["ocorrencias"]:
+        # banco com a versão anterior de sql/001: conta à parte, sem varrer a tabela
+        res = (
+            table("ocorrencias")
+            .select("id", count="exact")
+            .neq("status", "finalizada")
+            .limit(1)
+            .execute()
+        )
+        dados["ocorrencias"]["em_aberto"] = res.count or 0
+    return dados
+
+
+def _mes_inicial(hoje: date) -> str:
+    # primeiro mês da janela de 12 meses (inclui o mês corrente)
+    ano, mes = hoje.year, hoje.month - 11
+    if mes <= 0:
+        ano, mes = ano - 1, mes + 12
+    return f"{ano:04d}-{mes:02d}"
+
+
+def metricas_em_processo() -> dict:
+    # Mesmo resultado da RPC, calculado a partir das linhas (backend local/fallback)
+    carga = carregar_em_paralelo(
+        {
+            "moradores": lambda: table("moradores")
+            .select("id", count="exact")
+            .limit(1)
+            .execute()
+            .count
+            or 0,
+            "ocorrencias": lambda: ler_tudo(
+                lambda: table("ocorrencias").select("id,status,created_at")
+            ),
+        }
+    )
+    total_moradores = carga["moradores"]
+    ocorrencias = carga["ocorrencias"]
+
+    por_status: dict[str, int] = {}
+    por_mes: dict[tuple[str, str], int] = {}
+    desde = _mes_inicial(date.today())
+    # status nulo entra no gráfico como "aberta", mas não em "em aberto" (como no SQL)
+    em_aberto = sum(
+        1 for o in ocorrencias if o.get("status") not in (None, "finalizada")
+    )
+    for o in ocorrencias:
+        status = o.get("status") or "aberta"
+        por_status[status] = por_status.get(status, 0) + 1
+        mes = str(o.get("created_at") or "")[:7]
+        if mes and mes >= desde:
+            por_mes[(mes, status)] = por_mes.get((mes, status), 0) + 1
+
+    return {
+        "moradores": {"total": int(total_moradores)},
+        "ocorrencias": {
+            "total": len(ocorrencias),
+            "em_aberto": em_aberto,
+            "por_status": por_status,
+            "por_mes": [
+                {"mes": mes, "status": status, "total": total}
+                for (mes, status), total in sorted(por_mes.items())
+            ],
+        },
+    }
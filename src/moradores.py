@@ -0,0 +1,99 @@
+# src/moradores.py
+from src.busca import normalizar
+from src.config import BUSCA_MORADOR_LIMITE
+from src.diretorio import diretorio
+from src.paginacao import Pagina, literal
+from src.supabase_client import funcao_ausente, rpc, table
+
+COLUNAS_ROTULO = "id,nome,predio,apto"
+
+
+def buscar_moradores_prefixo(termo: str, limite: int) -> list[dict]:
+    # alternativa sem pg_trgm: prefixo do nome (ou de uma palavra dele), prédio ou apto
+    t = termo.replace("*", "").replace("%", "")
+    padroes = [
+        ("nome", f"{t}*"),
+        ("nome", f"* {t}*"),
+        ("predio", f"{t}*"),
+        ("apto", f"{t}*"),
+    ]
+    filtro = ",".join(f"{coluna}.ilike.{literal(p)}" for coluna, p in padroes)
+    res = (
+        table("moradores")
+        .select(COLUNAS_ROTULO)
+        .or_(filtro)
+        .order("nome")
+        .limit(limite)
+        .execute()
+    )
+    return res.data or []
+
+
+def buscar_moradores(termo: str, limite: int = BUSCA_MORADOR_LIMITE) -> list[dict]:
+    """
+    Moradores cujo nome/prédio/apto casam com `termo`, no máximo `limite`.
+    Usa a função buscar_moradores do banco (sql/004: trigramas, sem acento);
+    só sem ela no banco cai para prefixos com ilike (outros erros sobem).
+    Resultados ficam no cache de leituras.
+    """
+    termo = (termo or "").strip()
+    if not termo:
+        return []
+    try:
+        res = (
+            rpc(
+                "buscar_moradores",
+                {"p_termo": termo, "p_limite": limite},
+                tabelas=("moradores",),
+            )
+            .select(COLUNAS_ROTULO)
+            .execute()
+        )
+        return res.data or []
+    except Exception as e:
+        if not funcao_ausente(e):
+            raise
+        return buscar_moradores_prefixo(termo, limite)
+
+
+def _texto_busca(m: dict) -> str:
+    return normalizar(
+        f"{m.get('nome') or ''} {m.get('predio') or ''} {m.get('apto') or ''}"
+    )
+
+
+def filtrar_moradores_local(
+    termo: str, offset: int, limite: int
+) -> tuple[list[dict], int]:
+    # mesmo critério da função do banco, sobre o diretório em memória
+    palavras = normalizar(termo).split()
+    achados = [
+        m for m in diretorio().todos() if all(p in _texto_busca(m) for p in palavras)
+    ]
+    return achados[offset : offset + limite], len(achados)
+
+
+def filtrar_moradores(termo: str, offset: int, limite: int) -> tuple[Pagina, int]:
+    """
+    Filtro único da página Moradores: cada palavra de `termo` precisa aparecer
+    em nome, prédio ou apto, sem diferenciar acentos. Usa a função
+    filtrar_moradores do banco (sql/006, índice de trigramas); só sem ela no
+    banco filtra o diretório em memória (outros erros sobem). Retorna
+    (página, total); o cursor é o próximo offset.
+    """
+    termo = (termo or "").strip()
+    params = {"p_termo": termo, "p_limite": limite, "p_offset": offset}
+    try:
+        dados = (
+            rpc("filtrar_moradores", params, tabelas=("moradores",)).execute().data
+            or []
+        )
+        total = int(dados[0]["total"]) if dados else 0
+        linhas = [{k: v for k, v in d.items() if k != "total"} for d in dados]
+    except Exception as e:
+        if not funcao_ausente(e):
+            raise
+        linhas, total = filtrar_moradores_local(termo, offset, limite)
+
+    proximo = offset + limite if offset + limite < total else None
+    return Pagina(linhas=linhas, proximo_cursor=proximo), total
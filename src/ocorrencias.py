@@ -0,0 +1,75 @@
+# src/ocorrencias.py
+from src.formatacao import MORADOR_EMBUTIDO
+from src.supabase_client import table
+
+RESUMO_MAX_CHARS = 240  # mesmo limite de vila_da_serra.descricao_resumo (sql/003)
+
+# Listagens trazem só o resumo calculado no banco; o texto completo e demais
+# campos pesados vêm sob demanda em carregar_detalhe(). O solicitante vem
+# embutido (só os moradores das linhas buscadas).
+COLUNAS_LISTA = (
+    "id,titulo,descricao_resumo,status,morador_id,data_evento,created_at,"
+    f"{MORADOR_EMBUTIDO}"
+)
+CAMPOS_DETALHE = "id,descricao"
+# exportação: texto completo, lido página a página (src/exportacao.py)
+COLUNAS_EXPORTACAO = (
+    f"id,titulo,descricao,status,morador_id,data_evento,created_at,{MORADOR_EMBUTIDO}"
+)
+
+
+def resumo(texto: str | None, max_chars: int = RESUMO_MAX_CHARS) -> str | None:
+    # equivalente em Python do campo computado descricao_resumo
+    if not texto or not str(texto).strip():
+        return None
+    t = str(texto).strip()
+    return t if len(t) <= max_chars else t[:max_chars].rstrip() + "..."
+
+
+def carregar_detalhe(ocorrencia_id, campos: str = CAMPOS_DETALHE) -> dict:
+    """
+    Campos pesados de uma ocorrência, buscados só quando o card é expandido
+    ou editado. A consulta por id fica no cache de leituras até a ocorrência
+    (ou a tabela) ser alterada.
+    """
+    res = table("ocorrencias").select(campos).eq("id", ocorrencia_id).limit(1).execute()
+    dados = res.data or []
+    return dados[0] if dados else {}
+
+
+def anexar_moradores(linhas: list[dict], cache: bool = True) -> list[dict]:
+    """
+    Preenche a chave "morador" em linhas que não vieram com o embutido (ex.:
+    resultado da função de busca), buscando só os moradores referenciados.
+    """
+    ids = sorted(
+        {
+            linha["morador_id"]
+            for linha in linhas
+            if linha.get("morador_id") and "morador" not in linha
+        }
+    )
+    mapa = {}
+    if ids:
+        res = (
+            table("moradores")
+            .select("id,nome,predio,apto")
+            .in_("id", ids)
+            .execute(cache=cache)
+        )
+        mapa = {m["id"]: m for m in res.data or []}
+    for linha in linhas:
+        if "morador" not in linha:
+            linha["morador"] = mapa.get(linha.get("morador_id"))
+    return linhas
+
+
+def carregar_descricoes(ids) -> dict:
+    # texto completo de várias ocorrências numa consulta (a busca só traz o resumo)
+    ids = list(ids)
+    if not ids:
+        return {}
+    res = (
+        table("ocorrencias").select(CAMPOS_DETALHE).in_("id", ids).execute(cache=False)
+    )
+    return {d["id"]: d.get("descricao") for d in res.data or []}
@@ -0,0 +1,96 @@
+# src/paginacao.py
+from dataclasses import dataclass, field
+from typing import Callable
+
+# Ordem padrão das listagens: mais recentes primeiro, `id` desempata
+ORDEM_PADRAO = (("created_at", True), ("id", True))
+
+
+@dataclass
+class Pagina:
+    linhas: list[dict] = field(default_factory=list)
+    proximo_cursor: tuple | None = None  # valores da última linha, se houver próxima
+
+    @property
+    def tem_proxima(self) -> bool:
+        return self.proximo_cursor is not None
+
+
+def literal(valor) -> str:
+    # valores entre aspas: timestamps têm ':' '+' e '.', reservados no or=()
+    texto = str(valor).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{texto}"'
+
+
+def filtro_apos(cursor: tuple, ordem=ORDEM_PADRAO) -> str:
+    """
+    Monta o filtro PostgREST "linhas depois do cursor" para a ordem composta.
+    Para (created_at desc, id desc) e cursor (c, i):
+      created_at.lt.c,and(created_at.eq.c,id.lt.i)
+    """
+    termos = []
+    for n, (coluna, desc) in enumerate(ordem):
+        op = "lt" if desc else "gt"
+        iguais = [f"{c}.eq.{literal(v)}" for (c, _), v in zip(ordem[:n], cursor)]
+        cond = f"{coluna}.{op}.{literal(cursor[n])}"
+        termos.append(f"and({','.join(iguais + [cond])})" if iguais else cond)
+    return ",".join(termos)
+
+
+def buscar_pagina(
+    montar: Callable[[], object],
+    cursor: tuple | None,
+    tamanho: int,
+    ordem=ORDEM_PADRAO,
+    cache: bool = True,
+) -> Pagina:
+    """
+    Busca uma página por keyset (seek): `montar()` devolve a consulta já com
+    select e filtros; aqui entram o filtro do cursor, a ordenação e o limite.
+    Pede `tamanho + 1` linhas só para saber se existe próxima página.
+    Leituras de uma só vez (exportação) passam cache=False.
+    """
+    q = montar()
+    if cursor is not None:
+        q = q.or_(filtro_apos(cursor, ordem))
+    for coluna, desc in ordem:
+        q = q.order(coluna, desc=desc)
+    linhas = q.limit(tamanho + 1).execute(cache=cache).data or []
+
+    proximo = None
+    if len(linhas) > tamanho:
+        linhas = linhas[:tamanho]
+        proximo = tuple(linhas[-1].get(coluna) for coluna, _ in ordem)
+    return Pagina(linhas=linhas, proximo_cursor=proximo)
+
+
+def contar(montar: Callable[[], object]) -> int:
+    # `montar()` aqui deve usar select(..., count="exact"); só a contagem importa
+    res = montar().limit(1).execute()
+    return int(res.count or 0)
+
+
+def ler_tudo(
+    montar: Callable[[], object], lote: int = 1000, cache: bool = True
+) -> list[dict]:
+    """
+    Lê todas as linhas de `montar()` em blocos de `lote` (limite de linhas por
+    resposta do PostgREST), ordenando por `id` para os blocos serem estáveis.
+    Uso restrito a cálculos em processo (fallbacks, backend local e
+    sincronização do diretório, que lê com cache=False).
+    """
+    linhas: list[dict] = []
+    inicio = 0
+    while True:
+        bloco = (
+            montar()
+            .order("id")
+            .range(inicio, inicio + lote - 1)
+            .execute(cache=cache)
+            .data
+            or []
+        )
+        linhas.extend(bloco)
+        if len(bloco) < lote:
+            return linhas
+        inicio += lote
@@ -0,0 +1,166 @@
+# src/quadros.py
+"""
+DataFrames prontos para as listagens.
+
+Linhas cruas (ou um DataFrame já lido) viram quadros tipados pelo esquema
+(src/esquemas.py) com as colunas de exibição já calculadas, tudo em operações
+de coluna: as páginas só escolhem colunas, sem laços por linha em Python.
+"""
+
+import pandas as pd
+
+from src.esquemas import ESQUEMAS, tipar
+from src.formatacao import (
+    centavos,
+    formatar_datas,
+    formatar_reais,
+    id_curto,
+    rotulos_moradores,
+)
+
+
+def _tipado(dados, tabela: str) -> pd.DataFrame:
+    # lista de dicts ou DataFrame -> cópia tipada, com todas as colunas do esquema
+    df = (
+        dados.copy()
+        if isinstance(dados, pd.DataFrame)
+        else pd.DataFrame(list(dados or []))
+    )
+    for coluna in ESQUEMAS[tabela]:
+        if coluna not in df.columns:
+            df[coluna] = None
+    return tipar(df, tabela)
+
+
+def quadro_transacoes(dados) -> pd.DataFrame:
+    """
+    Transações tipadas, mais recentes primeiro, com:
+      valor_centavos (Int64), valor (em reais, só para exibição), data_fmt,
+      valor_fmt, id_curto e rotulo ("dd/mm/aaaa — tipo — descrição — R$ x —
+      #ID") para seletores.
+    """
+    df = _tipado(dados, "transacoes")
+    df["valor_centavos"] = df["valor"]  # o esquema já tipa em centavos
+    df["valor"] = df["valor_centavos"] / 100
+    df["data_fmt"] = formatar_datas(df["data"])
+    df["valor_fmt"] = formatar_reais(df["valor_centavos"])
+    df["id_curto"] = id_curto(df["id"])
+    df["rotulo"] = (
+        df["data_fmt"]
+        + " — "
+        + df["tipo"].astype("string").fillna("")
+        + " — "
+        + df["descricao"].fillna("")
+        + " — "
+        + df["valor_fmt"]
+        + " — "
+        + df["id_curto"]
+    )
+    return df.sort_values(
+        ["data", "created_at"], ascending=[False, False], kind="stable"
+    )
+
+
+def quadro_ocorrencias(dados) -> pd.DataFrame:
+    """
+    Ocorrências tipadas (ordem original), com abertura_fmt, evento_fmt,
+    id_curto e solicitante (rótulo do morador embutido, "—" sem vínculo).
+    """
+    df = _tipado(dados, "ocorrencias")
+    df["abertura_fmt"] = formatar_datas(df["created_at"])
+    df["evento_fmt"] = formatar_datas(df["data_evento"])
+    df["id_curto"] = id_curto(df["id"])
+    embutidos = (
+        df["morador"]
+        if "morador" in df.columns
+        else pd.Series(None, index=df.index, dtype=object)
+    )
+    morador = pd.DataFrame(
+        {c: embutidos.astype(object).str.get(c) for c in ("nome", "predio", "apto")}
+    )
+    df["solicitante"] = rotulos_moradores(morador).where(morador["nome"].notna(), "—")
+    return df
+
+
+def quadro_moradores(dados) -> pd.DataFrame:
+    """
+    Moradores tipados, com rotulo ("Nome — Prédio X, Apto Y — #ID") para os
+    botões de escolha.
+    """
+    df = _tipado(dados, "moradores")
+    df["rotulo"] = rotulos_moradores(df) + " — " + id_curto(df["id"])
+    return df
+
+
+def quadro_fluxo_mensal(dados, desde=None, ate=None, saldo_anterior=0) -> pd.DataFrame:
+    """
+    Consolidação mensal (src/fluxo.py) com um mês por linha de `desde` até
+    `ate` (ou do primeiro ao último mês com dados), inclusive meses sem
+    transação: valores em centavos (Int64), mes_fmt ("mm/aaaa") e o saldo
+    acumulado levado adiante nos meses vazios. `saldo_anterior` (em reais,
+    como `dados`) é o acumulado antes de `desde`, usado quando a janela não
+    tem nenhum mês com dados (fluxo.saldo_antes_de).
+    """
+    colunas = [
+        "mes",
+        "entradas",
+        "saidas",
+        "quantidade",
+        "saldo_mes",
+        "saldo_acumulado",
+    ]
+    df = pd.DataFrame(list(dados or []), columns=colunas)
+    df["mes"] = (
+        pd.to_datetime(df["mes"], errors="coerce", format="ISO8601")
+        .dt.to_period("M")
+        .dt.to_timestamp()
+    )
+    df = df.dropna(subset=["mes"]).set_index("mes")
+    limites = [
+        pd.Timestamp(d).to_period("M").to_timestamp()
+        for d in (desde, ate)
+        if d is not None
+    ]
+    pontas = list(df.index) + limites
+    if pontas:
+        inicio = (
+            pd.Timestamp(desde).to_period("M").to_timestamp()
+            if desde is not None
+            else min(pontas)
+        )
+        fim = (
+            pd.Timestamp(ate).to_period("M").to_timestamp()
+            if ate is not None
+            else max(pontas)
+        )
+        df = df.reindex(pd.date_range(inicio, fim, freq="MS"))
+    df.index.name = "mes"
+    df = df.reset_index()
+
+    df["entradas_centavos"] = centavos(df["entradas"]).fillna(0)
+    df["saidas_centavos"] = centavos(df["saidas"]).fillna(0)
+    df["saldo_mes_centavos"] = df["entradas_centavos"] - df["saidas_centavos"]
+    saldo = centavos(df["saldo_acumulado"])
+    # meses vazios antes do primeiro com dados: saldo de antes desse mês
+    validos = saldo.dropna().index
+    anterior = (
+        saldo[validos[0]] - centavos(df["saldo_mes"])[validos[0]]
+        if len(validos)
+        else centavos(pd.Series([saldo_anterior])).fillna(0).iloc[0]
+    )
+    df["saldo_acumulado_centavos"] = saldo.ffill().fillna(anterior)
+    df["quantidade"] = (
+        pd.to_numeric(df["quantidade"], errors="coerce").fillna(0).astype("int64")
+    )
+    df["mes_fmt"] = df["mes"].dt.strftime("%m/%Y").astype("string")
+    return df[
+        [
+            "mes",
+            "mes_fmt",
+            "quantidade",
+            "entradas_centavos",
+            "saidas_centavos",
+            "saldo_mes_centavos",
+            "saldo_acumulado_centavos",
+        ]
+    ]
@@ -0,0 +1,380 @@
+# src/rastreamento.py
+"""
+Rastreamento de consultas e de autenticação por rerun.
+
+Cada chamada que passa por table()/rpc() (via observar_consultas) e pelos
+helpers de auth decorados com @cronometrar vira um Evento com alvo, filtros,
+linhas, bytes, duração e acerto de cache. Os eventos vão para:
+  - o rastro do rerun atual (st.session_state), exibido no painel lateral
+    para administradores (VDS_ADMINS);
+  - logs estruturados em JSON, uma linha por evento e por rerun
+    (VDS_RASTREAMENTO_LOG);
+  - contadores e histogramas no formato Prometheus, servidos em /metrics
+    numa thread do processo (VDS_METRICAS_PORTA).
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.config import METRICAS_HOST, METRICAS_PORTA, RASTREAMENTO_LOG
+
+try:
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except Exception:  # fora do Streamlit (scripts, benchmarks)
+    st = get_script_run_ctx = None
+
+log = logging.getLogger(__name__)
+
+_CHAVE_RASTRO = "_rastro_rerun"
+
+# limites (s) dos histogramas de latência
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class Evento:
+    tipo: str  # "consulta" ou "auth"
+    alvo: str  # tabela, "rpc:nome" ou helper de auth
+    operacao: str | None
+    detalhe: str  # filtros e modificadores da consulta
+    inicio: float  # time.perf_counter()
+    duracao: float
+    cache: bool = False
+    linhas: int | None = None
+    bytes: int | None = None
+    erro: str | None = None
+
+
+@dataclass
+class Rastro:
+    """Eventos de um rerun (inclui consultas feitas em threads de carga)."""
+
+    pagina: str = ""
+    inicio: float = field(default_factory=time.perf_counter)
+    eventos: list[Evento] = field(default_factory=list)
+
+    def totais(self) -> dict:
+        consultas = [e for e in self.eventos if e.tipo == "consulta"]
+        banco = [e for e in consultas if not e.cache]
+        return {
+            "consultas": len(consultas),
+            "banco": len(banco),
+            "cache": len(consultas) - len(banco),
+            "linhas": sum(e.linhas or 0 for e in banco),
+            "bytes": sum(e.bytes or 0 for e in banco),
+            "tempo_consultas_ms": round(sum(e.duracao for e in consultas) * 1000, 1),
+            "tempo_auth_ms": round(
+                sum(e.duracao for e in self.eventos if e.tipo == "auth") * 1000, 1
+            ),
+            "erros": sum(1 for e in self.eventos if e.erro),
+        }
+
+
+# ---------- métricas Prometheus ----------
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(rotulos: dict) -> str:
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in rotulos.items()) + "}"
+
+
+class Metricas:
+    """Contadores e histogramas em memória, expostos no formato texto do Prometheus."""
+
+    def __init__(self, buckets: tuple = BUCKETS_SEGUNDOS):
+        self.buckets = buckets
+        self._ajuda: dict[str, tuple[str, str]] = {}
+        self._contadores: dict[tuple, float] = {}
+        # chave -> [contagens por bucket, soma, total]
+        self._histogramas: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def _declarar(self, nome: str, tipo: str, ajuda: str) -> None:
+        self._ajuda.setdefault(nome, (tipo, ajuda))
+
+    def somar(self, nome: str, ajuda: str, valor: float = 1.0, **rotulos) -> None:
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._declarar(nome, "counter", ajuda)
+            self._contadores[chave] = self._contadores.get(chave, 0.0) + valor
+
+    def observar(self, nome: str, ajuda: str, valor: float, **rotulos) -> None:
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._declarar(nome, "histogram", ajuda)
+            h = self._histogramas.setdefault(chave, [[0] * len(self.buckets), 0.0, 0])
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    h[0][i] += 1
+            h[1] += valor
+            h[2] += 1
+
+    def texto(self) -> str:
+        linhas = []
+        with self._lock:
+            for nome, (tipo, ajuda) in sorted(self._ajuda.items()):
+                linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} {tipo}"]
+                if tipo == "counter":
+                    for (n, rot), valor in sorted(self._contadores.items()):
+                        if n == nome:
+                            linhas.append(f"{nome}{_rotulos(dict(rot))} {valor:g}")
+                    continue
+                for (n, rot), (contagens, soma, total) in sorted(
+                    self._histogramas.items()
+                ):
+                    if n != nome:
+                        continue
+                    for limite, contagem in zip(self.buckets, contagens):
+                        rotulos = _rotulos({**dict(rot), "le": f"{limite:g}"})
+                        linhas.append(f"{nome}_bucket{rotulos} {contagem}")
+                    linhas.append(
+                        f"{nome}_bucket{_rotulos({**dict(rot), 'le': '+Inf'})} {total}"
+                    )
+                    linhas.append(f"{nome}_sum{_rotulos(dict(rot))} {soma:g}")
+                    linhas.append(f"{nome}_count{_rotulos(dict(rot))} {total}")
+        return "\n".join(linhas) + "\n"
+
+
+metricas = Metricas()
+
+
+class _ManipuladorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        corpo = metricas.texto().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        pass  # scrapes periódicos não poluem o log do app
+
+
+# ---------- registro de eventos ----------
+def _contexto():
+    return get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+
+
+def _rastro_atual(ctx=None) -> Rastro | None:
+    ctx = ctx or _contexto()
+    if ctx is None:
+        return None
+    try:
+        return ctx.session_state[_CHAVE_RASTRO]
+    except (KeyError, AttributeError):
+        return None
+
+
+def _descrever(passos: tuple) -> str:
+    # (("select", ("id,titulo",), ()), ("eq", ("status", "aberta"), ()))
+    #   -> "select(id,titulo) eq(status, aberta)"
+    partes = []
+    for nome, args, kwargs in passos:
+        valores = [str(a) for a in args] + [f"{k}={v}" for k, v in kwargs]
+        partes.append(f"{nome}({', '.join(valores)})")
+    texto = " ".join(partes)
+    return texto if len(texto) <= 300 else texto[:297] + "..."
+
+
+def registrar(evento: Evento) -> None:
+    ctx = _contexto()
+    rastro = _rastro_atual(ctx)
+    if rastro is not None:
+        rastro.eventos.append(evento)
+
+    if evento.tipo == "consulta":
+        origem = "cache" if evento.cache else "banco"
+        metricas.somar(
+            "vds_consultas_total",
+            "Consultas executadas pelo app.",
+            alvo=evento.alvo,
+            operacao=evento.operacao or "",
+            origem=origem,
+        )
+        if not evento.cache:
+            metricas.observar(
+                "vds_consulta_segundos",
+                "Latência das consultas que foram ao banco.",
+                evento.duracao,
+                alvo=evento.alvo,
+                operacao=evento.operacao or "",
+            )
+            metricas.somar(
+                "vds_consulta_bytes_total",
+                "Bytes das respostas vindas do banco.",
+                evento.bytes or 0,
+                alvo=evento.alvo,
+            )
+    else:
+        metricas.observar(
+            "vds_auth_segundos",
+            "Latência dos helpers de autenticação.",
+            evento.duracao,
+            helper=evento.alvo,
+        )
+    if evento.erro:
+        metricas.somar(
+            "vds_erros_total",
+            "Consultas e chamadas de auth com erro.",
+            tipo=evento.tipo,
+            alvo=evento.alvo,
+        )
+
+    if RASTREAMENTO_LOG:
+        dados = {k: v for k, v in asdict(evento).items() if k != "inicio"}
+        dados["duracao_ms"] = round(dados.pop("duracao") * 1000, 2)
+        dados["evento"] = dados.pop("tipo")
+        if rastro is not None:
+            dados["pagina"] = rastro.pagina
+            dados["offset_ms"] = round((evento.inicio - rastro.inicio) * 1000, 2)
+        if ctx is not None:
+            dados["sessao"] = ctx.session_id[:8]
+        log.info(json.dumps(dados, ensure_ascii=False, default=str))
+
+
+def _observar_consulta(execucao) -> None:
+    registrar(
+        Evento(
+            "consulta",
+            execucao.tabela,
+            execucao.operacao,
+            _descrever(execucao.passos),
+            time.perf_counter() - execucao.duracao,
+            execucao.duracao,
+            execucao.do_cache,
+            execucao.linhas,
+            execucao.bytes,
+            (
+                f"{type(execucao.erro).__name__}: {execucao.erro}"
+                if execucao.erro
+                else None
+            ),
+        )
+    )
+
+
+def cronometrar(alvo: str):
+    """Decorador: registra cada chamada da função como evento de auth."""
+
+    def decorador(fn):
+        @wraps(fn)
+        def cronometrada(*args, **kwargs):
+            inicio = time.perf_counter()
+            erro = None
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                erro = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                registrar(
+                    Evento(
+                        "auth",
+                        alvo,
+                        None,
+                        "",
+                        inicio,
+                        time.perf_counter() - inicio,
+                        erro=erro,
+                    )
+                )
+
+        return cronometrada
+
+    return decorador
+
+
+# ---------- rerun ----------
+@contextmanager
+def rerun_rastreado(pagina: str = ""):
+    """
+    Delimita um rerun: o rastro anterior é substituído e, ao final (mesmo com
+    st.stop/st.rerun), a duração e os totais vão para métricas e log.
+    """
+    rastro = Rastro(pagina)
+    if st is not None and _contexto() is not None:
+        st.session_state[_CHAVE_RASTRO] = rastro
+    try:
+        yield rastro
+    finally:
+        duracao = time.perf_counter() - rastro.inicio
+        metricas.observar(
+            "vds_rerun_segundos",
+            "Duração dos reruns por página.",
+            duracao,
+            pagina=rastro.pagina,
+        )
+        if RASTREAMENTO_LOG:
+            log.info(
+                json.dumps(
+                    {
+                        "evento": "rerun",
+                        "pagina": rastro.pagina,
+                        "duracao_ms": round(duracao * 1000, 2),
+                        **rastro.totais(),
+                    },
+                    ensure_ascii=False,
+                )
+            )
+
+
+def rastro_atual() -> Rastro | None:
+    return _rastro_atual()
+
+
+# ---------- inicialização ----------
+_iniciado = False
+_servidor: ThreadingHTTPServer | None = None
+_inicio_lock = threading.Lock()
+
+
+def iniciar_rastreamento(porta: int = METRICAS_PORTA) -> None:
+    """
+    Liga o rastreamento (uma vez por processo): observa as consultas, prepara
+    o log JSON e, com `porta` > 0, serve /metrics numa thread.
+    """
+    global _iniciado, _servidor
+    with _inicio_lock:
+        if _iniciado:
+            return
+        from src.supabase_client import observar_consultas
+
+        observar_consultas(_observar_consulta)
+        if RASTREAMENTO_LOG and not log.handlers:
+            manipulador = logging.StreamHandler()
+            manipulador.setFormatter(logging.Formatter("%(message)s"))
+            log.addHandler(manipulador)
+            log.setLevel(logging.INFO)
+            log.propagate = False
+        if porta:
+            try:
+                _servidor = ThreadingHTTPServer(
+                    (METRICAS_HOST, porta), _ManipuladorMetricas
+                )
+            except OSError as e:
+                log.warning(
+                    "Endpoint de métricas indisponível em %s:%s: %s",
+                    METRICAS_HOST,
+                    porta,
+                    e,
+                )
+            else:
+                _servidor.daemon_threads = True
+                threading.Thread(
+                    target=_servidor.serve_forever, name="vds-metricas", daemon=True
+                ).start()
+        _iniciado = True
@@ -1,47 +1,549 @@
 # src/supabase_client.py
-import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
+import hashlib
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
 
-# Carrega variáveis do .env
-load_dotenv()
+import httpx
+from postgrest.exceptions import APIError
+from supabase import Client, create_client
+from supabase.lib.client_options import SyncClientOptions
+from supabase_auth import SyncSupportedStorage
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-SCHEMA = "vila_da_serra"
+from src.cache import cache_consultas, chave_linha, chave_linhas
+from src.config import (
+    AUTH_MARGEM_EXPIRACAO,
+    BACKEND,
+    POOL_KEEPALIVE_SEGUNDOS,
+    POOL_MAX_CLIENTES,
+    POOL_MAX_CONEXOES,
+    POOL_MAX_KEEPALIVE,
+    POOL_OCIOSO_SEGUNDOS,
+    POOL_TIMEOUT_HTTP,
+    SCHEMA,
+    SUPABASE_KEY,
+    SUPABASE_URL,
+)
+from src.rastreamento import cronometrar
+from src.tokens import payload_sem_verificar
 
-if not SUPABASE_URL or not SUPABASE_KEY:
+try:
+    import streamlit as st
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except Exception:  # fora do Streamlit (scripts, benchmarks)
+    st = Runtime = get_script_run_ctx = None
+
+if BACKEND not in ("supabase", "sqlite"):
+    raise RuntimeError(
+        f"VDS_BACKEND inválido: {BACKEND!r} (use 'supabase' ou 'sqlite')"
+    )
+if BACKEND == "supabase" and (not SUPABASE_URL or not SUPABASE_KEY):
     raise RuntimeError("Defina SUPABASE_URL e SUPABASE_KEY no arquivo .env")
 
-_supabase: Client | None = None
+
+# ---------- pool de clientes por sessão ----------
+class _ArmazenamentoSessao(SyncSupportedStorage):
+    # Guarda a sessão do GoTrue fora do cliente: se o cliente for descartado
+    # por ociosidade, o próximo da mesma sessão do Streamlit recupera o login
+    def __init__(self, dados: dict):
+        self._dados = dados
+
+    def get_item(self, key: str):
+        return self._dados.get(key)
+
+    def set_item(self, key: str, value: str) -> None:
+        self._dados[key] = value
+
+    def remove_item(self, key: str) -> None:
+        self._dados.pop(key, None)
+
+
+class _EntradaPool:
+    def __init__(self, cliente: Client, http: httpx.Client | None):
+        self.cliente = cliente
+        self.http = http
+        self.token: str | None = None  # token aplicado por ensure_postgrest_auth()
+        self.ultimo_uso = time.monotonic()
+
+
+class PoolClientes:
+    """
+    Um cliente Supabase por sessão do Streamlit, cada um com seu próprio
+    cabeçalho de autenticação e sessão do GoTrue (sem disputa entre usuários
+    simultâneos). As conexões HTTP ficam abertas (keep-alive) entre as
+    chamadas da mesma sessão. Uma thread de limpeza descarta, a cada
+    `intervalo_limpeza` segundos, os clientes ociosos e os de sessões do
+    Streamlit já encerradas; `remover` descarta o da sessão que fez logout.
+    """
+
+    def __init__(
+        self,
+        ocioso_segundos: float = POOL_OCIOSO_SEGUNDOS,
+        max_clientes: int = POOL_MAX_CLIENTES,
+    ):
+        self.ocioso_segundos = ocioso_segundos
+        self.max_clientes = max_clientes
+        self.intervalo_limpeza = min(ocioso_segundos, 60.0)
+        self._entradas: dict[str, _EntradaPool] = {}
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _novo(self, armazenamento: dict) -> _EntradaPool:
+        if BACKEND == "sqlite":
+            # mesmo pool e mesma sessão de auth por usuário, sem HTTP
+            from src.backend_sqlite import ClienteLocal
+
+            return _EntradaPool(ClienteLocal(_ArmazenamentoSessao(armazenamento)), None)
+        http = httpx.Client(
+            http2=True,
+            timeout=POOL_TIMEOUT_HTTP,
+            follow_redirects=True,
+            event_hooks={"response": [_medir_resposta_http]},
+            limits=httpx.Limits(
+                max_connections=POOL_MAX_CONEXOES,
+                max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                keepalive_expiry=POOL_KEEPALIVE_SEGUNDOS,
+            ),
+        )
+        opcoes = SyncClientOptions(
+            schema=SCHEMA,
+            storage=_ArmazenamentoSessao(armazenamento),
+            httpx_client=http,
+        )
+        return _EntradaPool(
+            create_client(SUPABASE_URL, SUPABASE_KEY, options=opcoes), http
+        )
+
+    def entrada(self, sessao: str, armazenamento: dict) -> _EntradaPool:
+        with self._lock:
+            e = self._entradas.get(sessao)
+            if e is not None:
+                e.ultimo_uso = time.monotonic()
+                return e
+        # criação fora do lock: pode renovar o token da sessão salva (rede)
+        nova = self._novo(armazenamento)
+        with self._lock:
+            e = self._entradas.setdefault(sessao, nova)
+            e.ultimo_uso = time.monotonic()
+            self._descartar_ociosos(manter=sessao)
+        if e is not nova and nova.http is not None:
+            nova.http.close()
+        self._iniciar_limpeza()
+        return e
+
+    def _descartar_ociosos(self, manter: str | None = None) -> None:
+        # chamado com o lock; remove ociosos, os de sessões encerradas e, se
+        # preciso, os menos usados
+        limite = time.monotonic() - self.ocioso_segundos
+        por_uso = sorted(
+            ((s, e) for s, e in self._entradas.items() if s != manter),
+            key=lambda kv: kv[1].ultimo_uso,
+        )
+        excedente = len(self._entradas) - self.max_clientes
+        for i, (sessao, e) in enumerate(por_uso):
+            if e.ultimo_uso < limite or i < excedente or _sessao_encerrada(sessao):
+                del self._entradas[sessao]
+                if e.http is not None:
+                    e.http.close()
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._descartar_ociosos()
+
+    def _limpeza_periodica(self) -> None:
+        while not self._parar.wait(self.intervalo_limpeza):
+            self.limpar()
+
+    def _iniciar_limpeza(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(
+                target=self._limpeza_periodica, name="vds-pool-limpeza", daemon=True
+            )
+            self._thread.start()
+
+    def parar_limpeza(self, timeout: float | None = 5.0) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def remover(self, sessao: str) -> None:
+        with self._lock:
+            e = self._entradas.pop(sessao, None)
+        if e is not None and e.http is not None:
+            e.http.close()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+
+def _sessao_encerrada(sessao: str) -> bool:
+    # sessão do Streamlit fechada (aba fechada ou expirada); "local" e afins
+    # (scripts, benchmarks) nunca contam como encerradas
+    if Runtime is None or not Runtime.exists() or sessao == "local":
+        return False
+    try:
+        return not Runtime.instance().is_active_session(sessao)
+    except Exception:
+        return False
+
+
+pool_clientes = PoolClientes()
+
+# Armazenamento de auth fora do Streamlit (scripts): uma única "sessão" local
+_armazenamento_local: dict = {}
+
+
+def _sessao_atual() -> tuple[str, dict]:
+    ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+    if ctx is None:
+        return "local", _armazenamento_local
+    return ctx.session_id, st.session_state.setdefault("_sb_auth_storage", {})
+
+
+def _entrada_atual() -> _EntradaPool:
+    sessao, armazenamento = _sessao_atual()
+    return pool_clientes.entrada(sessao, armazenamento)
+
+
+def descartar_cliente_atual() -> None:
+    # logout: fecha as conexões do cliente desta sessão; o próximo é criado
+    # sob demanda
+    pool_clientes.remover(_sessao_atual()[0])
+
 
 def get_client() -> Client:
-    global _supabase
-    if _supabase is None:
-        _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-    return _supabase
+    # Cliente da sessão atual do Streamlit (criado sob demanda no pool)
+    return _entrada_atual().cliente
 
-supabase = get_client()
 
+@cronometrar("auth.ensure_postgrest_auth")
 def ensure_postgrest_auth() -> bool:
     """
     Garante que o PostgREST esteja usando o token da sessão atual.
     Chame após login e no início de cada página.
     Retorna True se um token válido foi aplicado, False caso contrário.
     """
+    entrada = _entrada_atual()
+    supabase = entrada.cliente
     try:
         session = supabase.auth.get_session()
+        expira_em = getattr(session, "expires_at", None)
+        if expira_em and expira_em - time.time() < AUTH_MARGEM_EXPIRACAO:
+            # renova um pouco antes de vencer, junto com o usuário em cache
+            # (src/auth.py)
+            try:
+                session = supabase.auth.refresh_session().session or session
+            except Exception:
+                pass  # segue com o token atual enquanto ele for válido
         token = getattr(session, "access_token", None)
         if token:
             supabase.postgrest.auth(token)
+            entrada.token = token
             return True
         # Sem sessão: limpa o header para evitar 'resquícios' de sessões antigas
+        entrada.token = None
         supabase.postgrest.auth(None)
     except Exception:
         # Em caso de qualquer erro, não quebra a app
         pass
     return False
 
+
+def token_atual() -> str | None:
+    # Access token aplicado pelo último ensure_postgrest_auth() desta sessão
+    return _entrada_atual().token
+
+
+# ---------- observadores de consultas ----------
+@dataclass
+class ExecucaoConsulta:
+    """Uma chamada a execute()/dataframe(), como vista pelos observadores."""
+
+    tabela: str
+    operacao: str | None
+    passos: tuple
+    duracao: float  # segundos, incluindo a consulta ao cache
+    do_cache: bool
+    linhas: int | None = None
+    bytes: int | None = None  # recebidos da rede (None quando veio do cache)
+    erro: BaseException | None = None
+
+
+# Chamados após cada execução (benchmarks, rastreamento); sem observadores,
+# nada é medido
+_observadores: list[Callable[[ExecucaoConsulta], None]] = []
+
+# Tamanhos das respostas da rede durante a execução observada em andamento
+# nesta thread (None: nenhuma execução sendo medida)
+_medicao = threading.local()
+
+
+def observar_consultas(fn: Callable[[ExecucaoConsulta], None]):
+    _observadores.append(fn)
+    return fn
+
+
+def deixar_de_observar(fn: Callable[[ExecucaoConsulta], None]) -> None:
+    if fn in _observadores:
+        _observadores.remove(fn)
+
+
+def medindo_resposta() -> bool:
+    return getattr(_medicao, "tamanhos", None) is not None
+
+
+def registrar_resposta(tamanho: int) -> None:
+    # quem vai à rede informa o tamanho da resposta (gancho do httpx, backend
+    # local); fora de uma execução observada, não faz nada
+    tamanhos = getattr(_medicao, "tamanhos", None)
+    if tamanhos is not None:
+        tamanhos.append(tamanho)
+
+
+def _medir_resposta_http(resposta: httpx.Response) -> None:
+    # gancho de resposta do httpx: Content-Length ou, sem ele (chunked), os
+    # bytes efetivamente baixados
+    if not medindo_resposta():
+        return
+    tamanho = resposta.headers.get("content-length")
+    if tamanho is None:
+        resposta.read()
+        tamanho = resposta.num_bytes_downloaded
+    registrar_resposta(int(tamanho))
+
+
+def _contar_linhas(dados) -> int | None:
+    if dados is None:
+        return None
+    if isinstance(dados, str):  # CSV: cabeçalho + uma linha por registro
+        return max(dados.count("\n") - 1, 0)
+    if hasattr(dados, "shape"):  # DataFrame
+        return len(dados)
+    return len(dados) if isinstance(dados, list) else 1
+
+
+def _notificar(execucao: ExecucaoConsulta, dados) -> None:
+    if execucao.erro is None:
+        try:
+            execucao.linhas = _contar_linhas(dados)
+        except Exception:
+            pass
+    for fn in list(_observadores):
+        try:
+            fn(execucao)
+        except Exception:
+            pass  # observador com defeito não pode derrubar a consulta
+
+
+# ---------- cache de leituras ----------
+_OPERACOES_ESCRITA = {"insert", "upsert", "update", "delete"}
+_OPERACOES = _OPERACOES_ESCRITA | {"select"}
+
+# "morador:moradores(nome,predio)" -> recurso embutido "moradores"
+_RE_EMBUTIDO = re.compile(r"(?:\w+:)?(\w+)(?:!\w+)?\(")
+
+
+def _chave_sessao() -> str:
+    # Particiona o cache pelo usuário do token (claim "sub"); sem token, "anon"
+    token = token_atual()
+    if not token:
+        return "anon"
+    sub = payload_sem_verificar(token).get("sub")
+    if sub:
+        return str(sub)
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+class Consulta:
+    """
+    Envolve o builder do PostgREST registrando a cadeia de chamadas
+    (projeção, filtros, ordenação, limite) que compõe a chave do cache.
+    Leituras (select) são servidas pelo cache da sessão; escritas
+    (insert/upsert/update/delete) invalidam a tabela para todas as sessões.
+    Chamadas RPC também são cacheadas, dependendo das `tabelas` informadas.
+    """
+
+    def __init__(
+        self,
+        tabela: str,
+        builder,
+        passos: tuple = (),
+        operacao: str | None = None,
+        dependencias: tuple = (),
+    ):
+        self._tabela = tabela
+        self._builder = builder
+        self._passos = passos
+        self._operacao = operacao
+        self._dependencias = dependencias
+
+    def _encadear(self, nome: str, resultado, args=(), kwargs=None):
+        operacao = self._operacao or (nome if nome in _OPERACOES else None)
+        passo = (nome, args, tuple(sorted((kwargs or {}).items())))
+        return Consulta(
+            self._tabela,
+            resultado,
+            self._passos + (passo,),
+            operacao,
+            self._dependencias,
+        )
+
+    def __getattr__(self, nome: str):
+        attr = getattr(self._builder, nome)
+        if not callable(attr):
+            # propriedades como `not_` devolvem o próprio builder
+            if hasattr(attr, "execute"):
+                return self._encadear(nome, attr)
+            return attr
+
+        def chamada(*args, **kwargs):
+            return self._encadear(nome, attr(*args, **kwargs), args, kwargs)
+
+        return chamada
+
+    def _linha_id(self):
+        # valor de .eq("id", ...) na cadeia, se houver (leitura/escrita de uma linha)
+        for nome, args, _ in self._passos:
+            if nome == "eq" and len(args) == 2 and args[0] == "id":
+                return args[1]
+        return None
+
+    def _tabelas(self) -> list[str]:
+        if self._operacao == "rpc":
+            return list(self._dependencias)
+        linha_id = self._linha_id()
+        if linha_id is not None:
+            tabelas = [chave_linha(self._tabela, linha_id), chave_linhas(self._tabela)]
+        else:
+            tabelas = [self._tabela]
+        for nome, args, _ in self._passos:
+            if nome == "select":
+                for coluna in args:
+                    tabelas.extend(_RE_EMBUTIDO.findall(str(coluna)))
+        return list(dict.fromkeys(tabelas))
+
+    def _executar(self, cache: bool) -> tuple:
+        # (resposta, veio_do_cache)
+        if self._operacao not in ("select", "rpc"):
+            try:
+                return self._builder.execute(), False
+            finally:
+                if self._operacao in _OPERACOES_ESCRITA:
+                    linha_id = (
+                        self._linha_id()
+                        if self._operacao in ("update", "delete")
+                        else None
+                    )
+                    cache_consultas.invalidar(self._tabela, linha_id)
+
+        if not cache:
+            return self._builder.execute(), False
+        chave = (_chave_sessao(), self._tabela, repr(self._passos))
+        achou, res = cache_consultas.obter(chave)
+        if achou:
+            return res, True
+        geracoes = cache_consultas.geracoes(self._tabelas())
+        res = self._builder.execute()
+        cache_consultas.guardar(chave, geracoes, res)
+        return res, False
+
+    def _observado(
+        self, executar: Callable[[], tuple], dados: Callable = lambda res: res.data
+    ):
+        if not _observadores:
+            return executar()[0]
+        inicio = time.perf_counter()
+        res, do_cache, erro = None, False, None
+        anterior, _medicao.tamanhos = getattr(_medicao, "tamanhos", None), []
+        try:
+            res, do_cache = executar()
+            return res
+        except Exception as e:
+            erro = e
+            raise
+        finally:
+            tamanhos, _medicao.tamanhos = _medicao.tamanhos, anterior
+            execucao = ExecucaoConsulta(
+                self._tabela,
+                self._operacao,
+                self._passos,
+                time.perf_counter() - inicio,
+                do_cache,
+                bytes=sum(tamanhos) if tamanhos and not do_cache else None,
+                erro=erro,
+            )
+            _notificar(execucao, None if erro else dados(res))
+
+    def execute(self, cache: bool = True):
+        # cache=False: leitura sempre no banco (ex.: sincronização incremental)
+        return self._observado(lambda: self._executar(cache))
+
+    def _dataframe(self) -> tuple:
+        import pandas as pd
+
+        from src.esquemas import ler_csv, tipar
+
+        chave = (_chave_sessao(), self._tabela, repr(self._passos), "csv")
+        achou, df = cache_consultas.obter(chave)
+        if achou:
+            return df, True
+        geracoes = cache_consultas.geracoes(self._tabelas())
+        dados = self._builder.csv().execute().data
+        if isinstance(dados, str):
+            df = ler_csv(dados, self._tabela)
+        else:  # backend sem CSV: mesmo resultado a partir dos registros
+            df = tipar(pd.DataFrame(dados or []), self._tabela)
+        cache_consultas.guardar(chave, geracoes, df)
+        return df, False
+
+    def dataframe(self):
+        """
+        Executa a leitura pedindo a resposta em CSV (Accept: text/csv) e monta
+        um DataFrame já tipado pelo esquema declarado da tabela
+        (src/esquemas.py), sem passar por JSON -> lista de dicts.
+        """
+        if self._operacao != "select":
+            raise ValueError("dataframe() só vale para consultas select().")
+        # cópia: quem chama pode acrescentar colunas sem afetar o cache
+        return self._observado(self._dataframe, dados=lambda df: df).copy()
+
+
+def _postgrest():
+    # o cliente da sessão já nasce no schema vila_da_serra (sem recriar o
+    # cliente HTTP a cada chamada, como faria postgrest.schema())
+    return get_client().postgrest
+
+
 def table(name: str):
-    # Builder já apontado para o schema vila_da_serra
-    return supabase.postgrest.schema(SCHEMA).from_(name)
+    # Builder já apontado para o schema vila_da_serra, com cache de leituras
+    return Consulta(name, _postgrest().from_(name))
+
+
+# Função RPC que não existe no banco (script de sql/ não aplicado): PostgREST
+# responde PGRST202 (o backend local também); 42883 vem do próprio Postgres
+CODIGOS_FUNCAO_AUSENTE = {"PGRST202", "42883"}
+
+
+def funcao_ausente(erro: Exception) -> bool:
+    # só este caso justifica cair no cálculo em processo; o resto é erro de verdade
+    return (
+        isinstance(erro, APIError)
+        and getattr(erro, "code", None) in CODIGOS_FUNCAO_AUSENTE
+    )
+
+
+def rpc(name: str, params: dict | None = None, tabelas: tuple = ()):
+    # Função do schema vila_da_serra; o resultado fica em cache até expirar ou
+    # até uma escrita em alguma das `tabelas` de que ela depende
+    builder = _postgrest().rpc(name, params or {})
+    passos = (("rpc", (name,), tuple(sorted((params or {}).items()))),)
+    return Consulta(f"rpc:{name}", builder, passos, "rpc", tuple(tabelas))
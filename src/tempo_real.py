@@ -0,0 +1,232 @@
+# src/tempo_real.py
+import asyncio
+import logging
+import queue
+import threading
+from dataclasses import dataclass, field
+
+from src.cache import cache_consultas
+from src.config import (
+    CACHE_TTL,
+    CACHE_TTL_TEMPO_REAL,
+    SCHEMA,
+    SUPABASE_URL,
+    TEMPO_REAL_ATIVO,
+    TEMPO_REAL_CHAVE,
+)
+
+log = logging.getLogger(__name__)
+
+# Tabelas acompanhadas (precisam estar na publicação supabase_realtime, sql/007)
+TABELAS_TEMPO_REAL = ("moradores", "ocorrencias", "transacoes")
+
+
+@dataclass
+class Mudanca:
+    tabela: str
+    tipo: str  # "INSERT" | "UPDATE" | "DELETE"
+    registro: dict = field(default_factory=dict)  # linha nova (INSERT/UPDATE)
+    # linha antiga (UPDATE/DELETE; ao menos o id)
+    antigo: dict = field(default_factory=dict)
+
+    @property
+    def linha_id(self):
+        return self.registro.get("id") or self.antigo.get("id")
+
+
+def aplicar_mudanca(m: Mudanca) -> None:
+    """
+    Reflete uma mudança do banco no que está em memória:
+      - INSERT invalida as leituras da tabela inteira (listagens e por id);
+      - UPDATE/DELETE invalidam as listagens e só as leituras por id da linha;
+      - moradores também são corrigidos direto no diretório em memória.
+    """
+    if m.tabela not in TABELAS_TEMPO_REAL:
+        return
+    cache_consultas.invalidar(m.tabela, None if m.tipo == "INSERT" else m.linha_id)
+    if m.tabela == "moradores":
+        from src.diretorio import aplicar_mudanca as aplicar_no_diretorio
+
+        aplicar_no_diretorio(m.tipo, m.registro, m.antigo)
+
+
+def _mudanca_do_payload(payload: dict) -> Mudanca | None:
+    # formato do Realtime: {"data": {"table", "type", "record", "old_record", ...}}
+    dados = payload.get("data", payload) if isinstance(payload, dict) else {}
+    tabela = dados.get("table")
+    tipo = str(dados.get("type") or dados.get("eventType") or "").upper()
+    if not tabela or tipo not in ("INSERT", "UPDATE", "DELETE"):
+        return None
+    return Mudanca(
+        tabela=tabela,
+        tipo=tipo,
+        registro=dados.get("record") or dados.get("new") or {},
+        antigo=dados.get("old_record") or dados.get("old") or {},
+    )
+
+
+# ---------- fontes de eventos ----------
+class FonteMemoria:
+    """
+    Fonte local de eventos, para testes e para o backend em memória:
+    publicar() enfileira e o ouvinte entrega na sua thread.
+    """
+
+    def __init__(self):
+        self._fila: queue.Queue = queue.Queue()
+
+    def publicar(
+        self,
+        tabela: str,
+        tipo: str,
+        registro: dict | None = None,
+        antigo: dict | None = None,
+    ) -> None:
+        self._fila.put(
+            Mudanca(tabela, tipo.upper(), dict(registro or {}), dict(antigo or {}))
+        )
+
+    def aguardar(self) -> None:
+        # bloqueia até todos os eventos publicados terem sido aplicados
+        self._fila.join()
+
+    def executar(self, entregar, conectado, parar: threading.Event) -> None:
+        conectado(True)
+        while not parar.is_set():
+            try:
+                m = self._fila.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            try:
+                entregar(m)
+            finally:
+                self._fila.task_done()
+        conectado(False)
+
+
+class FonteSupabase:
+    """Canal do Supabase Realtime com postgres_changes no schema vila_da_serra."""
+
+    def __init__(
+        self,
+        url: str | None = SUPABASE_URL,
+        chave: str | None = TEMPO_REAL_CHAVE,
+        schema: str = SCHEMA,
+    ):
+        self.url = url
+        self.chave = chave
+        self.schema = schema
+
+    async def _ouvir(self, entregar, conectado, parar: threading.Event) -> None:
+        from supabase import acreate_client
+
+        cliente = await acreate_client(self.url, self.chave)
+
+        def ao_mudar(payload):
+            m = _mudanca_do_payload(payload)
+            if m is not None:
+                entregar(m)
+
+        def ao_inscrever(estado, erro=None):
+            conectado(str(estado).endswith("SUBSCRIBED"))
+            if erro is not None:
+                log.warning("tempo real: %s", erro)
+
+        canal = cliente.channel("vds-mudancas")
+        canal.on_postgres_changes("*", schema=self.schema, callback=ao_mudar)
+        await canal.subscribe(ao_inscrever)
+        try:
+            while not parar.is_set():
+                await asyncio.sleep(0.5)
+        finally:
+            conectado(False)
+            await cliente.remove_all_channels()
+
+    def executar(self, entregar, conectado, parar: threading.Event) -> None:
+        espera = 1.0
+        while not parar.is_set():
+            try:
+                asyncio.run(self._ouvir(entregar, conectado, parar))
+                espera = 1.0
+            except Exception as e:
+                conectado(False)
+                log.warning(
+                    "tempo real desconectado (%s); nova tentativa em %.0fs", e, espera
+                )
+                parar.wait(espera)
+                espera = min(espera * 2, 60.0)
+
+
+# ---------- ouvinte único por processo ----------
+class OuvinteMudancas:
+    """
+    Thread em segundo plano que recebe as mudanças da `fonte` e as aplica ao
+    cache. Enquanto conectado, o TTL do cache sobe para CACHE_TTL_TEMPO_REAL;
+    desconectado, volta ao CACHE_TTL (sem eventos, só a expiração protege).
+    """
+
+    def __init__(self, fonte):
+        self.fonte = fonte
+        self.conectado = False
+        self.eventos = 0
+        self._parar = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _entregar(self, m: Mudanca) -> None:
+        self.eventos += 1
+        try:
+            aplicar_mudanca(m)
+        except Exception:
+            log.exception("falha ao aplicar mudança de %s", m.tabela)
+
+    def _conectado(self, sim: bool) -> None:
+        self.conectado = sim
+        cache_consultas.ttl = CACHE_TTL_TEMPO_REAL if sim else CACHE_TTL
+
+    def iniciar(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(
+            target=self.fonte.executar,
+            args=(self._entregar, self._conectado, self._parar),
+            name="vds-tempo-real",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def parar(self, timeout: float | None = 5.0) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._conectado(False)
+
+
+_ouvinte: OuvinteMudancas | None = None
+_ouvinte_lock = threading.Lock()
+
+
+def iniciar_tempo_real(fonte=None) -> OuvinteMudancas | None:
+    """
+    Inicia (uma vez por processo) o ouvinte de mudanças. Sem `fonte`, usa o
+    Supabase Realtime se VDS_TEMPO_REAL estiver ligado. Chamadas seguintes
+    devolvem o mesmo ouvinte.
+    """
+    global _ouvinte
+    with _ouvinte_lock:
+        if _ouvinte is None:
+            if fonte is None:
+                if not TEMPO_REAL_ATIVO:
+                    return None
+                fonte = FonteSupabase()
+            _ouvinte = OuvinteMudancas(fonte)
+            _ouvinte.iniciar()
+        return _ouvinte
+
+
+def parar_tempo_real() -> None:
+    global _ouvinte
+    with _ouvinte_lock:
+        if _ouvinte is not None:
+            _ouvinte.parar()
+            _ouvinte = None
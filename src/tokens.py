@@ -0,0 +1,179 @@
+# src/tokens.py
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+
+from src.config import (
+    AUTH_JWKS_CACHE_SEGUNDOS,
+    SUPABASE_JWKS_URL,
+    SUPABASE_JWT_SECRET,
+    SUPABASE_URL,
+)
+
+try:
+    import jwt
+    from jwt import PyJWKClient
+except ImportError:  # ES256/RS256 só são verificados com pyjwt[crypto] (extra "jwks")
+    jwt = PyJWKClient = None
+
+# Claims esperadas nos access tokens emitidos pelo GoTrue do Supabase
+AUDIENCIA = "authenticated"
+# Chaves de assinatura assimétricas do Supabase, publicadas no JWKS do GoTrue
+ALGORITMOS_ASSIMETRICOS = {"ES256", "RS256", "EdDSA"}
+
+_jwks = None
+_jwks_lock = threading.Lock()
+
+
+def _b64url(parte: str) -> bytes:
+    return base64.urlsafe_b64decode(parte + "=" * (-len(parte) % 4))
+
+
+def _b64url_codificar(dados: bytes) -> str:
+    return base64.urlsafe_b64encode(dados).rstrip(b"=").decode()
+
+
+def emitir_token(claims: dict, segredo: str) -> str:
+    # JWT HS256 no mesmo formato do GoTrue (usado pelo backend local)
+    cabecalho = _b64url_codificar(
+        json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode()
+    )
+    payload = _b64url_codificar(json.dumps(claims, separators=(",", ":")).encode())
+    assinatura = hmac.new(
+        segredo.encode(), f"{cabecalho}.{payload}".encode(), hashlib.sha256
+    ).digest()
+    return f"{cabecalho}.{payload}.{_b64url_codificar(assinatura)}"
+
+
+def payload_sem_verificar(token: str) -> dict:
+    # Apenas decodifica o payload (uso interno: chaves de cache, diagnósticos)
+    try:
+        return json.loads(_b64url(token.split(".")[1]))
+    except Exception:
+        return {}
+
+
+def _cliente_jwks():
+    # PyJWKClient guarda as chaves por AUTH_JWKS_CACHE_SEGUNDOS; um por processo
+    global _jwks
+    if PyJWKClient is None or not SUPABASE_JWKS_URL:
+        return None
+    with _jwks_lock:
+        if _jwks is None:
+            _jwks = PyJWKClient(
+                SUPABASE_JWKS_URL, cache_keys=True, lifespan=AUTH_JWKS_CACHE_SEGUNDOS
+            )
+        return _jwks
+
+
+def verificar_assinatura(
+    token: str, segredo: str | None = SUPABASE_JWT_SECRET, jwks=None
+) -> bool | None:
+    """
+    Confere a assinatura do `token`: HS256 com o `segredo` do projeto,
+    ES256/RS256/EdDSA com a chave pública do JWKS do GoTrue (`jwks`, um
+    PyJWKClient; por padrão o de SUPABASE_JWKS_URL). Retorna True (assinatura
+    válida), False (inválida ou algoritmo inesperado) ou None quando não dá
+    para verificar localmente (HS256 sem segredo, JWKS indisponível).
+    """
+    try:
+        cab_b64, payload_b64, assinatura_b64 = token.split(".")
+        alg = json.loads(_b64url(cab_b64)).get("alg")
+    except Exception:
+        return False
+
+    if alg == "HS256":
+        if not segredo:
+            return None
+        esperado = hmac.new(
+            segredo.encode(), f"{cab_b64}.{payload_b64}".encode(), hashlib.sha256
+        ).digest()
+        try:
+            return hmac.compare_digest(esperado, _b64url(assinatura_b64))
+        except Exception:
+            return False
+
+    if alg not in ALGORITMOS_ASSIMETRICOS:
+        return False
+    jwks = jwks or _cliente_jwks()
+    if jwks is None or jwt is None:
+        return None
+    try:
+        chave = jwks.get_signing_key_from_jwt(token)
+    except jwt.PyJWKClientConnectionError:
+        return None  # GoTrue fora do ar: fica a cargo do get_user
+    except jwt.PyJWKClientError:
+        return False  # kid desconhecido
+    try:
+        # só a assinatura; as claims são conferidas em validar_token
+        jwt.decode(
+            token,
+            chave.key,
+            algorithms=[alg],
+            options={
+                "verify_signature": True,
+                "verify_exp": False,
+                "verify_nbf": False,
+                "verify_iat": False,
+                "verify_aud": False,
+                "verify_iss": False,
+            },
+        )
+    except jwt.InvalidTokenError:
+        return False
+    return True
+
+
+def validar_token(
+    token: str | None,
+    segredo: str | None = SUPABASE_JWT_SECRET,
+    folga: float = 0.0,
+    jwks=None,
+) -> dict | None:
+    """
+    Valida localmente um access token do Supabase, sem ida ao GoTrue.
+    Confere formato, assinatura (verificar_assinatura), expiração (com
+    `folga` em segundos), audiência, emissor e `sub`. Retorna as claims se o
+    token for válido, senão None.
+
+    Quando a assinatura não pode ser verificada localmente (HS256 sem
+    SUPABASE_JWT_SECRET, JWKS indisponível) as claims são devolvidas mesmo
+    assim, NÃO verificadas: quem confirma o usuário é o GoTrue
+    (auth.usuario_atual chama get_user) e o PostgREST, que recusa tokens mal
+    assinados. verificar_assinatura() diz em qual caso se está.
+    """
+    if not token:
+        return None
+    try:
+        _, payload_b64, _ = token.split(".")
+        claims = json.loads(_b64url(payload_b64))
+    except Exception:
+        return None
+    if not isinstance(claims, dict):
+        return None
+
+    if verificar_assinatura(token, segredo, jwks) is False:
+        return None
+
+    agora = time.time()
+    try:
+        if float(claims["exp"]) <= agora + folga:
+            return None
+        if "nbf" in claims and float(claims["nbf"]) > agora + 30:
+            return None
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    aud = claims.get("aud")
+    auds = aud if isinstance(aud, list) else [aud]
+    if AUDIENCIA not in auds:
+        return None
+    iss = claims.get("iss")
+    if iss and SUPABASE_URL and not str(iss).startswith(SUPABASE_URL.rstrip("/")):
+        return None
+    if not claims.get("sub"):
+        return None
+    return claims
@@ -1,20 +1,303 @@
 # src/ui.py
+import math
+
+import pandas as pd
 import streamlit as st
-from src.supabase_client import supabase, ensure_postgrest_auth
+
+from src.auth import eh_admin, usuario_atual
+from src.config import BUSCA_MORADOR_MIN_CHARS
+from src.diretorio import diretorio
+from src.exportacao import FORMATOS, ErroExportacao, formatos_disponiveis
+from src.formatacao import rotulo_morador
+from src.moradores import buscar_moradores
+from src.rastreamento import rastro_atual
+from src.supabase_client import ensure_postgrest_auth
+
 
 def back_home():
     if st.button("← Voltar para Home"):
         st.switch_page("pages/00_Home.py")
 
+
 def require_auth():
+    # aplica o token uma vez; o usuário vem do cache validado localmente
     ensure_postgrest_auth()
-    try:
-        resp = supabase.auth.get_user()
-        user = getattr(resp, "user", None)
-    except Exception:
-        user = None
+    user = usuario_atual()
     if not user:
         st.switch_page("pages/0_Login.py")
-    # reassert token
-    ensure_postgrest_auth()
     return user
+
+
+# ---------- recarga após escrita ----------
+# Interações dentro de um fragmento rodam só o fragmento; a página inteira só
+# é recarregada depois de uma escrita confirmada, com o aviso exibido no novo run.
+_AVISO_PENDENTE = "_aviso_pendente"
+
+
+def recarregar_pagina(aviso: str | None = None):
+    if aviso:
+        st.session_state[_AVISO_PENDENTE] = aviso
+    st.rerun(scope="app")
+
+
+def mostrar_aviso_pendente():
+    aviso = st.session_state.pop(_AVISO_PENDENTE, None)
+    if aviso:
+        st.success(aviso)
+
+
+# ---------- paginação por keyset ----------
+def cursor_pagina(chave: str, assinatura) -> tuple[tuple | None, int]:
+    """
+    Cursor e número da página atual de uma listagem paginada por keyset.
+    Volta para a 1ª página sempre que `assinatura` (filtros, tamanho) muda.
+    """
+    estado = st.session_state.get(chave)
+    if not estado or estado["assinatura"] != assinatura:
+        estado = {"assinatura": assinatura, "pilha": [None]}
+        st.session_state[chave] = estado
+    return estado["pilha"][-1], len(estado["pilha"])
+
+
+def controles_paginacao(chave: str, pagina, total: int, tamanho: int):
+    # Anterior/Próxima: a pilha guarda o cursor de início de cada página visitada
+    pilha = st.session_state[chave]["pilha"]
+    n_paginas = max(1, math.ceil(total / tamanho)) if tamanho else 1
+    c1, c2, c3 = st.columns([1, 2, 1])
+    with c1:
+        if st.button(
+            "← Anterior",
+            key=f"{chave}_anterior",
+            disabled=len(pilha) == 1,
+            use_container_width=True,
+        ):
+            pilha.pop()
+            st.rerun()
+    with c2:
+        st.caption(f"Página {len(pilha)} de {n_paginas} — {total} registro(s)")
+    with c3:
+        if st.button(
+            "Próxima →",
+            key=f"{chave}_proxima",
+            disabled=not pagina.tem_proxima,
+            use_container_width=True,
+        ):
+            pilha.append(pagina.proximo_cursor)
+            st.rerun()
+
+
+# ---------- seletor de morador ----------
+SEM_VINCULO = "— Sem vínculo —"
+
+
+def seletor_morador(
+    chave: str, rotulo: str = "Morador (opcional)", inicial: dict | None = None
+):
+    """
+    Seletor de morador com busca no servidor, para usar FORA de st.form.
+    O campo de busca só dispara ao confirmar (Enter/sair do campo) e a partir
+    de BUSCA_MORADOR_MIN_CHARS caracteres; termos repetidos saem do cache.
+    As opções são só os ids encontrados (mais o atual); o rótulo de cada id
+    vem de um dicionário via format_func. `inicial` = {"id", "nome", "predio",
+    "apto"} do morador já vinculado. Retorna o id escolhido (ou None).
+    """
+    chave_rotulos = f"{chave}_rotulos"
+    rotulos = {None: SEM_VINCULO}
+    if inicial and inicial.get("id"):
+        rotulos[inicial["id"]] = rotulo_morador(inicial)
+        st.session_state.setdefault(chave, inicial["id"])
+
+    # mantém o rótulo do escolhido mesmo que ele saia dos resultados da busca
+    escolhido = st.session_state.get(chave)
+    anteriores = st.session_state.get(chave_rotulos, {})
+    if escolhido in anteriores:
+        rotulos[escolhido] = anteriores[escolhido]
+
+    termo = st.text_input(
+        "Buscar morador",
+        key=f"{chave}_busca",
+        placeholder="Nome, prédio ou apto",
+    ).strip()
+    if len(termo) >= BUSCA_MORADOR_MIN_CHARS:
+        for m in buscar_moradores(termo):
+            rotulos[m["id"]] = rotulo_morador(m)
+    elif termo:
+        st.caption(f"Digite ao menos {BUSCA_MORADOR_MIN_CHARS} caracteres para buscar.")
+    st.session_state[chave_rotulos] = rotulos
+
+    return st.selectbox(
+        rotulo, list(rotulos), format_func=rotulos.__getitem__, key=chave
+    )
+
+
+def limpar_seletor_morador(chave: str):
+    # volta o seletor ao estado inicial (ex.: depois de salvar o formulário)
+    for k in (chave, f"{chave}_rotulos", f"{chave}_busca"):
+        st.session_state.pop(k, None)
+
+
+# ---------- exportação ----------
+def exportar_listagem(chave: str, assinatura, gerar):
+    """
+    Formato, "Gerar arquivo" (com barra de progresso) e o download.
+    `gerar(formato, progresso)` devolve uma Exportacao (src/exportacao.py);
+    o arquivo gerado (em disco) fica na sessão até ser baixado ou até
+    `assinatura` (filtros) ou o formato mudarem. O download usa `data`
+    adiado: os bytes só são lidos no clique, não a cada rerun.
+    """
+    formatos = formatos_disponiveis()
+    formato = (
+        st.segmented_control(
+            "Formato",
+            formatos,
+            format_func=lambda f: FORMATOS[f].rotulo,
+            default=formatos[0],
+            key=f"{chave}_formato",
+        )
+        or formatos[0]
+    )
+
+    atual = st.session_state.get(chave)
+    if atual is not None and (
+        atual["exportacao"].baixada or atual["assinatura"] != (assinatura, formato)
+    ):
+        atual["exportacao"].fechar()
+        st.session_state.pop(chave)
+        atual = None
+
+    if st.button("Gerar arquivo", key=f"{chave}_gerar"):
+        barra = st.progress(0.0, text="Exportando...")
+
+        def mostrar_progresso(escritas: int, total: int | None):
+            fracao = min(escritas / total, 1.0) if total else 0.0
+            barra.progress(fracao, text=f"{escritas} linha(s) exportada(s)...")
+
+        try:
+            exportacao = gerar(formato, mostrar_progresso)
+        except ErroExportacao as e:
+            barra.empty()
+            st.error(str(e))
+        except Exception as e:
+            barra.empty()
+            st.error("Não foi possível gerar o arquivo.")
+            st.exception(e)
+        else:
+            barra.empty()
+            if atual is not None:
+                atual["exportacao"].fechar()
+            atual = st.session_state[chave] = {
+                "assinatura": (assinatura, formato),
+                "exportacao": exportacao,
+            }
+
+    if atual is not None:
+        exportacao = atual["exportacao"]
+        st.download_button(
+            f"Baixar {exportacao.nome} ({exportacao.linhas} linha(s))",
+            data=exportacao.ler,
+            file_name=exportacao.nome,
+            mime=exportacao.mime,
+            on_click="ignore",
+            key=f"{chave}_baixar",
+            type="primary",
+        )
+        st.caption(
+            "O arquivo é apagado depois do download; "
+            "gere de novo para baixar outra vez."
+        )
+
+
+# ---------- painel de desempenho (administradores) ----------
+def resumo_diretorio(estatisticas: dict) -> None:
+    # acertos/faltas do diretório de moradores e atraso desde a última sincronização
+    consultas = estatisticas["acertos"] + estatisticas["faltas"]
+    acertos = f"acertos {estatisticas['acertos']}/{consultas}"
+    if estatisticas["taxa_acerto"] is not None:
+        acertos += f" ({estatisticas['taxa_acerto']:.0%})"
+    atraso = estatisticas["atraso_s"]
+    partes = [
+        f"Diretório de moradores: {estatisticas['registros']} registros",
+        acertos,
+        f"sincronizado há {atraso:.0f} s" if atraso is not None else "não sincronizado",
+        "incremental" if estatisticas["incremental"] else "recarga completa",
+    ]
+    st.sidebar.caption(" · ".join(partes))
+
+
+def painel_rastreamento(user):
+    """
+    Painel lateral opcional com a cascata de consultas e chamadas de auth do
+    rerun atual e seus totais, mais o estado do diretório de moradores. Só
+    aparece para administradores (VDS_ADMINS).
+    """
+    if not eh_admin(user):
+        return
+    if not st.sidebar.toggle("Desempenho do rerun", key="_painel_rastreamento"):
+        return
+    resumo_diretorio(diretorio(sincronizar=False).estatisticas())
+    rastro = rastro_atual()
+    if rastro is None or not rastro.eventos:
+        st.sidebar.caption("Nenhuma consulta neste rerun.")
+        return
+
+    totais = rastro.totais()
+    c1, c2, c3 = st.sidebar.columns(3)
+    c1.metric("Consultas", totais["consultas"])
+    c2.metric("No banco", totais["banco"])
+    c3.metric("Cache", totais["cache"])
+    st.sidebar.caption(
+        f"{totais['tempo_consultas_ms']:.0f} ms em consultas · "
+        f"{totais['tempo_auth_ms']:.0f} ms em auth · "
+        f"{totais['linhas']} linhas · {totais['bytes'] / 1024:.1f} KiB · "
+        f"{totais['erros']} erro(s)"
+    )
+
+    eventos = sorted(rastro.eventos, key=lambda e: e.inicio)
+    df = pd.DataFrame(
+        {
+            "ordem": range(1, len(eventos) + 1),
+            "alvo": [e.alvo for e in eventos],
+            "tipo": ["cache" if e.cache else e.tipo for e in eventos],
+            "inicio_ms": [(e.inicio - rastro.inicio) * 1000 for e in eventos],
+            "fim_ms": [(e.inicio - rastro.inicio + e.duracao) * 1000 for e in eventos],
+            "duracao_ms": [e.duracao * 1000 for e in eventos],
+            "linhas": [e.linhas for e in eventos],
+            "bytes": [e.bytes for e in eventos],
+            "detalhe": [e.erro or e.detalhe for e in eventos],
+        }
+    )
+    st.sidebar.vega_lite_chart(
+        df,
+        {
+            "mark": {"type": "bar", "tooltip": True},
+            "encoding": {
+                "y": {"field": "ordem", "type": "ordinal", "axis": None},
+                "x": {
+                    "field": "inicio_ms",
+                    "type": "quantitative",
+                    "title": "ms desde o início do rerun",
+                },
+                "x2": {"field": "fim_ms"},
+                "color": {
+                    "field": "tipo",
+                    "type": "nominal",
+                    "legend": {"orient": "bottom", "title": None},
+                },
+                "tooltip": [
+                    {"field": "alvo"},
+                    {"field": "duracao_ms", "format": ".1f"},
+                    {"field": "linhas"},
+                    {"field": "bytes"},
+                    {"field": "detalhe"},
+                ],
+            },
+        },
+        use_container_width=True,
+    )
+    st.sidebar.dataframe(
+        df[["alvo", "tipo", "duracao_ms", "linhas", "bytes", "detalhe"]],
+        hide_index=True,
+        column_config={
+            "duracao_ms": st.column_config.NumberColumn("ms", format="%.1f")
+        },
+    )
@@ -0,0 +1,10 @@
+# tests/conftest.py
+# Os testes rodam contra o backend local (SQLite em memória, semeado no
+# primeiro uso), sem Supabase nem ouvinte de tempo real. As variáveis precisam
+# estar definidas antes do primeiro import de src.config.
+import os
+
+os.environ.setdefault("VDS_BACKEND", "sqlite")
+os.environ.setdefault("VDS_SQLITE_CAMINHO", ":memory:")
+os.environ.setdefault("VDS_TEMPO_REAL", "0")
+os.environ.setdefault("VDS_METRICAS_PORTA", "0")
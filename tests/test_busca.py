@@ -0,0 +1,99 @@
+# tests/test_busca.py
+import pytest
+
+import src.busca as busca
+from src.backend_sqlite import _erro
+from src.busca import IndiceInvertido, buscar_ocorrencias
+from src.supabase_client import table
+
+
+def _indice(*linhas):
+    indice = IndiceInvertido()
+    for n, (titulo, descricao) in enumerate(linhas):
+        indice.adicionar(
+            {"id": str(n), "titulo": titulo, "descricao": descricao, "status": "aberta"}
+        )
+    return indice
+
+
+def _ids(achados):
+    return [linha["id"] for linha, _ in achados]
+
+
+def test_sem_acento_e_com_radical():
+    indice = _indice(("Falta d'água no bloco", ""), ("Vazamentos na garagem", ""))
+    assert _ids(indice.buscar("AGUA")) == ["0"]
+    assert _ids(indice.buscar("vazamento")) == ["1"]
+    assert _ids(indice.buscar("garagens vazando")) == ["1"]
+    assert _ids(indice.buscar("garagem agua")) == []  # todos os termos (E)
+
+
+def test_titulo_pesa_mais_que_descricao():
+    indice = _indice(
+        ("Portão com defeito", "o interfone também"),
+        ("Interfone mudo", "desde ontem"),
+    )
+    assert _ids(indice.buscar("interfone")) == ["1", "0"]
+
+
+def test_remover_tira_do_indice():
+    indice = _indice(("Lâmpada queimada", ""))
+    indice.remover("0")
+    assert indice.buscar("lampada") == [] and len(indice) == 0
+
+
+@pytest.fixture(scope="module")
+def ocorrencias_teste():
+    linhas = [
+        {"titulo": f"Zeplintrox {n}", "descricao": "zeplintrox", "status": status}
+        for n, status in enumerate(["aberta"] * 5 + ["finalizada"] * 2)
+    ]
+    linhas.append(
+        {"titulo": "Outra", "descricao": "menciona zeplintrox", "status": "aberta"}
+    )
+    return table("ocorrencias").insert(linhas).execute().data
+
+
+def test_buscar_ocorrencias_status_e_paginas(ocorrencias_teste):
+    pagina, total = buscar_ocorrencias("zeplintrox", "aberta", 0, 4)
+    assert total == 6
+    assert len(pagina.linhas) == 4 and pagina.proximo_cursor == 4
+    assert all(linha["status"] == "aberta" for linha in pagina.linhas)
+    # só o resumo da descrição, como na listagem
+    assert (
+        "descricao" not in pagina.linhas[0] and "descricao_resumo" in pagina.linhas[0]
+    )
+
+    resto, _ = buscar_ocorrencias("zeplintrox", "aberta", 4, 4)
+    assert len(resto.linhas) == 2 and resto.proximo_cursor is None
+    ids = [linha["id"] for linha in pagina.linhas + resto.linhas]
+    assert len(set(ids)) == 6
+    # quem tem o termo no título vem antes de quem só o tem na descrição
+    assert resto.linhas[-1]["titulo"] == "Outra"
+
+    todas, total = buscar_ocorrencias("ZEPLINTROX", None, 0, 20)
+    assert total == 8 and len(todas.linhas) == 8
+
+
+class _RpcQueFalha:
+    def __init__(self, erro):
+        self.erro = erro
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def execute(self, cache=True):
+        raise self.erro
+
+
+def test_indice_local_so_sem_a_funcao(monkeypatch, ocorrencias_teste):
+    monkeypatch.setattr(
+        busca, "rpc", _RpcQueFalha(_erro("Could not find the function", "PGRST202"))
+    )
+    _, total = buscar_ocorrencias("zeplintrox", None, 0, 20)
+    assert total == 8
+
+    for erro in (_erro("permission denied", "42501"), RuntimeError("rede")):
+        monkeypatch.setattr(busca, "rpc", _RpcQueFalha(erro))
+        with pytest.raises(type(erro)):
+            buscar_ocorrencias("zeplintrox", None, 0, 20)
@@ -0,0 +1,55 @@
+# tests/test_cache.py
+from src.cache import CacheConsultas, chave_linha, chave_linhas
+
+
+def _guardar(cache, chave, tabelas, valor):
+    cache.guardar(chave, cache.geracoes(tabelas), valor)
+
+
+def test_escrita_invalida_listagens_da_tabela():
+    cache = CacheConsultas(ttl=60)
+    _guardar(cache, "lista", ["moradores"], [1])
+    _guardar(cache, "outra", ["ocorrencias"], [2])
+    cache.invalidar("moradores", linha_id=7)
+    assert cache.obter("lista") == (False, None)
+    assert cache.obter("outra") == (True, [2])
+
+
+def test_leitura_por_id_depende_so_da_linha():
+    cache = CacheConsultas(ttl=60)
+    _guardar(cache, "m1", [chave_linha("moradores", 1)], {"id": 1})
+    _guardar(cache, "m2", [chave_linha("moradores", 2)], {"id": 2})
+    cache.invalidar("moradores", linha_id=1)
+    assert cache.obter("m1") == (False, None)
+    assert cache.obter("m2") == (True, {"id": 2})
+
+
+def test_escrita_sem_id_invalida_leituras_por_id():
+    cache = CacheConsultas(ttl=60)
+    _guardar(
+        cache, "m2", [chave_linha("moradores", 2), chave_linhas("moradores")], {"id": 2}
+    )
+    cache.invalidar("moradores")
+    assert cache.obter("m2") == (False, None)
+
+
+def test_resultado_de_leitura_concorrente_com_escrita_nao_e_guardado():
+    cache = CacheConsultas(ttl=60)
+    geracoes = cache.geracoes(["moradores"])
+    cache.invalidar("moradores")
+    cache.guardar("lista", geracoes, [1])
+    assert len(cache) == 0
+
+
+def test_ttl_e_limite_de_entradas():
+    cache = CacheConsultas(ttl=0, max_entradas=2)
+    _guardar(cache, "velha", ["t"], 1)
+    assert cache.obter("velha") == (False, None)
+
+    cache = CacheConsultas(ttl=60, max_entradas=2)
+    for chave in ("a", "b"):
+        _guardar(cache, chave, ["t"], chave)
+    cache.obter("a")  # "b" passa a ser a menos usada
+    _guardar(cache, "c", ["t"], "c")
+    assert cache.obter("b") == (False, None)
+    assert cache.obter("a") == (True, "a")
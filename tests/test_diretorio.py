@@ -0,0 +1,111 @@
+# tests/test_diretorio.py
+import time
+import uuid
+from datetime import timezone
+
+import pytest
+
+from src.diretorio import DiretorioMoradores, _instante
+from src.supabase_client import table
+
+
+def _novo_morador(nome: str) -> dict:
+    linha = {
+        "id": str(uuid.uuid4()),
+        "nome": nome,
+        "telefone": "31999990000",
+        "predio": "9",
+        "apto": f"9{uuid.uuid4().int % 1000:03d}",
+    }
+    table("moradores").insert(linha).execute()
+    return linha
+
+
+@pytest.fixture
+def dir_sincronizado():
+    # intervalo alto: só sincroniza quando o teste força
+    diretorio = DiretorioMoradores(intervalo=3600)
+    diretorio.sincronizar(forcar=True)
+    assert diretorio._incremental
+    return diretorio
+
+
+@pytest.mark.parametrize(
+    "valor",
+    [
+        "2024-05-01T10:00:00+00:00",
+        "2024-05-01T10:00:00.1+00:00",
+        "2024-05-01T10:00:00.1234+00:00",
+        "2024-05-01T10:00:00.123456+00:00",
+        "2024-05-01 10:00:00.12345Z",
+    ],
+)
+def test_instante_aceita_qualquer_fracao(valor):
+    instante = _instante(valor)
+    assert instante is not None
+    assert instante.tzinfo is not None
+    assert instante.astimezone(timezone.utc).replace(microsecond=0).isoformat() == (
+        "2024-05-01T10:00:00+00:00"
+    )
+
+
+@pytest.mark.parametrize("valor", [None, "", "ontem"])
+def test_instante_invalido(valor):
+    assert _instante(valor) is None
+
+
+def test_incremental_traz_inclusao_e_alteracao(dir_sincronizado):
+    linha = _novo_morador("Quixabeira Incremental")
+    dir_sincronizado.sincronizar(forcar=True)
+    assert dir_sincronizado._por_id[linha["id"]]["nome"] == "Quixabeira Incremental"
+
+    marca = dir_sincronizado._marca
+    table("moradores").update({"nome": "Quixabeira Renomeada"}).eq(
+        "id", linha["id"]
+    ).execute()
+    dir_sincronizado.sincronizar(forcar=True)
+    assert dir_sincronizado._incremental
+    assert dir_sincronizado._por_id[linha["id"]]["nome"] == "Quixabeira Renomeada"
+    assert dir_sincronizado._marca > marca
+    assert [m["id"] for m in dir_sincronizado.por_unidade("9", linha["apto"])] == [
+        linha["id"]
+    ]
+
+
+def test_lapide_remove_do_diretorio(dir_sincronizado):
+    linha = _novo_morador("Quixabeira Excluida")
+    dir_sincronizado.sincronizar(forcar=True)
+    assert linha["id"] in dir_sincronizado._por_id
+
+    table("moradores").delete().eq("id", linha["id"]).execute()
+    dir_sincronizado.sincronizar(forcar=True)
+    assert linha["id"] not in dir_sincronizado._por_id
+    assert dir_sincronizado.por_unidade("9", linha["apto"]) == []
+    assert dir_sincronizado._marca_exclusao is not None
+
+
+def test_regravado_depois_da_exclusao_permanece(dir_sincronizado):
+    linha = _novo_morador("Quixabeira Regravada")
+    dir_sincronizado.sincronizar(forcar=True)
+    table("moradores").delete().eq("id", linha["id"]).execute()
+    time.sleep(0.01)  # updated_at da nova gravação depois da lápide
+    table("moradores").insert(linha).execute()
+
+    # as duas mudanças chegam na mesma sincronização: a lápide é mais antiga
+    dir_sincronizado.sincronizar(forcar=True)
+    assert dir_sincronizado._por_id[linha["id"]]["nome"] == "Quixabeira Regravada"
+
+
+def test_estatisticas(dir_sincronizado):
+    linha = _novo_morador("Quixabeira Estatistica")
+    dir_sincronizado.sincronizar(forcar=True)
+    dir_sincronizado.obter(linha["id"])
+    dir_sincronizado.obter(str(uuid.uuid4()))  # falta: busca o id no banco
+
+    estatisticas = dir_sincronizado.estatisticas()
+    assert estatisticas["acertos"] == 1
+    assert estatisticas["faltas"] == 1
+    assert estatisticas["taxa_acerto"] == 0.5
+    assert estatisticas["incremental"]
+    assert estatisticas["registros"] == len(dir_sincronizado)
+    assert estatisticas["atraso_s"] is not None
@@ -0,0 +1,108 @@
+# tests/test_exportacao.py
+import io
+import uuid
+
+import pandas as pd
+import pytest
+
+from src.backend_sqlite import banco_local
+from src.exportacao import ErroExportacao, exportar, paginas_keyset
+from src.supabase_client import table
+
+# período só com as transações deste módulo
+INICIO, FIM = "1993-01-01", "1993-12-31"
+ORDEM = (("data", True), ("created_at", True), ("id", True))
+# as colunas da ordem precisam estar no select: o cursor sai da última linha
+COLUNAS = {
+    "data": "Data",
+    "descricao": "Descrição",
+    "valor": "Valor",
+    "created_at": "Criada em",
+    "id": "ID",
+}
+TOTAL = 23
+
+
+@pytest.fixture(scope="module", autouse=True)
+def transacoes():
+    # vários lançamentos no mesmo dia (e no mesmo insert): o keyset desempata
+    # por created_at e id
+    linhas = [
+        {
+            "id": str(uuid.uuid4()),
+            "data": f"1993-0{1 + i % 4}-{10 + i % 3}",
+            "descricao": f"Exportação {i}",
+            "valor": round(1.1 * (i + 1), 2),
+            "tipo": "entrada" if i % 2 else "saida",
+        }
+        for i in range(TOTAL)
+    ]
+    table("transacoes").insert(linhas).execute()
+
+
+def _esperado() -> pd.DataFrame:
+    return pd.DataFrame(
+        banco_local().executar(
+            "select data, id, valor from transacoes"
+            " where data between ? and ? order by data desc, created_at desc, id desc",
+            [INICIO, FIM],
+        )
+    )
+
+
+def _exportar(formato: str, lote: int, **kwargs):
+    paginas = paginas_keyset(
+        lambda: table("transacoes")
+        .select(",".join(COLUNAS))
+        .gte("data", INICIO)
+        .lte("data", FIM),
+        ORDEM,
+        lote=lote,
+    )
+    vistas = []
+    exportacao = exportar(
+        paginas,
+        COLUNAS,
+        "transacoes",
+        formato,
+        "transacoes",
+        progresso=lambda escritas, total: vistas.append(escritas),
+        total=TOTAL,
+        **kwargs,
+    )
+    return exportacao, vistas
+
+
+def test_csv_em_varias_paginas():
+    exportacao, vistas = _exportar("csv", lote=5)
+    assert vistas == [5, 10, 15, 20, 23]
+    assert exportacao.linhas == TOTAL
+    df = pd.read_csv(io.BytesIO(exportacao.ler()), encoding="utf-8-sig", dtype=str)
+    assert exportacao.baixada
+    exportacao.fechar()
+
+    esperado = _esperado()
+    assert list(df.columns) == list(COLUNAS.values())
+    assert df["ID"].tolist() == esperado["id"].tolist()
+    assert pd.to_numeric(df["Valor"]).tolist() == pytest.approx(
+        esperado["valor"].tolist()
+    )
+
+
+def test_parquet_em_varias_paginas():
+    pq = pytest.importorskip("pyarrow.parquet")
+    exportacao, vistas = _exportar("parquet", lote=4)
+    assert len(vistas) == 6 and vistas[-1] == TOTAL
+    arquivo = pq.ParquetFile(io.BytesIO(exportacao.ler()))
+    exportacao.fechar()
+
+    assert arquivo.metadata.num_rows == TOTAL
+    assert arquivo.metadata.num_row_groups == 6  # um por página
+    tabela = arquivo.read().to_pandas()
+    assert tabela["id"].tolist() == _esperado()["id"].tolist()
+    assert tabela["data"].astype(str).tolist() == _esperado()["data"].tolist()
+
+
+def test_arquivo_acima_do_teto():
+    with pytest.raises(ErroExportacao):
+        _exportar("csv", lote=5, max_bytes=200)
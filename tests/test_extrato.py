@@ -0,0 +1,164 @@
+# tests/test_extrato.py
+import io
+
+import pandas as pd
+import pytest
+
+from src.extrato import (
+    importar_extrato,
+    ler_lancamentos,
+    preparar,
+    valores_em_centavos,
+)
+
+
+@pytest.mark.parametrize(
+    "texto, esperado",
+    [
+        ("1.234,56", 123456),
+        ("1234.56", 123456),
+        ("1,234.56", 123456),
+        ("-50,00", -5000),
+        ("(50,00)", -5000),
+        ("R$ 50,00", 5000),
+        ("50,00 D", -5000),
+        ("0.05", 5),
+        ("12.5", 1250),
+        # ponto de milhar sem casas decimais
+        ("1.234", 123400),
+        ("-1.500", -150000),
+        ("12.345.678", 1234567800),
+        ("1,234", 123400),
+    ],
+)
+def test_valores_em_centavos(texto, esperado):
+    assert valores_em_centavos(pd.Series([texto], dtype="string")).iloc[0] == esperado
+
+
+def test_valores_em_centavos_vazios_viram_na():
+    valores = valores_em_centavos(pd.Series(["", None, "abc"], dtype="string"))
+    assert valores.isna().all()
+
+
+def _lancamentos(linhas, primeira=2):
+    return pd.DataFrame(
+        {
+            "linha": range(primeira, primeira + len(linhas)),
+            "data": pd.to_datetime(
+                [linha[0] for linha in linhas], format="%Y-%m-%d", errors="coerce"
+            ),
+            "descricao": pd.Series([linha[1] for linha in linhas], dtype="string"),
+            "centavos": pd.Series([linha[2] for linha in linhas], dtype="Int64"),
+        }
+    )
+
+
+def test_preparar_hash_estavel_e_ignora_caixa_acento_e_espacos():
+    a, _ = preparar(_lancamentos([("2024-03-01", "Conta de Luz", -5000)]), {})
+    b, _ = preparar(_lancamentos([("2024-03-01", "  conta  de   luz ", -5000)]), {})
+    assert a["hash_importacao"].iloc[0] == b["hash_importacao"].iloc[0]
+    assert a["tipo"].iloc[0] == "saida" and a["valor"].iloc[0] == 50
+
+
+def test_preparar_lancamentos_identicos_em_blocos_diferentes():
+    ocorrencias = {}
+    lancamento = ("2024-03-01", "Tarifa", -1000)
+    primeiro, _ = preparar(_lancamentos([lancamento, lancamento]), ocorrencias)
+    segundo, _ = preparar(_lancamentos([lancamento], primeira=4), ocorrencias)
+    hashes = list(primeiro["hash_importacao"]) + list(segundo["hash_importacao"])
+    assert len(set(hashes)) == 3
+    # reimportar o mesmo arquivo gera os mesmos hashes (e nada é gravado de novo)
+    de_novo, _ = preparar(_lancamentos([lancamento, lancamento, lancamento]), {})
+    assert list(de_novo["hash_importacao"]) == hashes
+
+
+def test_preparar_recusa_linhas_invalidas():
+    validas, erros = preparar(
+        _lancamentos(
+            [
+                ("data ruim", "A", 100),
+                ("2024-03-01", "B", None),
+                ("2024-03-01", "C", 0),
+                ("2024-03-01", "", 100),
+                ("2024-03-01", "D", 100),
+            ]
+        ),
+        {},
+    )
+    assert list(validas.index) == [6]
+    assert [(e.linha, e.motivo) for e in erros] == [
+        (2, "Data inválida."),
+        (3, "Valor inválido."),
+        (4, "Valor zerado."),
+        (5, "Informe a descrição."),
+    ]
+
+
+def _ofx(lancamentos, conta="12345-6") -> io.BytesIO:
+    corpo = "".join(
+        f"<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{data}<TRNAMT>{valor}"
+        + (f"<FITID>{fitid}" if fitid else "")
+        + f"<MEMO>{memo}</STMTTRN>\n"
+        for fitid, data, valor, memo in lancamentos
+    )
+    return io.BytesIO(
+        (
+            "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS>"
+            f"<BANKACCTFROM><BANKID>001<ACCTID>{conta}</BANKACCTFROM>\n"
+            f"<BANKTRANLIST>\n{corpo}</BANKTRANLIST></STMTRS></STMTTRNRS>"
+            "</BANKMSGSRSV1></OFX>\n"
+        ).encode()
+    )
+
+
+def test_ofx_le_fitid_com_a_conta():
+    arquivo = _ofx(
+        [
+            ("F1", "19910301", "-10.00", "Tarifa"),
+            (None, "19910302", "-10.00", "Tarifa"),
+        ]
+    )
+    (bloco,) = ler_lancamentos(arquivo, "extrato.ofx")
+    assert bloco["fitid"].tolist() == ["12345-6|F1", pd.NA]
+
+
+def test_preparar_usa_fitid_quando_houver():
+    lancamentos = _lancamentos(
+        [("2024-03-01", "Tarifa", -1000), ("2024-03-01", "Tarifa", -1000)]
+    )
+    sem_fitid, _ = preparar(lancamentos.copy(), {})
+    assert list(sem_fitid["hash_importacao"]) == list(sem_fitid["hash_conteudo"])
+
+    lancamentos["fitid"] = pd.Series(["c|F1", "c|F2"], dtype="string")
+    com_fitid, _ = preparar(lancamentos.copy(), {})
+    assert com_fitid["hash_importacao"].nunique() == 2
+    # o hash de conteúdo continua o mesmo (importações anteriores ao FITID)
+    assert list(com_fitid["hash_conteudo"]) == list(sem_fitid["hash_conteudo"])
+
+    # o banco corrigiu a descrição: mesmo FITID, mesmo hash
+    lancamentos["descricao"] = pd.Series(["Tarifa pacote", "Tarifa"], dtype="string")
+    corrigido, _ = preparar(lancamentos, {})
+    assert list(corrigido["hash_importacao"]) == list(com_fitid["hash_importacao"])
+
+
+def test_importar_ofx_deduplica_pelo_fitid():
+    lancamentos = [
+        ("A1", "19910401", "-25.00", "Tarifa"),
+        ("A2", "19910401", "-25.00", "Tarifa"),  # igual, mas outro lançamento
+        ("A3", "19910402", "-7.50", "Pix enviado"),
+    ]
+    primeira = importar_extrato(_ofx(lancamentos), "extrato.ofx")
+    assert (primeira.importadas, primeira.repetidas) == (3, 0)
+
+    # reenvio com uma descrição corrigida pelo banco e um FITID repetido
+    corrigidos = [*lancamentos[:2], ("A3", "19910402", "-7.50", "Pix p/ Fulano")]
+    segunda = importar_extrato(_ofx([*corrigidos, lancamentos[0]]), "extrato.ofx")
+    assert (segunda.importadas, segunda.repetidas) == (0, 4)
+
+
+def test_importar_ofx_reconhece_hash_anterior_ao_fitid():
+    lancamentos = [("B1", "19910501", "-12.00", "Condomínio")]
+    sem_fitid = [(None, *lancamento[1:]) for lancamento in lancamentos]
+    assert importar_extrato(_ofx(sem_fitid), "extrato.ofx").importadas == 1
+    resultado = importar_extrato(_ofx(lancamentos), "extrato.ofx")
+    assert (resultado.importadas, resultado.repetidas) == (0, 1)
@@ -0,0 +1,213 @@
+# tests/test_fluxo.py
+import time
+import uuid
+from datetime import date
+
+import pandas as pd
+import pytest
+from postgrest.exceptions import APIError
+
+from src.backend_sqlite import _emissor, banco_local
+from src.config import LOCAL_EMAIL, LOCAL_JWT_SEGREDO, LOCAL_SENHA
+from src.fluxo import carregar_fluxo_mensal, reconstruir_fluxo_mensal, saldo_antes_de
+from src.quadros import quadro_fluxo_mensal
+from src.supabase_client import ensure_postgrest_auth, get_client, table
+from src.tokens import AUDIENCIA, emitir_token
+
+# meses bem antes da semente, só com as transações destes testes
+MES = "1990-03-01"
+OUTRO_MES = "1990-04-01"
+
+
+def _mensal(mes: str) -> dict | None:
+    linhas = banco_local().executar(
+        "select entradas_centavos, saidas_centavos, quantidade"
+        " from transacoes_mensal where mes = ?",
+        [mes],
+    )
+    return linhas[0] if linhas else None
+
+
+@pytest.fixture
+def transacoes():
+    ids = []
+
+    def inserir(data: str, tipo: str, valor: float) -> str:
+        linha = {
+            "id": str(uuid.uuid4()),
+            "data": data,
+            "descricao": "teste consolidação",
+            "valor": valor,
+            "tipo": tipo,
+        }
+        table("transacoes").insert(linha).execute()
+        ids.append(linha["id"])
+        return linha["id"]
+
+    yield inserir
+    if ids:
+        table("transacoes").delete().in_("id", ids).execute()
+
+
+@pytest.fixture
+def sessao():
+    # entra com um token emitido pelo auth local; sai (e limpa o header) no fim
+    cliente = get_client()
+
+    def entrar(admin: bool) -> None:
+        if admin:
+            cliente.auth.sign_in_with_password(
+                {"email": LOCAL_EMAIL, "password": LOCAL_SENHA}
+            )
+            assert ensure_postgrest_auth()
+            return
+        agora = int(time.time())
+        claims = {
+            "sub": str(uuid.uuid4()),
+            "aud": AUDIENCIA,
+            "role": "authenticated",
+            "iss": _emissor(),
+            "email": "morador@exemplo.com",
+            "app_metadata": {"vds_admin": False},
+            "iat": agora,
+            "exp": agora + 600,
+        }
+        cliente.postgrest.auth(emitir_token(claims, LOCAL_JWT_SEGREDO))
+
+    yield entrar
+    cliente.auth.sign_out()
+    ensure_postgrest_auth()
+
+
+def test_gatilhos_mantem_consolidacao(transacoes):
+    entrada = transacoes(f"{MES[:8]}10", "entrada", 10.10)
+    transacoes(f"{MES[:8]}15", "saida", 0.30)
+    assert _mensal(MES) == {
+        "entradas_centavos": 1010,
+        "saidas_centavos": 30,
+        "quantidade": 2,
+    }
+
+    table("transacoes").update({"valor": 20.20}).eq("id", entrada).execute()
+    assert _mensal(MES)["entradas_centavos"] == 2020
+
+    # mudar a data leva a transação para o outro mês
+    table("transacoes").update({"data": f"{OUTRO_MES[:8]}02"}).eq(
+        "id", entrada
+    ).execute()
+    assert _mensal(MES) == {
+        "entradas_centavos": 0,
+        "saidas_centavos": 30,
+        "quantidade": 1,
+    }
+    assert _mensal(OUTRO_MES)["entradas_centavos"] == 2020
+
+    table("transacoes").delete().eq("id", entrada).execute()
+    assert _mensal(OUTRO_MES)["quantidade"] == 0
+
+
+def test_reconstrucao_so_para_administradores(transacoes, sessao):
+    transacoes(f"{MES[:8]}10", "entrada", 5.00)
+    banco_local().executar(
+        "update transacoes_mensal set entradas_centavos = 1 where mes = ?", [MES]
+    )
+
+    with pytest.raises(APIError) as erro:
+        reconstruir_fluxo_mensal()  # sem sessão
+    assert erro.value.code == "42501"
+
+    sessao(admin=False)
+    with pytest.raises(APIError) as erro:
+        reconstruir_fluxo_mensal()
+    assert erro.value.code == "42501"
+    assert _mensal(MES)["entradas_centavos"] == 1
+
+    sessao(admin=True)
+    esperado = banco_local().executar(
+        "select count(distinct substr(data, 1, 7)) as n from transacoes"
+    )[0]["n"]
+    assert reconstruir_fluxo_mensal() == esperado
+    assert _mensal(MES)["entradas_centavos"] == 500
+
+
+def test_saldo_antes_da_janela(transacoes):
+    transacoes(f"{MES[:8]}10", "entrada", 100.00)
+    transacoes(f"{MES[:8]}20", "saida", 30.50)
+    assert saldo_antes_de(date(1990, 3, 20)) == 0
+    assert saldo_antes_de(date(1990, 6, 15)) == pytest.approx(69.50)
+
+    # janela sem nenhum mês com transação: o acumulado vem de antes dela
+    desde, ate = date(1990, 6, 1), date(1990, 8, 31)
+    dados = carregar_fluxo_mensal(desde, ate)
+    assert dados == []
+    df = quadro_fluxo_mensal(
+        dados, desde=desde, ate=ate, saldo_anterior=saldo_antes_de(desde)
+    )
+    assert df["mes_fmt"].tolist() == ["06/1990", "07/1990", "08/1990"]
+    assert df["saldo_acumulado_centavos"].tolist() == [6950, 6950, 6950]
+    assert df["saldo_mes_centavos"].tolist() == [0, 0, 0]
+
+
+def test_quadro_preenche_meses_sem_transacao():
+    dados = [
+        {
+            "mes": "2024-01-01",
+            "entradas": 100.0,
+            "saidas": 40.0,
+            "quantidade": 3,
+            "saldo_mes": 60.0,
+            "saldo_acumulado": 260.0,
+        },
+        {
+            "mes": "2024-03-01",
+            "entradas": 0.0,
+            "saidas": 10.0,
+            "quantidade": 1,
+            "saldo_mes": -10.0,
+            "saldo_acumulado": 250.0,
+        },
+    ]
+    df = quadro_fluxo_mensal(dados, desde=date(2023, 11, 15), ate=date(2024, 4, 2))
+    assert df["mes"].tolist() == list(
+        pd.date_range("2023-11-01", "2024-04-01", freq="MS")
+    )
+    assert df["quantidade"].tolist() == [0, 0, 3, 0, 1, 0]
+    assert df["entradas_centavos"].tolist() == [0, 0, 10000, 0, 0, 0]
+    assert df["saldo_mes_centavos"].tolist() == [0, 0, 6000, 0, -1000, 0]
+    # antes do primeiro mês com dados: o saldo de antes dele, não zero
+    assert df["saldo_acumulado_centavos"].tolist() == [
+        20000,
+        20000,
+        26000,
+        26000,
+        25000,
+        25000,
+    ]
+
+
+def test_quadro_sem_limites_vai_do_primeiro_ao_ultimo_mes():
+    dados = [
+        {
+            "mes": "2024-01-01",
+            "entradas": 1.0,
+            "saidas": 0.0,
+            "quantidade": 1,
+            "saldo_mes": 1.0,
+            "saldo_acumulado": 1.0,
+        },
+        {
+            "mes": "2024-04-01",
+            "entradas": 2.0,
+            "saidas": 0.0,
+            "quantidade": 1,
+            "saldo_mes": 2.0,
+            "saldo_acumulado": 3.0,
+        },
+    ]
+    df = quadro_fluxo_mensal(dados)
+    assert df["mes_fmt"].tolist() == ["01/2024", "02/2024", "03/2024", "04/2024"]
+    assert df["saldo_acumulado_centavos"].tolist() == [100, 100, 100, 300]
+
+
+def test_quadro_vazio():
+    assert quadro_fluxo_mensal([]).empty
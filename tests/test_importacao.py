@@ -0,0 +1,61 @@
+# tests/test_importacao.py
+import io
+
+import pandas as pd
+
+from src.importacao import (
+    chave_morador,
+    importar_moradores,
+    padronizar,
+    validar_bloco,
+)
+
+
+def _bloco(linhas):
+    return padronizar(pd.DataFrame(linhas, columns=["Nome", "Prédio", "Apto"]))
+
+
+def test_chave_morador_ignora_caixa_acento_e_espacos():
+    assert chave_morador(
+        {"predio": "A", "apto": "101", "nome": "José  da Silva"}
+    ) == chave_morador({"predio": " a", "apto": "101 ", "nome": "JOSE DA SILVA"})
+
+
+def test_validar_bloco_repetidos_no_arquivo_e_no_banco():
+    vistos = {chave_morador({"predio": "A", "apto": "101", "nome": "Ana"}): None}
+    df = _bloco(
+        [
+            ["Ana", "A", "101"],  # já cadastrada
+            ["Bruno", "A", "101"],  # mesmo apartamento, outro nome: entra
+            ["bruno", "a", "101"],  # repete a linha 3
+            ["", "", ""],  # em branco: ignorada
+            ["Carla", "", "102"],  # sem prédio
+        ]
+    )
+    validas, erros = validar_bloco(df, 2, vistos)
+    assert list(validas["nome"]) == ["Bruno"]
+    assert [(e.linha, e.motivo, e.repetida) for e in erros] == [
+        (2, "Já cadastrado.", True),
+        (4, "Repetido no arquivo (linha 3).", True),
+        (6, "Informe o prédio.", False),
+    ]
+
+
+def test_validar_bloco_repetido_em_bloco_anterior():
+    vistos = {}
+    validar_bloco(_bloco([["Ana", "A", "101"]]), 2, vistos)
+    validas, erros = validar_bloco(_bloco([["ANA", "A", "101"]]), 3, vistos)
+    assert validas.empty
+    assert [(e.linha, e.motivo) for e in erros] == [
+        (3, "Repetido no arquivo (linha 2).")
+    ]
+
+
+def test_importar_moradores_linhas_em_branco_mantem_numeracao():
+    arquivo = io.BytesIO(
+        b"nome;predio;apto\nZuleica Teste;Z;1\n\n\nYara Teste;;2\n\nXavier Teste;Z;3\n"
+    )
+    resultado = importar_moradores(arquivo, "moradores.csv")
+    assert resultado.lidas == 3
+    assert resultado.importadas == 2
+    assert [(e.linha, e.motivo) for e in resultado.erros] == [(5, "Informe o prédio.")]
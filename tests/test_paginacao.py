@@ -0,0 +1,39 @@
+# tests/test_paginacao.py
+from src.paginacao import ORDEM_PADRAO, buscar_pagina, filtro_apos, ler_tudo
+from src.supabase_client import table
+
+
+def test_filtro_apos_ordem_composta():
+    assert filtro_apos(("2024-01-02T10:00:00+00:00", "b"), ORDEM_PADRAO) == (
+        'created_at.lt."2024-01-02T10:00:00+00:00",'
+        'and(created_at.eq."2024-01-02T10:00:00+00:00",id.lt."b")'
+    )
+
+
+def test_filtro_apos_ordem_crescente_e_aspas():
+    assert filtro_apos(('a"b', 3), (("nome", False), ("id", False))) == (
+        'nome.gt."a\\"b",and(nome.eq."a\\"b",id.gt."3")'
+    )
+
+
+def test_buscar_pagina_percorre_tudo_sem_repetir():
+    def montar():
+        return table("ocorrencias").select("id,created_at")
+
+    vistos, cursor, paginas = [], None, 0
+    while True:
+        pagina = buscar_pagina(montar, cursor, 37, cache=False)
+        assert len(pagina.linhas) <= 37
+        vistos += [linha["id"] for linha in pagina.linhas]
+        paginas += 1
+        if not pagina.tem_proxima:
+            break
+        cursor = pagina.proximo_cursor
+
+    todos = {
+        linha["id"]
+        for linha in ler_tudo(lambda: table("ocorrencias").select("id"), cache=False)
+    }
+    assert len(vistos) == len(set(vistos)) == len(todos)
+    assert set(vistos) == todos
+    assert paginas == -(-len(todos) // 37)
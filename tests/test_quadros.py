@@ -0,0 +1,80 @@
+# tests/test_quadros.py
+import pandas as pd
+import pytest
+
+from src.esquemas import ler_csv
+from src.formatacao import centavos, fmt_reais, formatar_reais
+from src.quadros import quadro_transacoes
+
+
+@pytest.mark.parametrize(
+    "valor, esperado",
+    [
+        ("0.3", 30),
+        (0.1 + 0.2, 30),
+        (-(0.1 + 0.2), -30),
+        ("-12.34", -1234),
+        (-12.34, -1234),
+        ("1.005", 101),  # 1.005 * 100 em float daria 100
+        (1.005, 101),
+        ("-0.125", -13),  # meio centavo: para longe do zero
+        ("0.124999", 12),
+        ("12345678901.99", 1234567890199),
+        (".5", 50),
+        ("7", 700),
+        ("1e-05", 0),
+    ],
+)
+def test_centavos_exatos(valor, esperado):
+    assert centavos(pd.Series([valor], dtype=object)).iloc[0] == esperado
+
+
+def test_centavos_invalidos_viram_na():
+    valores = centavos(pd.Series(["", None, "abc", "-", "1.2.3"], dtype=object))
+    assert valores.isna().all()
+
+
+def test_formatar_reais_negativos_e_zero():
+    serie = pd.Series([-30, 0, -5, 123456789, None], dtype="Int64")
+    assert formatar_reais(serie).tolist() == [
+        "R$ -0.30",
+        "R$ 0.00",
+        "R$ -0.05",
+        "R$ 1,234,567.89",
+        "",
+    ]
+    assert fmt_reais(-30) == "R$ -0.30"
+    assert fmt_reais(None) == ""
+
+
+def test_quadro_transacoes_do_csv_em_centavos():
+    texto = (
+        "id,data,descricao,valor,tipo,created_at\n"
+        "a,2024-03-01,Tarifa,0.30,saida,2024-03-01T10:00:00+00:00\n"
+        "b,2024-03-02,Estorno,-12.34,entrada,2024-03-02T10:00:00+00:00\n"
+        "c,2024-03-03,Cota,1.005,entrada,2024-03-03T10:00:00+00:00\n"
+    )
+    df = quadro_transacoes(ler_csv(texto, "transacoes"))
+    assert str(df["valor_centavos"].dtype) == "Int64"
+    assert df.set_index("id")["valor_centavos"].to_dict() == {
+        "a": 30,
+        "b": -1234,
+        "c": 101,
+    }
+    assert df.set_index("id").loc["b", "valor_fmt"] == "R$ -12.34"
+    # soma exata, sem resíduo de float
+    assert df["valor_centavos"].sum() == 30 - 1234 + 101
+
+
+def test_quadro_transacoes_de_registros_json():
+    df = quadro_transacoes(
+        [
+            {"id": "x", "data": "2024-03-01", "valor": 0.1 + 0.2, "tipo": "saida"},
+            {"id": "y", "data": "2024-03-02", "valor": None, "tipo": "entrada"},
+        ]
+    )
+    por_id = df.set_index("id")
+    assert por_id.loc["x", "valor_centavos"] == 30
+    assert por_id.loc["x", "valor"] == pytest.approx(0.30)
+    assert pd.isna(por_id.loc["y", "valor_centavos"])
+    assert por_id.loc["y", "valor_fmt"] == ""
@@ -0,0 +1,73 @@
+# tests/test_rastreamento.py
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from src.supabase_client import (
+    Consulta,
+    _medir_resposta_http,
+    deixar_de_observar,
+    observar_consultas,
+    table,
+)
+
+
+@pytest.fixture
+def execucoes():
+    vistas = []
+    coletor = observar_consultas(vistas.append)
+    yield vistas
+    deixar_de_observar(coletor)
+
+
+def test_bytes_so_em_respostas_do_banco(execucoes):
+    consulta = table("moradores").select("id,nome").order("nome").limit(7)
+    linhas = consulta.execute().data
+    consulta.execute()  # mesma leitura: vem do cache
+
+    banco, cache = execucoes
+    assert not banco.do_cache and banco.linhas == len(linhas) == 7
+    assert banco.bytes and banco.bytes > 0
+    assert cache.do_cache and cache.linhas == 7
+    assert cache.bytes is None
+
+
+def test_dataframe_mede_o_csv_recebido(execucoes):
+    df = table("moradores").select("id,nome").order("nome").limit(5).dataframe()
+    (execucao,) = execucoes
+    assert execucao.linhas == len(df) == 5
+    assert execucao.bytes and execucao.bytes > 0
+
+
+def _cliente_http(corpo: bytes, cabecalhos: dict) -> httpx.Client:
+    def responder(request):
+        return httpx.Response(200, content=iter([corpo]), headers=cabecalhos)
+
+    return httpx.Client(
+        transport=httpx.MockTransport(responder),
+        event_hooks={"response": [_medir_resposta_http]},
+    )
+
+
+def test_gancho_http_usa_o_tamanho_da_resposta(execucoes):
+    # a resposta da rede passa pelo gancho do httpx dentro de uma execução
+    # observada (aqui simulada com um builder que faz a requisição)
+    class Builder:
+        def __init__(self, cliente):
+            self.cliente = cliente
+
+        def execute(self):
+            resposta = self.cliente.get("https://exemplo.invalid/rest/v1/moradores")
+            return SimpleNamespace(data=resposta.json(), count=None)
+
+    corpo = b'[{"id":1},{"id":2}]'
+    for cabecalhos in ({"content-length": str(len(corpo))}, {}):  # sem: chunked
+        with _cliente_http(corpo, cabecalhos) as cliente:
+            Consulta("moradores", Builder(cliente)).execute(cache=False)
+    assert [e.bytes for e in execucoes] == [len(corpo), len(corpo)]
+
+
+def test_gancho_http_fora_de_execucao_observada_nao_mede():
+    with _cliente_http(b"{}", {}) as cliente:
+        assert cliente.get("https://exemplo.invalid/auth/v1/user").json() == {}
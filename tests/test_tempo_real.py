@@ -0,0 +1,95 @@
+# tests/test_tempo_real.py
+import time
+
+import pytest
+
+from src.cache import cache_consultas, chave_linha, chave_linhas
+from src.config import CACHE_TTL, CACHE_TTL_TEMPO_REAL
+from src.diretorio import diretorio
+from src.tempo_real import FonteMemoria, OuvinteMudancas
+
+
+@pytest.fixture
+def ouvinte():
+    ouvinte = OuvinteMudancas(FonteMemoria())
+    ouvinte.iniciar()
+    limite = time.monotonic() + 5
+    while not ouvinte.conectado and time.monotonic() < limite:
+        time.sleep(0.01)
+    yield ouvinte
+    ouvinte.parar()
+
+
+@pytest.fixture
+def fonte(ouvinte):
+    return ouvinte.fonte
+
+
+def _geracoes(tabela: str, linha_id) -> dict:
+    chaves = (tabela, chave_linhas(tabela), chave_linha(tabela, linha_id))
+    return dict(cache_consultas.geracoes(chaves))
+
+
+def _avancou(antes: dict, depois: dict) -> set:
+    return {chave for chave in antes if depois[chave] > antes[chave]}
+
+
+def test_ttl_maior_enquanto_conectado(ouvinte):
+    assert ouvinte.conectado
+    assert cache_consultas.ttl == CACHE_TTL_TEMPO_REAL
+    ouvinte.parar()
+    assert cache_consultas.ttl == CACHE_TTL
+
+
+def test_insert_invalida_a_tabela_inteira(ouvinte, fonte):
+    antes = _geracoes("ocorrencias", "o1")
+    fonte.publicar("ocorrencias", "INSERT", {"id": "o1", "titulo": "Nova"})
+    fonte.aguardar()
+    assert _avancou(antes, _geracoes("ocorrencias", "o1")) == {
+        "ocorrencias",
+        chave_linhas("ocorrencias"),
+    }
+    assert ouvinte.eventos == 1
+
+
+def test_update_e_delete_invalidam_so_a_linha(fonte):
+    antes = _geracoes("transacoes", "t1")
+    fonte.publicar("transacoes", "update", {"id": "t1", "valor": 10})
+    fonte.aguardar()
+    assert _avancou(antes, _geracoes("transacoes", "t1")) == {
+        "transacoes",
+        chave_linha("transacoes", "t1"),
+    }
+
+    antes = _geracoes("transacoes", "t1")
+    fonte.publicar("transacoes", "DELETE", antigo={"id": "t1"})
+    fonte.aguardar()
+    assert _avancou(antes, _geracoes("transacoes", "t1")) == {
+        "transacoes",
+        chave_linha("transacoes", "t1"),
+    }
+
+
+def test_tabela_fora_da_lista_e_ignorada(fonte):
+    antes = _geracoes("usuarios", "u1")
+    fonte.publicar("usuarios", "INSERT", {"id": "u1"})
+    fonte.aguardar()
+    assert _geracoes("usuarios", "u1") == antes
+
+
+def test_moradores_corrigidos_no_diretorio(fonte):
+    dir_ = diretorio(sincronizar=False)
+    morador = {"id": "m-tr", "nome": "Tempo Real", "predio": "TR", "apto": "1"}
+
+    fonte.publicar("moradores", "INSERT", morador)
+    fonte.aguardar()
+    assert [m["nome"] for m in dir_.por_unidade("TR", "1")] == ["Tempo Real"]
+
+    fonte.publicar("moradores", "UPDATE", {**morador, "apto": "2"}, {"id": "m-tr"})
+    fonte.aguardar()
+    assert dir_.por_unidade("TR", "1") == []
+    assert [m["apto"] for m in dir_.por_unidade("TR", "2")] == ["2"]
+
+    fonte.publicar("moradores", "DELETE", antigo={"id": "m-tr"})
+    fonte.aguardar()
+    assert dir_.por_unidade("TR", "2") == []
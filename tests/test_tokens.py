@@ -0,0 +1,85 @@
+# tests/test_tokens.py
+import time
+
+import pytest
+
+from src.tokens import emitir_token, validar_token, verificar_assinatura
+
+SEGREDO = "segredo-de-teste"
+
+
+def _claims(**extra):
+    return {"sub": "u1", "aud": "authenticated", "exp": time.time() + 3600, **extra}
+
+
+class _JwksFixo:
+    # no lugar do PyJWKClient: devolve sempre a mesma chave pública
+    def __init__(self, chave):
+        self.chave = chave
+
+    def get_signing_key_from_jwt(self, token):
+        import jwt
+
+        return jwt.PyJWK.from_dict(
+            jwt.algorithms.ECAlgorithm.to_jwk(self.chave, as_dict=True)
+            | {"alg": "ES256"}
+        )
+
+
+def test_hs256_valido():
+    claims = validar_token(emitir_token(_claims(), SEGREDO), SEGREDO)
+    assert claims["sub"] == "u1"
+
+
+@pytest.mark.parametrize(
+    "claims",
+    [
+        _claims(exp=time.time() - 1),
+        _claims(aud="anon"),
+        _claims(sub=""),
+        _claims(nbf=time.time() + 3600),
+    ],
+)
+def test_claims_invalidas(claims):
+    assert validar_token(emitir_token(claims, SEGREDO), SEGREDO) is None
+
+
+def test_folga_antes_de_vencer():
+    token = emitir_token(_claims(exp=time.time() + 30), SEGREDO)
+    assert validar_token(token, SEGREDO) is not None
+    assert validar_token(token, SEGREDO, folga=60) is None
+
+
+def test_assinatura_hs256_errada_ou_adulterada():
+    token = emitir_token(_claims(), SEGREDO)
+    assert validar_token(token, "outro") is None
+    cab, _, assinatura = token.split(".")
+    adulterado = emitir_token(_claims(sub="u2"), "outro").split(".")[1]
+    assert validar_token(f"{cab}.{adulterado}.{assinatura}", SEGREDO) is None
+    assert validar_token("nao-e-um-jwt", SEGREDO) is None
+
+
+def test_sem_segredo_nao_verifica_localmente():
+    token = emitir_token(_claims(), SEGREDO)
+    assert verificar_assinatura(token, None) is None
+    assert validar_token(token, None)["sub"] == "u1"
+
+
+def test_es256_pelo_jwks():
+    # ES256/RS256 exigem pyjwt[crypto] (extra "jwks")
+    jwt = pytest.importorskip("jwt")
+    ec = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ec")
+    chave = ec.generate_private_key(ec.SECP256R1())
+    token = jwt.encode(_claims(), chave, algorithm="ES256", headers={"kid": "k1"})
+    assert (
+        validar_token(token, SEGREDO, jwks=_JwksFixo(chave.public_key()))["sub"] == "u1"
+    )
+    outra = ec.generate_private_key(ec.SECP256R1()).public_key()
+    assert validar_token(token, SEGREDO, jwks=_JwksFixo(outra)) is None
+
+
+def test_algoritmo_inesperado_recusado():
+    jwt = pytest.importorskip("jwt")
+    token = jwt.encode(_claims(), SEGREDO * 8, algorithm="HS512")
+    assert verificar_assinatura(token, SEGREDO) is False
+    assert validar_token(token, SEGREDO) is None